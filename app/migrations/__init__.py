@@ -0,0 +1,121 @@
+"""
+Versioned schema migrations.
+
+The schema_version table records every migration applied. upgrade() is
+run once per deploy by migrate.py (and by create_app when MIGRATE_ON_START
+is set); when the database is already at the latest version it costs one
+SELECT. Otherwise it takes a lock - a PostgreSQL advisory lock, or a lock
+file next to a SQLite database - so concurrent workers don't race, then
+applies what is missing:
+
+- a database with no tables gets the current schema straight from the
+  models and is stamped with the latest version;
+- a database from before versioning (tables, no schema_version) runs
+  every migration, each of which only changes what is missing;
+- anything else runs the migrations after its version.
+
+To change the schema, change the models and add the next migration to
+app/migrations/versions.py for existing databases.
+"""
+import contextlib
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from app.models import db
+from app.migrations.versions import MIGRATIONS
+
+schema_version = db.Table(
+    'schema_version',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(200), nullable=False),
+    db.Column('applied_at', db.DateTime, default=db.func.current_timestamp())
+)
+
+LATEST_VERSION = max(version for version, _, _ in MIGRATIONS)
+
+# pg_advisory_lock key shared by every process migrating the same database
+_ADVISORY_LOCK_KEY = 48210731
+
+
+def current_version():
+    """The schema version recorded in the database, or None if it has no schema_version table"""
+    try:
+        return db.session.execute(db.select(db.func.coalesce(db.func.max(schema_version.c.version), 0))).scalar()
+    except (OperationalError, ProgrammingError):
+        db.session.rollback()
+        return None
+    finally:
+        # Don't keep a read transaction open across the lock wait
+        db.session.commit()
+
+
+@contextlib.contextmanager
+def _migration_lock():
+    engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as connection:
+            connection.execute(db.text("SELECT pg_advisory_lock(:key)"), {'key': _ADVISORY_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(db.text("SELECT pg_advisory_unlock(:key)"), {'key': _ADVISORY_LOCK_KEY})
+                connection.commit()
+    elif engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+        import fcntl
+        with open(f"{engine.url.database}.migrate-lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+def _record(version, name):
+    db.session.execute(schema_version.insert().values(version=version, name=name))
+    db.session.commit()
+
+
+def _create_schema(log):
+    from app.models.company_settings import CompanySettings
+    from app.services.invoice_search import ensure_search_index
+
+    db.create_all()
+    ensure_search_index()
+    db.session.add(CompanySettings(company_name="TRUEZEN TECHNOLOGIES", company_address=""))
+    db.session.commit()
+    _record(LATEST_VERSION, 'create schema')
+    log(f"✓ Created the schema at version {LATEST_VERSION}")
+
+
+def upgrade(log=print):
+    """Bring the database schema up to the latest version; returns the versions applied"""
+    if current_version() == LATEST_VERSION:
+        return []
+
+    with _migration_lock():
+        # Another process may have finished while this one waited
+        version = current_version()
+        if version == LATEST_VERSION:
+            return []
+        if version is None:
+            fresh = not db.inspect(db.engine).has_table('employees')
+            schema_version.create(db.engine, checkfirst=True)
+            if fresh:
+                _create_schema(log)
+                return [LATEST_VERSION]
+            log("Database predates schema versioning; running every migration")
+            version = 0
+
+        applied = []
+        for migration_version, name, apply in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            log(f"Applying migration {migration_version:03d}: {name}")
+            try:
+                apply(log)
+            except Exception:
+                db.session.rollback()
+                raise
+            _record(migration_version, name)
+            applied.append(migration_version)
+        return applied
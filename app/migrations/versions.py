@@ -0,0 +1,277 @@
+"""
+The schema migrations, oldest first.
+
+Each takes a log callable for progress lines and leaves its changes
+committed. They run against databases of any age, so they only select the
+columns they need instead of loading models, whose tables may still lack
+columns added further down the list. Fresh databases skip them all (see
+app/migrations/__init__.py), so a migration only has to handle databases
+created before it existed.
+"""
+import json
+import os
+from config import Config
+from app.models import db
+from app.models.company_settings import CompanySettings
+from app.models.consultancy import Consultancy
+from app.models.employee import Employee
+from app.models.invoice import Invoice, invoice_employees
+from app.models.invoice_line import InvoiceLine
+from app.models.invoice_sequence import InvoiceSequence
+from app.models.pdf_job import PdfJob
+from app.models.revenue_summary import RevenueSummary
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def register(func):
+        MIGRATIONS.append((version, name, func))
+        return func
+    return register
+
+
+def _has_column(table, column):
+    inspector = db.inspect(db.session.connection())
+    return any(info['name'] == column for info in inspector.get_columns(table))
+
+
+def _add_columns(table, columns, log):
+    """Add the (name, definition) columns the table lacks; returns the names added"""
+    added = []
+    for column, definition in columns:
+        if _has_column(table, column):
+            log(f"✓ {table}.{column} column already exists")
+            continue
+        db.session.execute(db.text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+        db.session.commit()
+        log(f"✓ {table}.{column} column added")
+        added.append(column)
+    return added
+
+
+def _create_table(table, log):
+    # Creates the table and its indexes if missing; existing tables are left alone
+    table.create(db.session.connection(), checkfirst=True)
+    db.session.commit()
+    log(f"✓ {table.name} table ready")
+
+
+@migration(1, 'company_settings.logo_path')
+def add_company_logo_path(log):
+    _add_columns('company_settings', [('logo_path', 'VARCHAR(500)')], log)
+
+
+@migration(2, 'employee joining and salary date fields')
+def add_employee_fields(log):
+    added = _add_columns('employees', [
+        ('is_new_employee', 'BOOLEAN DEFAULT FALSE'),
+        ('date_of_joining', 'DATE'),
+        ('salary_date', 'INTEGER DEFAULT 10'),
+    ], log)
+    if 'salary_date' in added:
+        db.session.execute(db.text("UPDATE employees SET salary_date = 10 WHERE salary_date IS NULL"))
+        db.session.commit()
+
+
+@migration(3, 'invoices.miscellaneous_cost')
+def add_invoice_miscellaneous_cost(log):
+    if _add_columns('invoices', [('miscellaneous_cost', 'NUMERIC(10, 2) DEFAULT 0')], log):
+        db.session.execute(db.text("UPDATE invoices SET miscellaneous_cost = 0 WHERE miscellaneous_cost IS NULL"))
+        db.session.commit()
+
+
+@migration(4, 'invoices.service_fee')
+def add_invoice_service_fee(log):
+    if _add_columns('invoices', [('service_fee', 'NUMERIC(10, 2) DEFAULT 0')], log):
+        db.session.execute(db.text("UPDATE invoices SET service_fee = 0 WHERE service_fee IS NULL"))
+        db.session.commit()
+
+
+@migration(5, 'pdf_jobs table')
+def create_pdf_jobs(log):
+    _create_table(PdfJob.__table__, log)
+
+
+@migration(6, 'company logo renditions')
+def add_company_logo_renditions(log):
+    from app.services.logo_service import process_logo
+
+    _add_columns('company_settings', [('logo_pdf_path', 'VARCHAR(500)')], log)
+    # Process logos uploaded before renditions existed
+    for settings in CompanySettings.query.filter(
+        CompanySettings.logo_path.isnot(None),
+        CompanySettings.logo_pdf_path.is_(None)
+    ).all():
+        original = os.path.join(Config.BASE_DIR, 'app', 'static', settings.logo_path)
+        if not os.path.exists(original):
+            log(f"! Logo file missing, skipping: {settings.logo_path}")
+            continue
+        with open(original, 'rb') as f:
+            settings.logo_path, settings.logo_pdf_path = process_logo(f.read(), os.path.basename(original))
+        log(f"✓ Built renditions for {original}")
+    db.session.commit()
+
+
+@migration(7, 'invoice_lines table and backfill')
+def create_invoice_lines(log):
+    from app.services.invoice_lines import build_invoice_lines
+
+    _create_table(InvoiceLine.__table__, log)
+    # Snapshot old invoices from the current employee rows - the same
+    # figures those invoices have been showing all along
+    employee_columns = db.load_only(Employee.id, Employee.name, Employee.salary_per_month, Employee.is_new_employee,
+                                    Employee.date_of_joining, Employee.salary_date)
+    with_lines = db.select(InvoiceLine.invoice_id)
+    backfilled = missing_employees = 0
+    for invoice_id, invoice_date, employee_ids in db.session.execute(
+            db.select(Invoice.id, Invoice.invoice_date, Invoice.employee_ids)
+            .where(Invoice.id.not_in(with_lines)).order_by(Invoice.id)).all():
+        employee_ids = json.loads(employee_ids)
+        employees = db.session.query(Employee).options(employee_columns).filter(Employee.id.in_(employee_ids)).all()
+        if len(employees) < len(set(map(int, employee_ids))):
+            missing_employees += 1
+            log(f"! Invoice {invoice_id}: some billed employees no longer exist and are left out")
+        for line in build_invoice_lines(employees, invoice_date):
+            line.invoice_id = invoice_id
+            db.session.add(line)
+        backfilled += 1
+    db.session.commit()
+    log(f"✓ Backfilled line items for {backfilled} invoices ({missing_employees} with deleted employees)")
+
+
+@migration(8, 'invoice_sequences table')
+def create_invoice_sequences(log):
+    from app.services.invoice_numbers import highest_issued_number
+
+    _create_table(InvoiceSequence.__table__, log)
+    # One counter per INV-YYYYMMDD prefix, continuing after its highest number
+    prefixes = {number.rsplit('-', 1)[0]
+                for number in db.session.execute(db.select(Invoice.invoice_number)).scalars()
+                if number.count('-') == 2}
+    seeded = 0
+    for prefix in sorted(prefixes):
+        highest = highest_issued_number(prefix)
+        sequence = db.session.get(InvoiceSequence, prefix)
+        if sequence is None:
+            db.session.add(InvoiceSequence(prefix=prefix, last_number=highest))
+            seeded += 1
+        elif sequence.last_number < highest:
+            sequence.last_number = highest
+            seeded += 1
+    db.session.commit()
+    log(f"✓ Seeded {seeded} invoice number sequences")
+
+
+@migration(9, 'invoice idempotency keys and content hashes')
+def add_invoice_dedup(log):
+    from app.services.idempotency import invoice_content_hash
+    from app.services.money import Money
+
+    _add_columns('invoices', [('idempotency_key', 'VARCHAR(100)'), ('content_hash', 'VARCHAR(64)')], log)
+    # Hash existing invoices; where the same bill was issued more than
+    # once, only the first keeps the hash so the unique index holds
+    seen = set(db.session.execute(db.select(Invoice.content_hash).where(Invoice.content_hash.isnot(None))).scalars())
+    hashed = duplicates = 0
+    for invoice_id, invoice_number, consultancy, employee_ids, invoice_date, service_fee, miscellaneous_cost in \
+            db.session.execute(db.select(
+                Invoice.id, Invoice.invoice_number, Invoice.client_consultancy, Invoice.employee_ids,
+                Invoice.invoice_date, Invoice.service_fee, Invoice.miscellaneous_cost
+            ).where(Invoice.content_hash.is_(None)).order_by(Invoice.id)).all():
+        content_hash = invoice_content_hash(consultancy, json.loads(employee_ids), invoice_date,
+                                            bool(service_fee), Money.from_decimal(miscellaneous_cost))
+        if content_hash in seen:
+            duplicates += 1
+            log(f"! {invoice_number} repeats an earlier invoice and is left unhashed")
+            continue
+        seen.add(content_hash)
+        db.session.execute(db.update(Invoice).where(Invoice.id == invoice_id).values(content_hash=content_hash))
+        hashed += 1
+    db.session.commit()
+    log(f"✓ Hashed {hashed} invoices ({duplicates} duplicates left unhashed)")
+
+    for column in ('idempotency_key', 'content_hash'):
+        db.session.execute(db.text(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_invoices_{column} ON invoices ({column})"))
+    db.session.commit()
+    log("✓ Unique indexes ready")
+
+
+@migration(10, 'invoice_employees table')
+def create_invoice_employees(log):
+    _create_table(invoice_employees, log)
+    # Only link employees that still exist - the foreign key needs them
+    existing_ids = set(db.session.execute(db.select(Employee.id)).scalars())
+    linked_invoices = db.select(invoice_employees.c.invoice_id)
+    rows = []
+    missing_employees = 0
+    for invoice_id, employee_ids in db.session.execute(
+            db.select(Invoice.id, Invoice.employee_ids).where(Invoice.id.not_in(linked_invoices))):
+        ids = {int(employee_id) for employee_id in json.loads(employee_ids)}
+        missing_employees += len(ids - existing_ids)
+        rows.extend({'invoice_id': invoice_id, 'employee_id': employee_id}
+                    for employee_id in sorted(ids & existing_ids))
+    if rows:
+        db.session.execute(invoice_employees.insert(), rows)
+    db.session.commit()
+    log(f"✓ Linked {len(rows)} invoice/employee pairs ({missing_employees} references to deleted employees skipped)")
+
+
+@migration(11, 'consultancies table')
+def create_consultancies(log):
+    from app.services.consultancies import get_or_create_consultancy
+
+    _create_table(Consultancy.__table__, log)
+    for table in ('employees', 'invoices'):
+        _add_columns(table, [('consultancy_id', 'INTEGER REFERENCES consultancies (id)')], log)
+
+    # Names differing only in case or spacing become one consultancy,
+    # spelled as first seen; employees take that spelling too, while
+    # invoices keep the name they were issued under
+    names = set(db.session.execute(db.select(Employee.client_consultancy).distinct()).scalars())
+    names |= set(db.session.execute(db.select(Invoice.client_consultancy).distinct()).scalars())
+    for name in sorted(names):
+        consultancy = get_or_create_consultancy(name)
+        db.session.execute(db.update(Employee).where(Employee.client_consultancy == name)
+                           .values(consultancy_id=consultancy.id, client_consultancy=consultancy.name))
+        db.session.execute(db.update(Invoice).where(Invoice.client_consultancy == name)
+                           .values(consultancy_id=consultancy.id))
+    db.session.commit()
+    log(f"✓ Linked {len(names)} consultancy names to {Consultancy.query.count()} consultancies")
+
+    db.session.execute(db.text("CREATE INDEX IF NOT EXISTS ix_employees_consultancy_id_created_at "
+                               "ON employees (consultancy_id, created_at)"))
+    db.session.execute(db.text("CREATE INDEX IF NOT EXISTS ix_invoices_consultancy_id_invoice_date "
+                               "ON invoices (consultancy_id, invoice_date)"))
+    db.session.commit()
+    log("✓ Consultancy indexes ready")
+
+
+@migration(12, 'keyset pagination indexes')
+def add_pagination_indexes(log):
+    for table in ('invoices', 'employees'):
+        db.session.execute(db.text(f"CREATE INDEX IF NOT EXISTS ix_{table}_created_at_id ON {table} (created_at, id)"))
+        log(f"✓ ix_{table}_created_at_id index ready")
+    db.session.commit()
+
+
+@migration(13, 'invoice search indexes')
+def add_invoice_search(log):
+    from app.services.invoice_search import ensure_search_index
+
+    for column in ('invoice_date', 'total_monthly_payroll'):
+        db.session.execute(db.text(f"CREATE INDEX IF NOT EXISTS ix_invoices_{column} ON invoices ({column})"))
+        log(f"✓ ix_invoices_{column} index ready")
+    db.session.commit()
+    if ensure_search_index():
+        log("✓ Full-text index created and existing invoices indexed")
+    else:
+        log("✓ Full-text index ready")
+
+
+@migration(14, 'revenue_summaries table')
+def create_revenue_summary(log):
+    from app.services.revenue import rebuild_revenue_summary
+
+    _create_table(RevenueSummary.__table__, log)
+    rows = rebuild_revenue_summary()
+    log(f"✓ Revenue summary rebuilt ({rows} month/consultancy rows)")
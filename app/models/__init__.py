@@ -2,7 +2,11 @@ from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
+from app.models.consultancy import Consultancy
 from app.models.employee import Employee
 from app.models.invoice import Invoice
+from app.models.invoice_line import InvoiceLine
+from app.models.invoice_sequence import InvoiceSequence
+from app.models.revenue_summary import RevenueSummary
 from app.models.company_settings import CompanySettings
-
+from app.models.pdf_job import PdfJob
@@ -6,7 +6,8 @@ class CompanySettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     company_name = db.Column(db.String(200), nullable=False, default="TRUEZEN TECHNOLOGIES")
     company_address = db.Column(db.Text, nullable=False, default="")
-    logo_path = db.Column(db.String(500), nullable=True, default=None)
+    logo_path = db.Column(db.String(500), nullable=True, default=None)  # Web rendition
+    logo_pdf_path = db.Column(db.String(500), nullable=True, default=None)  # Rendition embedded in PDFs
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     
     def __repr__(self):
@@ -17,6 +18,7 @@ class CompanySettings(db.Model):
             'id': self.id,
             'company_name': self.company_name,
             'company_address': self.company_address,
-            'logo_path': self.logo_path
+            'logo_path': self.logo_path,
+            'logo_pdf_path': self.logo_pdf_path
         }
 
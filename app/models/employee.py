@@ -8,12 +8,20 @@ class Employee(db.Model):
     name = db.Column(db.String(200), nullable=False)
     salary_per_annum = db.Column(db.Numeric(10, 2), nullable=False)
     salary_per_month = db.Column(db.Numeric(10, 2), nullable=False)
-    client_consultancy = db.Column(db.String(200), nullable=False)
+    client_consultancy = db.Column(db.String(200), nullable=False)  # Consultancy name, kept for display
+    consultancy_id = db.Column(db.Integer, db.ForeignKey('consultancies.id'), nullable=True)
     is_new_employee = db.Column(db.Boolean, default=False, nullable=False)
     date_of_joining = db.Column(db.Date, nullable=True)
     salary_date = db.Column(db.Integer, default=10, nullable=False)  # Day of month (default 10th)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     
+    consultancy = db.relationship('Consultancy')
+    
+    __table_args__ = (
+        db.Index('ix_employees_consultancy_id_created_at', 'consultancy_id', 'created_at'),
+        db.Index('ix_employees_created_at_id', 'created_at', 'id'),  # Keyset pagination
+    )
+    
     def __repr__(self):
         return f'<Employee {self.name}>'
     
@@ -24,6 +32,7 @@ class Employee(db.Model):
             'salary_per_annum': float(self.salary_per_annum),
             'salary_per_month': float(self.salary_per_month),
             'client_consultancy': self.client_consultancy,
+            'consultancy_id': self.consultancy_id,
             'is_new_employee': self.is_new_employee,
             'date_of_joining': self.date_of_joining.strftime('%Y-%m-%d') if self.date_of_joining else None,
             'salary_date': self.salary_date
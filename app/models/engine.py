@@ -0,0 +1,71 @@
+"""
+Database engine settings from the environment (see Config).
+
+SQLite gets its pragmas on every new connection: journal mode (WAL by
+default, so page reads never block the writer or the other way round),
+busy_timeout, so a writer queues for the lock instead of failing with
+"database is locked", and the synchronous level. PostgreSQL gets a sized
+QueuePool per worker process, with pre-ping so connections dropped while
+idle are replaced instead of failing a request, and recycling.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+_JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+_SYNCHRONOUS_LEVELS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+
+def database_uri(uri):
+    """uri with the postgres:// scheme some hosts hand out renamed to postgresql://, which SQLAlchemy requires"""
+    if uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database"""
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def sqlite_pragmas(config):
+    """The PRAGMA statements run on each new SQLite connection, checked against what SQLite accepts"""
+    journal_mode = config['SQLITE_JOURNAL_MODE'].upper()
+    synchronous = config['SQLITE_SYNCHRONOUS'].upper()
+    if journal_mode not in _JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE must be one of {', '.join(sorted(_JOURNAL_MODES))}")
+    if synchronous not in _SYNCHRONOUS_LEVELS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(sorted(_SYNCHRONOUS_LEVELS))}")
+    return [
+        # First, so switching the journal mode also waits for the lock
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA journal_mode = {journal_mode}",
+        f"PRAGMA synchronous = {synchronous}",
+    ]
+
+
+def init_db(app, db):
+    """db.init_app(app) with the engine options and, on SQLite, the connection pragmas from app.config"""
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(app.config),
+                                               **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    db.init_app(app)
+    
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        pragmas = sqlite_pragmas(app.config)
+        
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
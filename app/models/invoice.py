@@ -1,22 +1,46 @@
 from app.models import db
 import json
 
+# Which employees each invoice billed. The primary key serves invoice -> employees,
+# the reverse index employee -> invoices (billing history)
+invoice_employees = db.Table(
+    'invoice_employees',
+    db.Column('invoice_id', db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('employee_id', db.Integer, db.ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_invoice_employees_employee_id_invoice_id', 'employee_id', 'invoice_id')
+)
+
 class Invoice(db.Model):
     __tablename__ = 'invoices'
     
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(50), unique=True, nullable=False)
-    invoice_date = db.Column(db.Date, nullable=False)
+    invoice_date = db.Column(db.Date, nullable=False, index=True)
     invoice_to = db.Column(db.String(200), nullable=False)
-    client_consultancy = db.Column(db.String(200), nullable=False)
+    client_consultancy = db.Column(db.String(200), nullable=False)  # Consultancy name as invoiced
+    consultancy_id = db.Column(db.Integer, db.ForeignKey('consultancies.id'), nullable=True)
     employee_ids = db.Column(db.Text, nullable=False)  # JSON array of employee IDs
-    total_monthly_payroll = db.Column(db.Numeric(10, 2), nullable=False)
+    total_monthly_payroll = db.Column(db.Numeric(10, 2), nullable=False, index=True)
     total_annual_payroll = db.Column(db.Numeric(10, 2), nullable=False)
     miscellaneous_cost = db.Column(db.Numeric(10, 2), default=0, nullable=False)
     service_fee = db.Column(db.Numeric(10, 2), default=0, nullable=False)
     notes = db.Column(db.Text)
+    # Duplicate protection: see app/services/idempotency.py
+    idempotency_key = db.Column(db.String(100), unique=True, index=True)
+    content_hash = db.Column(db.String(64), unique=True, index=True)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     
+    lines = db.relationship('InvoiceLine', order_by='InvoiceLine.position', cascade='all, delete-orphan',
+                            passive_deletes=True)
+    employees = db.relationship('Employee', secondary=invoice_employees, order_by='Employee.id',
+                                passive_deletes=True)
+    consultancy = db.relationship('Consultancy')
+    
+    __table_args__ = (
+        db.Index('ix_invoices_consultancy_id_invoice_date', 'consultancy_id', 'invoice_date'),
+        db.Index('ix_invoices_created_at_id', 'created_at', 'id'),  # Keyset pagination
+    )
+    
     def __repr__(self):
         return f'<Invoice {self.invoice_number}>'
     
@@ -33,6 +57,7 @@ class Invoice(db.Model):
             'invoice_date': self.invoice_date.isoformat() if self.invoice_date else None,
             'invoice_to': self.invoice_to,
             'client_consultancy': self.client_consultancy,
+            'consultancy_id': self.consultancy_id,
             'employee_ids': self.get_employee_ids_list(),
             'total_monthly_payroll': float(self.total_monthly_payroll),
             'total_annual_payroll': float(self.total_annual_payroll),
@@ -0,0 +1,36 @@
+from app.models import db
+
+# One billed employee on an invoice, snapshotted when the invoice is generated so
+# later edits to (or deletion of) the employee never change an issued invoice
+class InvoiceLine(db.Model):
+    __tablename__ = 'invoice_lines'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)  # Row order on the invoice
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='SET NULL'), nullable=True)
+    name = db.Column(db.String(200), nullable=False)
+    is_new_employee = db.Column(db.Boolean, default=False, nullable=False)
+    date_of_joining = db.Column(db.Date, nullable=True)
+    salary_date = db.Column(db.Integer, nullable=False)
+    pro_rated_salary = db.Column(db.Numeric(10, 2), nullable=False)
+    employee_pf = db.Column(db.Numeric(10, 2), nullable=False)
+    employer_pf = db.Column(db.Numeric(10, 2), nullable=False)
+    total_cost = db.Column(db.Numeric(10, 2), nullable=False)
+    
+    def __repr__(self):
+        return f'<InvoiceLine {self.invoice_id}:{self.position} {self.name}>'
+    
+    def to_dict(self):
+        return {
+            'position': self.position,
+            'employee_id': self.employee_id,
+            'name': self.name,
+            'is_new_employee': self.is_new_employee,
+            'date_of_joining': self.date_of_joining.strftime('%Y-%m-%d') if self.date_of_joining else None,
+            'salary_date': self.salary_date,
+            'pro_rated_salary': float(self.pro_rated_salary),
+            'employee_pf': float(self.employee_pf),
+            'employer_pf': float(self.employer_pf),
+            'total_cost': float(self.total_cost)
+        }
@@ -0,0 +1,13 @@
+from app.models import db
+
+# Last invoice number handed out per prefix (one row per day, e.g. INV-20250131).
+# Bumped in the same transaction that inserts the invoice, so a rolled-back
+# invoice also gives its number back
+class InvoiceSequence(db.Model):
+    __tablename__ = 'invoice_sequences'
+    
+    prefix = db.Column(db.String(40), primary_key=True)
+    last_number = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<InvoiceSequence {self.prefix}:{self.last_number}>'
@@ -0,0 +1,32 @@
+from app.models import db
+
+class PdfJob(db.Model):
+    __tablename__ = 'pdf_jobs'
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    error = db.Column(db.Text)
+    pdf_data = db.Column(db.LargeBinary)  # Rendered PDF, kept so any worker can serve the download
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp(), index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<PdfJob {self.id} {self.status}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'invoice_id': self.invoice_id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,29 @@
+from app.models import db
+
+# Billed totals per consultancy per invoice month, for the dashboard. Kept up to
+# date in the same transaction that inserts invoices (see app/services/revenue.py),
+# so reading it never aggregates the invoices table
+class RevenueSummary(db.Model):
+    __tablename__ = 'revenue_summaries'
+    
+    month = db.Column(db.Date, primary_key=True)  # First day of the invoice month
+    consultancy_id = db.Column(db.Integer, db.ForeignKey('consultancies.id', ondelete='CASCADE'), primary_key=True)
+    invoice_count = db.Column(db.Integer, nullable=False, default=0)
+    billed_total = db.Column(db.Numeric(14, 2), nullable=False, default=0)  # Sum of total_monthly_payroll
+    service_fee_total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    employees_billed = db.Column(db.Integer, nullable=False, default=0)  # Invoice lines, i.e. headcount billed
+    
+    consultancy = db.relationship('Consultancy')
+    
+    def __repr__(self):
+        return f'<RevenueSummary {self.month:%Y-%m}:{self.consultancy_id}>'
+    
+    def to_dict(self):
+        return {
+            'month': self.month.strftime('%Y-%m'),
+            'consultancy_id': self.consultancy_id,
+            'invoice_count': self.invoice_count,
+            'billed_total': float(self.billed_total),
+            'service_fee_total': float(self.service_fee_total),
+            'employees_billed': self.employees_billed
+        }
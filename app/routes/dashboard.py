@@ -1,8 +1,45 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, jsonify
+from config import Config
+from app.services.revenue import revenue_overview, rebuild_revenue_summary
+import click
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Longest window the revenue views accept, in months
+MAX_MONTHS = 120
+
 @dashboard_bp.route('/')
 def index():
-    return render_template('dashboard.html')
+    overview = revenue_overview(_months_arg())
+    max_billed = max((month['billed_total'] for month in overview['months']), default=0)
+    return render_template('dashboard.html', overview=overview, max_billed=max_billed)
+
+@dashboard_bp.route('/api/revenue')
+def revenue_api():
+    """Billed totals per month and per consultancy per month (?months=, default DASHBOARD_MONTHS)"""
+    overview = revenue_overview(_months_arg())
+    return jsonify({
+        'months': [{
+            'month': month['month'].strftime('%Y-%m'),
+            'invoice_count': month['invoice_count'],
+            'billed_total': float(month['billed_total'].to_decimal()),
+            'service_fee_total': float(month['service_fee_total'].to_decimal()),
+            'employees_billed': month['employees_billed']
+        } for month in overview['months']],
+        'consultancies': [{
+            'id': consultancy['id'],
+            'name': consultancy['name'],
+            'billed_total': float(consultancy['billed_total'].to_decimal()),
+            'by_month': {month.strftime('%Y-%m'): float(billed.to_decimal())
+                         for month, billed in sorted(consultancy['by_month'].items())}
+        } for consultancy in overview['consultancies']]
+    })
+
+def _months_arg():
+    return min(max(request.args.get('months', Config.DASHBOARD_MONTHS, type=int), 1), MAX_MONTHS)
 
+@dashboard_bp.cli.command('rebuild-revenue')
+def rebuild_revenue_command():
+    """Recompute the dashboard's revenue summary from every invoice"""
+    rows = rebuild_revenue_summary()
+    click.echo(f"Revenue summary rebuilt: {rows} month/consultancy row(s)")
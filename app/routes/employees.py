@@ -1,15 +1,30 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, Response, stream_template
 from app.models import db
+from app.models.consultancy import Consultancy
 from app.models.employee import Employee
+from app.models.invoice import Invoice, invoice_employees
+from app.models.invoice_line import InvoiceLine
+from app.services.consultancies import normalize_consultancy_name, get_or_create_consultancy
+from app.services.pagination import keyset_page, stream_newest_first, page_limit
+from app.services.render_cache import clear_render_caches
 from decimal import Decimal
 from datetime import datetime
+from config import Config
 
 employees_bp = Blueprint('employees', __name__, url_prefix='/employees')
 
 @employees_bp.route('/')
 def list_employees():
-    employees = Employee.query.order_by(Employee.created_at.desc()).all()
-    return render_template('employees.html', employees=employees)
+    # ?all=1 streams every employee, rendering rows as they are read
+    if request.args.get('all') == '1':
+        employees = stream_newest_first(Employee.query, Employee)
+        return Response(stream_template('employees.html', employees=employees, streamed=True))
+    
+    try:
+        page = keyset_page(Employee.query, Employee, request.args.get('after'), Config.PAGE_SIZE)
+    except ValueError:
+        return redirect(url_for('employees.list_employees'))
+    return render_template('employees.html', employees=page.items, next_cursor=page.next_cursor)
 
 @employees_bp.route('/add', methods=['GET', 'POST'])
 def add_employee():
@@ -17,7 +32,7 @@ def add_employee():
         try:
             name = request.form.get('name')
             salary_per_annum = Decimal(request.form.get('salary_per_annum', 0))
-            client_consultancy = request.form.get('client_consultancy')
+            client_consultancy = normalize_consultancy_name(request.form.get('client_consultancy'))
             is_new_employee = request.form.get('is_new_employee') == 'on'
             date_of_joining_str = request.form.get('date_of_joining')
             salary_date = int(request.form.get('salary_date', 10))
@@ -37,11 +52,15 @@ def add_employee():
                 except ValueError:
                     date_of_joining = None
             
+            # An existing consultancy's spelling wins, so near-duplicates don't start a new one
+            consultancy = get_or_create_consultancy(client_consultancy)
+            
             employee = Employee(
                 name=name,
                 salary_per_annum=salary_per_annum,
                 salary_per_month=salary_per_month,
-                client_consultancy=client_consultancy,
+                client_consultancy=consultancy.name,
+                consultancy=consultancy,
                 is_new_employee=is_new_employee,
                 date_of_joining=date_of_joining,
                 salary_date=salary_date
@@ -56,7 +75,8 @@ def add_employee():
             flash(f'Error adding employee: {str(e)}', 'error')
             return redirect(url_for('employees.add_employee'))
     
-    return render_template('employees.html', action='add')
+    consultancies = Consultancy.query.order_by(Consultancy.name).all()
+    return render_template('employees.html', action='add', consultancies=consultancies)
 
 @employees_bp.route('/delete/<int:employee_id>', methods=['POST'])
 def delete_employee(employee_id):
@@ -64,6 +84,7 @@ def delete_employee(employee_id):
         employee = Employee.query.get_or_404(employee_id)
         db.session.delete(employee)
         db.session.commit()
+        clear_render_caches()
         flash('Employee deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -71,8 +92,51 @@ def delete_employee(employee_id):
     
     return redirect(url_for('employees.list_employees'))
 
-@employees_bp.route('/api/by-consultancy/<consultancy>')
-def get_employees_by_consultancy(consultancy):
-    employees = Employee.query.filter_by(client_consultancy=consultancy).all()
+@employees_bp.route('/api/by-consultancy/<int:consultancy_id>')
+def get_employees_by_consultancy(consultancy_id):
+    consultancy = Consultancy.query.get_or_404(consultancy_id)
+    employees = Employee.query.filter_by(consultancy_id=consultancy.id).order_by(Employee.created_at).all()
     return jsonify([emp.to_dict() for emp in employees])
 
+@employees_bp.route('/api/list')
+def list_employees_api():
+    """One page of employees, newest first; follow next_url for the next page"""
+    limit = page_limit(request.args.get('limit', type=int), Config.PAGE_SIZE)
+    try:
+        page = keyset_page(Employee.query, Employee, request.args.get('after'), limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid page cursor'}), 400
+    return jsonify({
+        'employees': [employee.to_dict() for employee in page.items],
+        'next_cursor': page.next_cursor,
+        'next_url': url_for('employees.list_employees_api', after=page.next_cursor, limit=limit) if page.next_cursor else None
+    })
+
+@employees_bp.route('/api/consultancies')
+def list_consultancies():
+    return jsonify([consultancy.to_dict() for consultancy in Consultancy.query.order_by(Consultancy.name)])
+
+
+@employees_bp.route('/api/<int:employee_id>/invoices')
+def get_employee_billing_history(employee_id):
+    """Every invoice that billed the employee, newest first, with what it billed for them"""
+    employee = Employee.query.get_or_404(employee_id)
+    rows = db.session.query(Invoice, InvoiceLine).join(
+        invoice_employees, invoice_employees.c.invoice_id == Invoice.id
+    ).outerjoin(
+        InvoiceLine, db.and_(InvoiceLine.invoice_id == Invoice.id, InvoiceLine.employee_id == employee_id)
+    ).filter(
+        invoice_employees.c.employee_id == employee_id
+    ).order_by(Invoice.invoice_date.desc(), Invoice.id.desc()).all()
+    
+    history = []
+    for invoice, line in rows:
+        history.append({
+            'invoice_id': invoice.id,
+            'invoice_number': invoice.invoice_number,
+            'invoice_date': invoice.invoice_date.isoformat(),
+            'client_consultancy': invoice.client_consultancy,
+            'url': url_for('invoices.view_invoice', invoice_id=invoice.id),
+            'line': line.to_dict() if line else None
+        })
+    return jsonify({'employee': employee.to_dict(), 'invoices': history})
@@ -1,14 +1,36 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, send_file, send_from_directory
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, send_file, send_from_directory, current_app, Response, stream_with_context, stream_template, session
 from app.models import db
+from app.models.consultancy import Consultancy
 from app.models.employee import Employee
 from app.models.invoice import Invoice
 from app.models.company_settings import CompanySettings
-from app.services.pdf_service import generate_pdf
-from app.services.calculations import calculate_employee_totals, format_currency_inr
-from decimal import Decimal
+from app.services.render_cache import pdf_cache, html_fragment_cache, invoice_render_key
+from app.services.bulk_export import select_invoices, select_invoice_ids, stream_invoices_zip
+from app.services.pdf_jobs import enqueue_pdf_job
+from app.services.calculations import format_currency_inr, SERVICE_FEE_GST_RATE
+from app.services.invoice_numbers import allocate_invoice_number
+from app.services.consultancies import find_consultancy
+from app.services.idempotency import invoice_content_hash, find_duplicate_invoice
+from app.services.month_end import run_month, prerender_pdfs
+from app.services.revenue import record_invoices
+from app.services.invoice_lines import build_invoice, load_invoice_lines, calculate_invoice_totals
+from app.services.money import Money, ZERO
+from app.services.pagination import keyset_page, stream_newest_first, page_limit
+from app.services.invoice_search import filter_invoices, search_facets, rebuild_search_index
+from decimal import Decimal, InvalidOperation
 from datetime import date, datetime
+from calendar import monthrange
+from functools import lru_cache
+from markupsafe import Markup
+from sqlalchemy.exc import IntegrityError
+from werkzeug.http import is_resource_modified
+import click
+import hashlib
+import io
 import json
 import os
+import uuid
+from werkzeug.utils import secure_filename
 from config import Config
 
 invoices_bp = Blueprint('invoices', __name__, url_prefix='/invoices')
@@ -17,17 +39,26 @@ invoices_bp = Blueprint('invoices', __name__, url_prefix='/invoices')
 def generate_invoice():
     if request.method == 'POST':
         try:
-            client_consultancy = request.form.get('client_consultancy')
+            consultancy = _selected_consultancy(request.form)
             invoice_to = request.form.get('invoice_to')
             employee_ids = request.form.getlist('employee_ids')
             include_service_fee = request.form.get('include_service_fee') == '1'
-            miscellaneous_cost = Decimal(request.form.get('miscellaneous_cost', 0) or 0)
+            miscellaneous_cost = Money.from_decimal(Decimal(request.form.get('miscellaneous_cost', 0) or 0))
             notes = request.form.get('notes', '')
+            idempotency_key = (request.headers.get('Idempotency-Key') or request.form.get('idempotency_key') or '').strip() or None
             
-            if not client_consultancy or not invoice_to or not employee_ids:
+            if not consultancy or not invoice_to or not employee_ids:
                 flash('Please fill in all required fields', 'error')
                 return redirect(url_for('invoices.generate_invoice'))
             
+            # A retry or double submit gets the invoice the first request created
+            today = date.today()
+            content_hash = invoice_content_hash(consultancy.name, employee_ids, today,
+                                                include_service_fee, miscellaneous_cost)
+            existing = find_duplicate_invoice(content_hash, idempotency_key)
+            if existing:
+                return _redirect_to_duplicate(existing, content_hash)
+            
             # Get employees
             employees = Employee.query.filter(Employee.id.in_(employee_ids)).all()
             
@@ -35,70 +66,29 @@ def generate_invoice():
                 flash('Please select at least one employee', 'error')
                 return redirect(url_for('invoices.generate_invoice'))
             
-            # Generate invoice number (ensure uniqueness)
-            today = date.today()
-            invoice_count = Invoice.query.filter(
-                db.func.date(Invoice.created_at) == today
-            ).count()
-            
-            # Try to generate unique invoice number
-            max_attempts = 1000
-            for attempt in range(max_attempts):
-                invoice_number = f"INV-{today.strftime('%Y%m%d')}-{invoice_count + attempt + 1:03d}"
-                # Check if this invoice number already exists
-                existing = Invoice.query.filter_by(invoice_number=invoice_number).first()
-                if not existing:
-                    break
-            else:
-                # If we couldn't find a unique number, add timestamp
-                from datetime import datetime
-                timestamp = datetime.now().strftime('%H%M%S')
-                invoice_number = f"INV-{today.strftime('%Y%m%d')}-{timestamp}"
-            
-            # Calculate totals with pro-rated salary and PF
-            total_monthly = Decimal('0')
-            total_annual = Decimal('0')
-            
-            for emp in employees:
-                # For monthly payroll calculation, use pro-rated if applicable
-                emp_totals = calculate_employee_totals(emp, today)
-                total_monthly += emp_totals['total_cost']  # Salary + Employer PF
-                total_annual += Decimal(str(emp.salary_per_annum))
-            
-            # Calculate service fee: ₹6,250 per employee + 18% GST
-            service_fee = Decimal('0')
-            if include_service_fee:
-                base_service_fee_per_employee = Decimal('6250')
-                gst_percentage = Decimal('18')
-                num_employees = len(employees)
-                
-                # Base service fee for all employees
-                base_service_fee = base_service_fee_per_employee * Decimal(str(num_employees))
-                # GST = 18% of base service fee
-                gst_amount = (base_service_fee * gst_percentage) / Decimal('100')
-                # Total service fee = base + GST
-                service_fee = base_service_fee + gst_amount
-                service_fee = service_fee.quantize(Decimal('0.01'))
-            
-            # Add miscellaneous cost and service fee to total
-            total_monthly += miscellaneous_cost + service_fee
-            
-            # Create invoice
-            invoice = Invoice(
-                invoice_number=invoice_number,
-                invoice_date=today,
-                invoice_to=invoice_to,
-                client_consultancy=client_consultancy,
-                employee_ids=json.dumps(employee_ids),
-                total_monthly_payroll=total_monthly,
-                total_annual_payroll=total_annual,
-                miscellaneous_cost=miscellaneous_cost,
-                service_fee=service_fee,
-                notes=notes
-            )
+            # Price the invoice (pro-rated salary, PF, service fee, miscellaneous cost),
+            # snapshotting the lines - the same code the live preview uses
+            invoice = build_invoice(employees, today, consultancy,
+                                    include_service_fee, miscellaneous_cost)
+            # Allocated last so the sequence row is locked only until the commit below
+            invoice.invoice_number = allocate_invoice_number(today)
+            invoice.invoice_to = invoice_to
+            invoice.employee_ids = json.dumps(employee_ids)
+            invoice.notes = notes
+            invoice.idempotency_key = idempotency_key
+            invoice.content_hash = content_hash
             
             db.session.add(invoice)
-            db.session.commit()
+            record_invoices([invoice])
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # A concurrent duplicate committed first
+                db.session.rollback()
+                existing = find_duplicate_invoice(content_hash, idempotency_key)
+                if not existing:
+                    raise
+                return _redirect_to_duplicate(existing, content_hash)
             
             flash('Invoice generated successfully!', 'success')
             return redirect(url_for('invoices.view_invoice', invoice_id=invoice.id))
@@ -110,93 +100,433 @@ def generate_invoice():
     # GET request - show form
     employees = Employee.query.order_by(Employee.client_consultancy, Employee.name).all()
     employees_dict = [emp.to_dict() for emp in employees]
-    consultancies = db.session.query(Employee.client_consultancy).distinct().all()
-    consultancies = [c[0] for c in consultancies]
+    consultancies = Consultancy.query.order_by(Consultancy.name).all()
     
     return render_template('invoice_generate.html', 
                          employees=employees_dict, 
-                         consultancies=consultancies)
+                         consultancies=consultancies,
+                         idempotency_key=uuid.uuid4().hex)
+
+def _selected_consultancy(data):
+    """The consultancy a form or JSON body picked - by consultancy_id, or by name from older clients"""
+    consultancy_id = data.get('consultancy_id')
+    if consultancy_id:
+        try:
+            return db.session.get(Consultancy, int(consultancy_id))
+        except (TypeError, ValueError):
+            return None
+    return find_consultancy(data.get('client_consultancy'))
+
+def _redirect_to_duplicate(invoice, content_hash):
+    if invoice.content_hash != content_hash:
+        flash('This form was already used to generate a different invoice. Please start again.', 'error')
+        return redirect(url_for('invoices.generate_invoice'))
+    flash(f'Invoice {invoice.invoice_number} was already generated for this request - showing it instead.', 'success')
+    return redirect(url_for('invoices.view_invoice', invoice_id=invoice.id))
 
 @invoices_bp.route('/history')
 def invoice_history():
-    invoices = Invoice.query.order_by(Invoice.created_at.desc()).all()
-    return render_template('invoice_history.html', invoices=invoices)
+    try:
+        filters = _search_filters(request.args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('invoices.invoice_history'))
+    query = filter_invoices(Invoice.query, **filters)
+    # Filters to carry over to the next page or the "Show all" link
+    search_args = {key: value for key, value in request.args.items() if key not in ('after', 'all') and value}
+    
+    # ?all=1 streams every matching invoice, rendering rows as they are read
+    if request.args.get('all') == '1':
+        invoices = stream_newest_first(query, Invoice)
+        return Response(stream_template('invoice_history.html', invoices=invoices, streamed=True,
+                                        filters=filters, search_args=search_args, facets=None,
+                                        consultancies=_consultancy_choices()))
+    
+    try:
+        page = keyset_page(query, Invoice, request.args.get('after'), Config.PAGE_SIZE)
+    except ValueError:
+        return redirect(url_for('invoices.invoice_history', **search_args))
+    facets = search_facets(filters) if _is_search(filters) else None
+    return render_template('invoice_history.html', invoices=page.items, next_cursor=page.next_cursor,
+                           filters=filters, search_args=search_args, facets=facets,
+                           consultancies=_consultancy_choices())
+
+@invoices_bp.route('/api/history')
+def invoice_history_api():
+    """One page of invoices, newest first; follow next_url for the next page"""
+    limit = page_limit(request.args.get('limit', type=int), Config.PAGE_SIZE)
+    try:
+        page = keyset_page(Invoice.query, Invoice, request.args.get('after'), limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid page cursor'}), 400
+    return jsonify({
+        'invoices': [invoice.to_dict() for invoice in page.items],
+        'next_cursor': page.next_cursor,
+        'next_url': url_for('invoices.invoice_history_api', after=page.next_cursor, limit=limit) if page.next_cursor else None
+    })
+
+@invoices_bp.route('/api/search')
+def search_invoices_api():
+    """Search invoices (q, number, start_date, end_date, min_amount, max_amount, consultancy_id)
+
+    Returns a page of matches, newest first, with counts by consultancy and
+    month for the whole result.
+    """
+    try:
+        filters = _search_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = page_limit(request.args.get('limit', type=int), Config.PAGE_SIZE)
+    try:
+        page = keyset_page(filter_invoices(Invoice.query, **filters), Invoice, request.args.get('after'), limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid page cursor'}), 400
+    facets = search_facets(filters)
+    search_args = {key: value for key, value in request.args.items() if key != 'after' and value}
+    return jsonify({
+        'invoices': [invoice.to_dict() for invoice in page.items],
+        'total': sum(month['count'] for month in facets['months']),
+        'facets': facets,
+        'next_cursor': page.next_cursor,
+        'next_url': url_for('invoices.search_invoices_api', **{**search_args, 'after': page.next_cursor}) if page.next_cursor else None
+    })
+
+def _search_filters(args):
+    """Search filters from query string arguments; raises ValueError with a message for bad input"""
+    try:
+        start_date = _parse_date(args.get('start_date'))
+        end_date = _parse_date(args.get('end_date'))
+    except ValueError:
+        raise ValueError('Dates must look like 2026-03-31')
+    try:
+        min_amount = Decimal(args['min_amount']) if args.get('min_amount') else None
+        max_amount = Decimal(args['max_amount']) if args.get('max_amount') else None
+    except InvalidOperation:
+        raise ValueError('Amounts must be numbers')
+    return {
+        'text': args.get('q') or None,
+        'number_prefix': args.get('number') or None,
+        'start_date': start_date,
+        'end_date': end_date,
+        'min_amount': min_amount,
+        'max_amount': max_amount,
+        'consultancy_id': args.get('consultancy_id', type=int),
+    }
+
+def _is_search(filters):
+    return any(value is not None for value in filters.values())
+
+def _consultancy_choices():
+    return Consultancy.query.order_by(Consultancy.name).all()
 
 @invoices_bp.route('/view/<int:invoice_id>')
 def view_invoice(invoice_id):
-    invoice = Invoice.query.get_or_404(invoice_id)
-    employee_ids = invoice.get_employee_ids_list()
-    employees = Employee.query.filter(Employee.id.in_(employee_ids)).all()
+    # Invoice and lines in one query
+    invoice = Invoice.query.options(db.joinedload(Invoice.lines)).get_or_404(invoice_id)
+    lines = load_invoice_lines(invoice)
     company_settings = CompanySettings.query.first()
     
-    # Calculate employee details with PF and pro-rated salary
-    employee_calculations = []
-    total_salary = Decimal('0')
-    total_employee_pf = Decimal('0')
-    total_employer_pf = Decimal('0')
-    
-    for emp in employees:
-        calc = calculate_employee_totals(emp, invoice.invoice_date)
-        employee_calculations.append({
-            'employee': emp,
-            'pro_rated_salary': calc['pro_rated_salary'],
-            'employee_pf': calc['employee_pf'],
-            'employer_pf': calc['employer_pf'],
-            'total_cost': calc['total_cost']
-        })
-        total_salary += calc['pro_rated_salary']
-        total_employee_pf += calc['employee_pf']
-        total_employer_pf += calc['employer_pf']
+    etag = _invoice_page_etag(invoice, lines, company_settings)
+    last_modified = max(filter(None, [invoice.created_at, company_settings.updated_at]), default=None)
+    
+    # A pending flash message is part of the page, so never answer 304 over it
+    if '_flashes' not in session and not is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        fragment_key = (etag, request.script_root)
+        invoice_html = html_fragment_cache.get(fragment_key)
+        if invoice_html is None:
+            invoice_html = Markup(_render_invoice_detail_body(invoice, lines, company_settings))
+            html_fragment_cache.put(fragment_key, invoice_html)
+        response = current_app.make_response(
+            render_template('invoice_detail.html', invoice=invoice, invoice_html=invoice_html))
+    
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Let browsers keep the page but revalidate on every refresh
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@lru_cache(maxsize=None)
+def _template_fingerprint(*names):
+    """Hash the sources of the given templates, so a deploy that changes them changes the ETag"""
+    digest = hashlib.sha256()
+    for name in names:
+        source, _, _ = current_app.jinja_loader.get_source(current_app.jinja_env, name)
+        digest.update(source.encode('utf-8'))
+    return digest.hexdigest()
+
+def _invoice_page_etag(invoice, lines, company_settings):
+    fingerprint = _template_fingerprint('base.html', 'invoice_detail.html', 'invoice_detail_body.html')
+    key = invoice_render_key(invoice, lines, company_settings)
+    return hashlib.sha256(f"{key}:{fingerprint}".encode('ascii')).hexdigest()
+
+def _render_invoice_detail_body(invoice, lines, company_settings):
+    totals = calculate_invoice_totals(invoice, lines)
     
     # Calculate service fee breakdown
-    service_fee = invoice.service_fee or Decimal('0')
-    service_fee_base = Decimal('0')
-    service_fee_gst = Decimal('0')
+    service_fee = totals['service_fee']
+    service_fee_base = ZERO
+    service_fee_gst = ZERO
     if service_fee > 0:
         # Calculate base and GST from total service fee
         # If service_fee = base + (base * 0.18), then base = service_fee / 1.18
-        service_fee_base = service_fee / Decimal('1.18')
-        service_fee_base = service_fee_base.quantize(Decimal('0.01'))
-        service_fee_gst = service_fee - service_fee_base
-        service_fee_gst = service_fee_gst.quantize(Decimal('0.01'))
+        service_fee_base, service_fee_gst = service_fee.split_gst(SERVICE_FEE_GST_RATE)
     
-    # Calculate grand total: salary + employee PF + employer PF + miscellaneous + service fee
-    grand_total = total_salary + total_employee_pf + total_employer_pf + (invoice.miscellaneous_cost or Decimal('0')) + service_fee
-    
-    return render_template('invoice_detail.html', 
+    return render_template('invoice_detail_body.html', 
                          invoice=invoice, 
-                         employees=employees,
-                         employee_calculations=employee_calculations,
-                         total_salary=total_salary,
-                         total_employee_pf=total_employee_pf,
-                         total_employer_pf=total_employer_pf,
+                         lines=lines,
+                         total_salary=totals['total_salary'],
+                         total_employee_pf=totals['total_employee_pf'],
+                         total_employer_pf=totals['total_employer_pf'],
                          service_fee=service_fee,
                          service_fee_base=service_fee_base,
                          service_fee_gst=service_fee_gst,
-                         grand_total=grand_total,
+                         grand_total=totals['grand_total'],
                          company_settings=company_settings)
 
 @invoices_bp.route('/pdf/<int:invoice_id>')
 def download_pdf(invoice_id):
-    invoice = Invoice.query.get_or_404(invoice_id)
-    employee_ids = invoice.get_employee_ids_list()
-    employees = Employee.query.filter(Employee.id.in_(employee_ids)).all()
+    # Invoice and lines in one query
+    invoice = Invoice.query.options(db.joinedload(Invoice.lines)).get_or_404(invoice_id)
+    lines = load_invoice_lines(invoice)
     company_settings = CompanySettings.query.first()
     
-    pdf_file = generate_pdf(invoice, employees, company_settings)
+    # The key doubles as a strong ETag, so repeat downloads can skip rendering
+    cache_key = invoice_render_key(invoice, lines, company_settings)
+    if cache_key in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(cache_key)
+        return response
+    
+    pdf_bytes = pdf_cache.get(cache_key)
+    if pdf_bytes is not None:
+        pdf_stream = io.BytesIO(pdf_bytes)
+    else:
+        # ReportLab is imported on first use (or by the warmup), not with the routes
+        from app.services.pdf_service import generate_pdf
+        pdf_stream = generate_pdf(invoice, lines, company_settings)
+        # Keep cacheable PDFs in memory; stream anything bigger straight from the spool
+        pdf_bytes = pdf_stream.read(pdf_cache.max_bytes + 1)
+        if len(pdf_bytes) <= pdf_cache.max_bytes:
+            pdf_stream.close()
+            pdf_cache.put(cache_key, pdf_bytes)
+            pdf_stream = io.BytesIO(pdf_bytes)
+        else:
+            pdf_stream.seek(0)
+    
+    # send_file closes the stream once the response has been sent
+    return send_file(
+        pdf_stream,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f"{invoice.invoice_number}.pdf",
+        etag=cache_key,
+        conditional=True
+    )
+
+@invoices_bp.route('/pdf/<int:invoice_id>/jobs', methods=['POST'])
+def create_pdf_job(invoice_id):
+    """Queue the invoice PDF for background rendering"""
+    invoice = Invoice.query.get_or_404(invoice_id)
+    job = enqueue_pdf_job(current_app._get_current_object(), invoice)
+    response = jsonify({
+        **job.to_dict(),
+        'status_url': url_for('jobs.job_status', job_id=job.id)
+    })
+    response.status_code = 202
+    response.headers['Location'] = url_for('jobs.job_status', job_id=job.id)
+    return response
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+@invoices_bp.route('/export')
+def export_zip():
+    """Download every invoice matching the filters as one ZIP of PDFs"""
+    try:
+        start_date = _parse_date(request.args.get('start_date'))
+        end_date = _parse_date(request.args.get('end_date'))
+        invoice_ids = [int(i) for i in request.args.getlist('invoice_id') if i]
+    except ValueError:
+        flash('Invalid export filter', 'error')
+        return redirect(url_for('invoices.invoice_history'))
+    consultancy = request.args.get('consultancy') or None
+    
+    invoice_ids = select_invoice_ids(start_date, end_date, consultancy, invoice_ids)
+    if not invoice_ids:
+        flash('No invoices match the export filter', 'error')
+        return redirect(url_for('invoices.invoice_history'))
+    
+    return Response(
+        stream_with_context(stream_invoices_zip(invoice_ids)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename=invoices-{date.today().strftime("%Y%m%d")}.zip'}
+    )
+
+@invoices_bp.route('/statement')
+def statement_pdf():
+    """Download one statement PDF covering a consultancy's invoices for a month"""
+    consultancy = request.args.get('consultancy')
+    try:
+        period_start = datetime.strptime(request.args.get('month', ''), '%Y-%m').date()
+    except ValueError:
+        period_start = None
+    if not consultancy or not period_start:
+        flash('Please choose a client/consultancy and a month for the statement', 'error')
+        return redirect(url_for('invoices.invoice_history'))
+    period_end = period_start.replace(day=monthrange(period_start.year, period_start.month)[1])
+    
+    invoices = select_invoices(period_start, period_end, consultancy)
+    if not invoices:
+        flash(f'No invoices for {consultancy} in {period_start.strftime("%B %Y")}', 'error')
+        return redirect(url_for('invoices.invoice_history'))
+    
+    sections = [(invoice, load_invoice_lines(invoice)) for invoice in invoices]
+    company_settings = CompanySettings.query.first()
+    from app.services.pdf_service import generate_statement_pdf
+    pdf_stream = generate_statement_pdf(consultancy, period_start, sections, company_settings)
     
     return send_file(
-        pdf_file,
+        pdf_stream,
         mimetype='application/pdf',
         as_attachment=True,
-        download_name=f"{invoice.invoice_number}.pdf"
+        download_name=f"statement-{secure_filename(consultancy)}-{period_start.strftime('%Y-%m')}.pdf"
+    )
+
+@invoices_bp.cli.command('export')
+@click.option('--start-date', type=click.DateTime(formats=['%Y-%m-%d']), help='First invoice date (inclusive)')
+@click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), help='Last invoice date (inclusive)')
+@click.option('--consultancy', help='Only invoices for this client/consultancy')
+@click.option('--id', 'invoice_ids', type=int, multiple=True, help='Invoice ID to include (repeatable)')
+@click.option('--workers', type=int, help='Render processes (default: BULK_EXPORT_WORKERS)')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), required=True, help='ZIP file to write')
+def export_zip_command(start_date, end_date, consultancy, invoice_ids, workers, output):
+    """Export invoice PDFs matching the filters into a ZIP file"""
+    invoice_ids = select_invoice_ids(
+        start_date.date() if start_date else None,
+        end_date.date() if end_date else None,
+        consultancy,
+        list(invoice_ids)
     )
+    if not invoice_ids:
+        raise click.ClickException('No invoices match the export filter')
+    
+    with open(output, 'wb') as f:
+        for chunk in stream_invoices_zip(invoice_ids, workers):
+            f.write(chunk)
+    click.echo(f"Exported {len(invoice_ids)} invoice(s) to {output}")
+
+@invoices_bp.cli.command('run-month')
+@click.option('--month', type=click.DateTime(formats=['%Y-%m']), required=True, help='Month to invoice, e.g. 2026-10')
+@click.option('--service-fee/--no-service-fee', default=False, help='Include the per-employee service fee')
+@click.option('--prerender', is_flag=True, help='Render the PDFs now and keep them as finished PDF jobs')
+@click.option('--workers', type=int, help='Render processes (default: BULK_EXPORT_WORKERS)')
+def run_month_command(month, service_fee, prerender, workers):
+    """Generate the month's invoice for every client/consultancy in one batch"""
+    invoices, skipped = run_month(month.year, month.month, include_service_fee=service_fee)
+    for consultancy in skipped:
+        click.echo(f"Skipped {consultancy}: already invoiced for {month:%Y-%m}")
+    for invoice in invoices:
+        click.echo(f"{invoice.invoice_number}  {invoice.client_consultancy}  "
+                   f"{format_currency_inr(invoice.total_monthly_payroll)}")
+    click.echo(f"Generated {len(invoices)} invoice(s)")
+    
+    if prerender and invoices:
+        job_ids = prerender_pdfs(invoices, workers)
+        click.echo(f"Pre-rendered {len(job_ids)} PDF(s)")
+
+@invoices_bp.route('/api/run-month', methods=['POST'])
+def run_month_end():
+    """Admin endpoint behind `flask invoices run-month`; PDFs are queued as background jobs"""
+    data = request.get_json(silent=True) or request.form
+    try:
+        month = datetime.strptime(data.get('month') or '', '%Y-%m')
+    except ValueError:
+        return jsonify({'error': 'month must look like 2026-10'}), 400
+    include_service_fee = str(data.get('include_service_fee', '')).lower() in ('1', 'true')
+    prerender = str(data.get('prerender', '')).lower() in ('1', 'true')
+    
+    try:
+        invoices, skipped = run_month(month.year, month.month, include_service_fee=include_service_fee)
+    except Exception as e:
+        return jsonify({'error': f'Error generating invoices: {str(e)}'}), 500
+    
+    results = []
+    for invoice in invoices:
+        result = {
+            **invoice.to_dict(),
+            'url': url_for('invoices.view_invoice', invoice_id=invoice.id)
+        }
+        if prerender:
+            job = enqueue_pdf_job(current_app._get_current_object(), invoice)
+            result['pdf_job_url'] = url_for('jobs.job_status', job_id=job.id)
+        results.append(result)
+    
+    response = jsonify({'month': f"{month:%Y-%m}", 'invoices': results, 'skipped': skipped})
+    response.status_code = 201 if invoices else 200
+    return response
 
-@invoices_bp.route('/api/consultancy/<consultancy>')
-def get_employees_for_consultancy(consultancy):
-    employees = Employee.query.filter_by(client_consultancy=consultancy).all()
+@invoices_bp.cli.command('reindex-search')
+def reindex_search_command():
+    """Rebuild the invoice full-text search index from the invoices table"""
+    rebuild_search_index()
+    click.echo("Search index rebuilt")
+
+@invoices_bp.route('/api/consultancy/<int:consultancy_id>')
+def get_employees_for_consultancy(consultancy_id):
+    consultancy = Consultancy.query.get_or_404(consultancy_id)
+    employees = Employee.query.filter_by(consultancy_id=consultancy.id).order_by(Employee.created_at).all()
     return jsonify([emp.to_dict() for emp in employees])
 
+@invoices_bp.route('/api/preview', methods=['POST'])
+def preview_invoice():
+    """Price an invoice exactly as Generate would, without saving anything
+
+    Takes the generate form's fields (as form data or JSON) and returns the
+    per-employee lines and totals for the live totals on the generate page.
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        data = request.form.to_dict()
+        data['employee_ids'] = request.form.getlist('employee_ids')
+    
+    employee_ids = data.get('employee_ids') or []
+    include_service_fee = str(data.get('include_service_fee', '')).lower() in ('1', 'true')
+    try:
+        miscellaneous_cost = Money.from_decimal(Decimal(str(data.get('miscellaneous_cost') or 0)))
+    except (InvalidOperation, ValueError, OverflowError):
+        return jsonify({'error': 'Miscellaneous cost must be a number'}), 400
+    
+    employees = Employee.query.filter(Employee.id.in_(employee_ids)).all() if employee_ids else []
+    if not employees:
+        return jsonify({'error': 'Please select at least one employee'}), 400
+    
+    invoice = build_invoice(employees, date.today(), _selected_consultancy(data),
+                            include_service_fee, miscellaneous_cost)
+    totals = calculate_invoice_totals(invoice, invoice.lines)
+    service_fee_base, service_fee_gst = totals['service_fee'].split_gst(SERVICE_FEE_GST_RATE)
+    
+    def amount(money):
+        return float(money.to_decimal())
+    
+    return jsonify({
+        'invoice_date': invoice.invoice_date.strftime('%Y-%m-%d'),
+        'employee_count': len(employees),
+        'lines': [line.to_dict() for line in invoice.lines],
+        'total_salary': amount(totals['total_salary']),
+        'total_employee_pf': amount(totals['total_employee_pf']),
+        'total_employer_pf': amount(totals['total_employer_pf']),
+        'miscellaneous_cost': amount(totals['miscellaneous_cost']),
+        'service_fee': amount(totals['service_fee']),
+        'service_fee_base': amount(service_fee_base),
+        'service_fee_gst': amount(service_fee_gst),
+        'grand_total': amount(totals['grand_total']),
+        'total_annual_payroll': float(invoice.total_annual_payroll)
+    })
+
 @invoices_bp.route('/logo')
 def serve_logo():
     """Serve logo from root folder"""
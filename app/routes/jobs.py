@@ -0,0 +1,33 @@
+from flask import Blueprint, jsonify, url_for, send_file, abort, current_app
+from app.models import db
+from app.models.invoice import Invoice
+from app.models.pdf_job import PdfJob
+from app.services.pdf_jobs import is_stale, recover_stale_jobs
+import io
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+@jobs_bp.route('/<int:job_id>')
+def job_status(job_id):
+    job = PdfJob.query.get_or_404(job_id)
+    if is_stale(job):
+        # Its worker went away; don't leave the client polling forever
+        recover_stale_jobs(current_app._get_current_object())
+        db.session.refresh(job)
+    data = job.to_dict()
+    if job.status == PdfJob.STATUS_DONE:
+        data['download_url'] = url_for('jobs.download_job_pdf', job_id=job.id)
+    return jsonify(data)
+
+@jobs_bp.route('/<int:job_id>/download')
+def download_job_pdf(job_id):
+    job = PdfJob.query.get_or_404(job_id)
+    if job.status != PdfJob.STATUS_DONE:
+        abort(404)
+    invoice = db.session.get(Invoice, job.invoice_id)
+    return send_file(
+        io.BytesIO(job.pdf_data),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f"{invoice.invoice_number}.pdf"
+    )
@@ -1,9 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from app.models import db
 from app.models.company_settings import CompanySettings
-import os
 from werkzeug.utils import secure_filename
-from config import Config
+from app.services.render_cache import clear_render_caches
 
 settings_bp = Blueprint('settings', __name__, url_prefix='/settings')
 
@@ -33,24 +32,19 @@ def company_settings():
             if 'logo' in request.files:
                 file = request.files['logo']
                 if file and file.filename and allowed_file(file.filename):
-                    # Create uploads directory if it doesn't exist
-                    upload_dir = os.path.join(Config.BASE_DIR, 'app', 'static', 'uploads', 'logos')
-                    os.makedirs(upload_dir, exist_ok=True)
-                    
-                    # Save file
+                    # Normalise once into content-hashed web and PDF renditions
+                    from app.services.logo_service import process_logo
                     filename = secure_filename(file.filename)
-                    # Add timestamp to make filename unique
-                    import time
-                    filename = f"{int(time.time())}_{filename}"
-                    filepath = os.path.join(upload_dir, filename)
-                    file.save(filepath)
+                    web_path, pdf_path = process_logo(file.read(), filename)
                     
-                    # Store relative path
-                    settings.logo_path = f"uploads/logos/{filename}"
+                    # Store relative paths
+                    settings.logo_path = web_path
+                    settings.logo_pdf_path = pdf_path
                 elif file and file.filename:
                     flash('Invalid file type. Please upload PNG, JPG, JPEG, GIF, or SVG.', 'error')
             
             db.session.commit()
+            clear_render_caches()
             flash('Company settings updated successfully!', 'success')
             return redirect(url_for('settings.company_settings'))
         except Exception as e:
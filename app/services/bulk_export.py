@@ -0,0 +1,206 @@
+"""
+Bulk export of invoice PDFs as a single streamed ZIP archive.
+
+PDFs are rendered in parallel on a process pool (ReportLab is CPU-bound) and
+each one is written to the archive as soon as it finishes. Only the
+matching invoice ids are selected up front and sent to the pool, whose
+processes load each invoice and its lines themselves, so only a bounded
+number of invoices and PDFs is ever held in memory regardless of how many
+match. One pool per worker process is shared by every export request.
+"""
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from app.models import db
+from app.models.invoice import Invoice
+from app.models.company_settings import CompanySettings
+from app.services.consultancies import find_consultancy
+from app.services.invoice_lines import load_invoice_lines
+from config import Config
+
+
+def _filtered(query, start_date, end_date, consultancy, invoice_ids):
+    """Apply the export filters to the query, or return None if the consultancy is unknown"""
+    if start_date:
+        query = query.filter(Invoice.invoice_date >= start_date)
+    if end_date:
+        query = query.filter(Invoice.invoice_date <= end_date)
+    if consultancy:
+        # By id, so the (consultancy_id, invoice_date) index serves the date range too
+        match = find_consultancy(consultancy)
+        if match is None:
+            return None
+        query = query.filter(Invoice.consultancy_id == match.id)
+    if invoice_ids:
+        query = query.filter(Invoice.id.in_(invoice_ids))
+    return query.order_by(Invoice.invoice_date, Invoice.id)
+
+
+def select_invoices(start_date=None, end_date=None, consultancy=None, invoice_ids=None):
+    """Return the invoices matching all given filters, oldest first, with their lines loaded"""
+    query = _filtered(Invoice.query.options(db.selectinload(Invoice.lines)),
+                      start_date, end_date, consultancy, invoice_ids)
+    return query.all() if query is not None else []
+
+
+def select_invoice_ids(start_date=None, end_date=None, consultancy=None, invoice_ids=None):
+    """Return the ids of the invoices matching all given filters, oldest first"""
+    query = _filtered(db.select(Invoice.id), start_date, end_date, consultancy, invoice_ids)
+    return db.session.execute(query).scalars().all() if query is not None else []
+
+
+# Each pool process's own app, so it opens its own database connections
+_worker_app = None
+
+
+def _init_worker(database_uri):
+    global _worker_app
+    from flask import Flask
+    from app.models.engine import init_db
+
+    _worker_app = Flask(__name__)
+    _worker_app.config.from_object(Config)
+    _worker_app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    init_db(_worker_app, db)
+
+
+def _render_pdf_bytes(invoice_id):
+    """Process pool entry point - loads the invoice in the worker; None for the PDF if it was deleted"""
+    from app.services.pdf_service import generate_pdf
+    with _worker_app.app_context():
+        invoice = db.session.get(Invoice, invoice_id)
+        if invoice is None:
+            return invoice_id, None, None
+        buffer = generate_pdf(invoice, load_invoice_lines(invoice), CompanySettings.query.first(),
+                              output=io.BytesIO())
+        return invoice_id, f"{invoice.invoice_number}.pdf", buffer.getvalue()
+
+
+def _new_pool(max_workers, database_uri):
+    # Never fork: a gunicorn worker has PDF job threads and pooled connections
+    # a forked child would inherit mid-use. forkserver children are forked
+    # from a clean single-threaded server process instead
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method),
+                               initializer=_init_worker, initargs=(database_uri,))
+
+
+_pool = None
+_pool_uri = None
+_pool_lock = threading.Lock()
+
+
+def _shared_pool(database_uri):
+    """The process's BULK_EXPORT_WORKERS render pool, shared by every export request"""
+    global _pool, _pool_uri
+    with _pool_lock:
+        if _pool is None or _pool_uri != database_uri:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool, _pool_uri = _new_pool(Config.BULK_EXPORT_WORKERS, database_uri), database_uri
+        return _pool
+
+
+def _discard_shared_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_rendered_pdfs(invoice_ids, max_workers=None):
+    """Yield (invoice_id, filename, pdf_bytes) for each invoice in completion order
+
+    Renders run on the shared pool, or on a pool of its own when
+    max_workers is given (the CLI commands). Only ids are sent; each pool
+    process loads its invoice itself. Invoices deleted in the meantime are
+    skipped.
+    """
+    database_uri = db.engine.url.render_as_string(hide_password=False)
+    if max_workers:
+        pool = _new_pool(max_workers, database_uri)
+    else:
+        pool = _shared_pool(database_uri)
+        max_workers = Config.BULK_EXPORT_WORKERS
+    # Keep a couple of renders queued per worker so the pool never idles,
+    # without queueing this export's whole id list ahead of other requests
+    window = max_workers * 2
+    invoice_ids = iter(invoice_ids)
+    pending = set()
+
+    def refill():
+        while len(pending) < window:
+            invoice_id = next(invoice_ids, None)
+            if invoice_id is None:
+                return
+            pending.add(pool.submit(_render_pdf_bytes, invoice_id))
+
+    try:
+        refill()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                invoice_id, filename, pdf_bytes = future.result()
+                if filename is not None:
+                    yield invoice_id, filename, pdf_bytes
+            refill()
+    except BrokenProcessPool:
+        # A render process died; start the next export on a fresh pool
+        if pool is _pool:
+            _discard_shared_pool(pool)
+        raise
+    finally:
+        # An abandoned download stops queueing work for the shared pool
+        for future in pending:
+            future.cancel()
+        if pool is not _pool:
+            pool.shutdown()
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that collects bytes for streaming"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_invoices_zip(invoice_ids, max_workers=None):
+    """Yield a ZIP archive of the invoices' PDFs chunk by chunk
+
+    The sink is not seekable, so zipfile writes data descriptors after each
+    entry instead of seeking back to patch the local headers.
+    """
+    sink = _ChunkSink()
+    seen = set()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for _, filename, pdf_bytes in iter_rendered_pdfs(invoice_ids, max_workers):
+            # Invoice numbers are unique, but guard against clobbering entries anyway
+            name, ext = os.path.splitext(filename)
+            suffix = 1
+            while filename in seen:
+                suffix += 1
+                filename = f"{name}-{suffix}{ext}"
+            seen.add(filename)
+            archive.writestr(filename, pdf_bytes)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    # Central directory is written on close
+    yield sink.drain()
@@ -1,9 +1,18 @@
 """
 Helper functions for invoice calculations including pro-rated salary and PF
+
+All amounts are Money (integer paise); see app/services/money.py.
 """
-from decimal import Decimal
 from datetime import date, datetime
 from calendar import monthrange
+from operator import attrgetter
+from app.services.money import Money, ZERO
+
+# Fixed monthly PF paid by the consultancy on each side
+EMPLOYEE_PF = Money(144000)
+EMPLOYER_PF = Money(144000)
+SERVICE_FEE_PER_EMPLOYEE = Money(625000)
+SERVICE_FEE_GST_RATE = 18
 
 def calculate_pro_rated_salary(employee, invoice_date):
     """
@@ -17,7 +26,7 @@ def calculate_pro_rated_salary(employee, invoice_date):
     - If no date of joining: full monthly salary
     """
     if not employee.date_of_joining:
-        return Decimal(str(employee.salary_per_month))
+        return Money.from_decimal(employee.salary_per_month)
     
     # Convert invoice_date to date if it's a datetime
     if isinstance(invoice_date, datetime):
@@ -43,7 +52,7 @@ def calculate_pro_rated_salary(employee, invoice_date):
         if invoice_date <= next_month_start or is_joining_month:
             # Calculate pro-rated for joining month
             if employee.date_of_joining.day == 1:
-                return Decimal(str(employee.salary_per_month))
+                return Money.from_decimal(employee.salary_per_month)
             
             days_in_month = monthrange(employee.date_of_joining.year, employee.date_of_joining.month)[1]
             days_worked = days_in_month - employee.date_of_joining.day + 1
@@ -53,18 +62,14 @@ def calculate_pro_rated_salary(employee, invoice_date):
             if days_worked > days_in_month:
                 days_worked = days_in_month
             
-            monthly_salary = Decimal(str(employee.salary_per_month))
-            daily_rate = monthly_salary / Decimal(days_in_month)
-            pro_rated = daily_rate * Decimal(days_worked)
-            pro_rated = pro_rated.quantize(Decimal('0.01'))
-            
-            return pro_rated
+            monthly_salary = Money.from_decimal(employee.salary_per_month)
+            return monthly_salary.pro_rate(days_worked, days_in_month)
     
     # If invoice is for the joining month, calculate pro-rated salary
     if is_joining_month:
         # If joined on 1st of month, full salary
         if employee.date_of_joining.day == 1:
-            return Decimal(str(employee.salary_per_month))
+            return Money.from_decimal(employee.salary_per_month)
         
         # Calculate days in the joining month
         days_in_month = monthrange(employee.date_of_joining.year, employee.date_of_joining.month)[1]
@@ -79,34 +84,27 @@ def calculate_pro_rated_salary(employee, invoice_date):
         if days_worked > days_in_month:
             days_worked = days_in_month
         
-        # Pro-rated salary = (monthly_salary / days_in_month) * days_worked
-        monthly_salary = Decimal(str(employee.salary_per_month))
-        daily_rate = monthly_salary / Decimal(days_in_month)
-        pro_rated = daily_rate * Decimal(days_worked)
-        
-        # Round to 2 decimal places
-        pro_rated = pro_rated.quantize(Decimal('0.01'))
-        
-        return pro_rated
+        # Pro-rated salary = monthly_salary * days_worked / days_in_month, rounded half-even to the paisa
+        monthly_salary = Money.from_decimal(employee.salary_per_month)
+        return monthly_salary.pro_rate(days_worked, days_in_month)
     
     # If invoice is for a month AFTER the joining month, employee worked full month
     elif (employee.date_of_joining.year < invoice_date.year or 
           (employee.date_of_joining.year == invoice_date.year and 
            employee.date_of_joining.month < invoice_date.month)):
         # Employee joined in a previous month, they worked full month for this invoice
-        return Decimal(str(employee.salary_per_month))
+        return Money.from_decimal(employee.salary_per_month)
     
     # If invoice is for a month BEFORE joining (shouldn't happen, but handle it)
     else:
-        return Decimal('0')
+        return ZERO
 
 def calculate_pf(amount, pf_percentage=12):
     """
     Calculate PF (Provident Fund) - default is 12% in India
     Returns both employee PF and employer PF (both are same percentage)
     """
-    pf_decimal = Decimal(str(pf_percentage)) / Decimal('100')
-    pf_amount = amount * pf_decimal
+    pf_amount = Money.from_decimal(amount).percent(pf_percentage)
     return pf_amount, pf_amount  # Employee PF, Employer PF
 
 def calculate_employee_totals(employee, invoice_date):
@@ -119,8 +117,8 @@ def calculate_employee_totals(employee, invoice_date):
     """
     pro_rated_salary = calculate_pro_rated_salary(employee, invoice_date)
     # Fixed PF amounts for both employee and employer
-    employee_pf = Decimal('1440')
-    employer_pf = Decimal('1440')
+    employee_pf = EMPLOYEE_PF
+    employer_pf = EMPLOYER_PF
     # Total cost includes all: salary + employee PF + employer PF (all paid by consultancy)
     total_cost = pro_rated_salary + employee_pf + employer_pf
     
@@ -131,8 +129,91 @@ def calculate_employee_totals(employee, invoice_date):
         'total_cost': total_cost
     }
 
+_FULL_MONTH = 'full'
+_NOT_STARTED = 'not_started'
+_payroll_columns = attrgetter('date_of_joining', 'is_new_employee', 'salary_per_month')
+
+
+def _pro_rating_plan(date_of_joining, is_new_employee, invoice_date):
+    """
+    Classify a joining date exactly as calculate_pro_rated_salary does.
+    Returns _FULL_MONTH, _NOT_STARTED or (days_in_month, days_worked).
+    """
+    if not date_of_joining:
+        return _FULL_MONTH
+    
+    is_joining_month = (date_of_joining.year == invoice_date.year and
+                        date_of_joining.month == invoice_date.month)
+    if is_new_employee:
+        if date_of_joining.month == 12:
+            next_month_start = date(date_of_joining.year + 1, 1, 1)
+        else:
+            next_month_start = date(date_of_joining.year, date_of_joining.month + 1, 1)
+        pro_rate_joining_month = invoice_date <= next_month_start or is_joining_month
+    else:
+        pro_rate_joining_month = is_joining_month
+    
+    if pro_rate_joining_month:
+        if date_of_joining.day == 1:
+            return _FULL_MONTH
+        days_in_month = monthrange(date_of_joining.year, date_of_joining.month)[1]
+        days_worked = min(max(days_in_month - date_of_joining.day + 1, 1), days_in_month)
+        return days_in_month, days_worked
+    
+    if (date_of_joining.year, date_of_joining.month) < (invoice_date.year, invoice_date.month):
+        return _FULL_MONTH
+    return _NOT_STARTED
+
+def calculate_batch_totals(employees, invoice_date):
+    """
+    Batch version of calculate_employee_totals for a whole invoice.
+    Returns one dict per employee, in order, with values identical to the
+    per-employee function.
+    
+    Works column-wise: the date logic runs once per distinct (joining date,
+    new-employee flag) pair instead of once per employee, and only employees
+    in their joining month do any division.
+    """
+    if isinstance(invoice_date, datetime):
+        invoice_date = invoice_date.date()
+    
+    # Read each column once; ORM attribute access dominates for plain full-month rows
+    columns = list(zip(*map(_payroll_columns, employees))) or [(), (), ()]
+    joining_dates, new_flags, monthly_salaries = columns
+    new_flags = [bool(flag) for flag in new_flags]
+    monthly_salaries = [Money.from_decimal(salary) for salary in monthly_salaries]
+    
+    plans = {key: _pro_rating_plan(key[0], key[1], invoice_date)
+             for key in set(zip(joining_dates, new_flags))}
+    
+    pf_total_paise = EMPLOYEE_PF.paise + EMPLOYER_PF.paise
+    results = []
+    for joining_date, is_new, monthly_salary in zip(joining_dates, new_flags, monthly_salaries):
+        plan = plans[(joining_date, is_new)]
+        if plan is _FULL_MONTH:
+            pro_rated_salary = monthly_salary
+        elif plan is _NOT_STARTED:
+            pro_rated_salary = ZERO
+        else:
+            days_in_month, days_worked = plan
+            pro_rated_salary = monthly_salary.pro_rate(days_worked, days_in_month)
+        results.append({
+            'pro_rated_salary': pro_rated_salary,
+            'employee_pf': EMPLOYEE_PF,
+            'employer_pf': EMPLOYER_PF,
+            'total_cost': Money(pro_rated_salary.paise + pf_total_paise)
+        })
+    return results
+
+def calculate_service_fee(employee_count):
+    """Service fee: ₹6,250 per employee plus 18% GST"""
+    base_service_fee = SERVICE_FEE_PER_EMPLOYEE * employee_count
+    return base_service_fee + base_service_fee.percent(SERVICE_FEE_GST_RATE)
+
 def format_currency_inr(amount):
     """Format amount as Indian Rupees - using INR symbol that displays correctly"""
     # Use 'INR' or 'Rs.' if ₹ doesn't render properly
+    if type(amount) is Money:
+        return amount.format_inr()
     return f"INR {float(amount):,.2f}"
 
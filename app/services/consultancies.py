@@ -0,0 +1,30 @@
+"""
+Looking up client/consultancies by the names people type.
+
+Names are matched ignoring case and repeated whitespace, so "Acme  Corp" and
+"acme corp" find the existing Acme Corp instead of starting a new one.
+"""
+from app.models import db
+from app.models.consultancy import Consultancy
+
+
+def normalize_consultancy_name(name):
+    return ' '.join((name or '').split())
+
+
+def find_consultancy(name):
+    """The consultancy with this name, or None"""
+    name = normalize_consultancy_name(name)
+    if not name:
+        return None
+    return Consultancy.query.filter(db.func.lower(Consultancy.name) == name.lower()).first()
+
+
+def get_or_create_consultancy(name):
+    """The consultancy with this name, added to the session if it is new"""
+    consultancy = find_consultancy(name)
+    if consultancy is None:
+        consultancy = Consultancy(name=normalize_consultancy_name(name))
+        db.session.add(consultancy)
+        db.session.flush()
+    return consultancy
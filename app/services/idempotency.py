@@ -0,0 +1,36 @@
+"""
+Duplicate protection for invoice creation.
+
+Two things identify a repeat of an earlier generate request, and both are
+checked before any payroll is computed:
+
+- an idempotency key sent by the client (Idempotency-Key header or the
+  generate form's hidden field), unique per invoice;
+- a content hash of what is being billed - consultancy, the set of employee
+  IDs, billing month and fee options - with a unique index, so the same bill
+  cannot be issued twice for a month however it is submitted.
+"""
+import hashlib
+import json
+from app.models import db
+from app.models.invoice import Invoice
+
+
+def invoice_content_hash(client_consultancy, employee_ids, invoice_date, include_service_fee, miscellaneous_cost):
+    """Canonical sha256 of an invoice request; miscellaneous_cost is Money"""
+    canonical = json.dumps({
+        'client_consultancy': client_consultancy,
+        'employee_ids': sorted({int(employee_id) for employee_id in employee_ids}),
+        'billing_month': invoice_date.strftime('%Y-%m'),
+        'include_service_fee': bool(include_service_fee),
+        'miscellaneous_cost': str(miscellaneous_cost),
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def find_duplicate_invoice(content_hash, idempotency_key=None):
+    """The invoice an earlier request with this key or content already created, or None"""
+    conditions = [Invoice.content_hash == content_hash]
+    if idempotency_key:
+        conditions.append(Invoice.idempotency_key == idempotency_key)
+    return Invoice.query.filter(db.or_(*conditions)).first()
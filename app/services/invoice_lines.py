@@ -0,0 +1,96 @@
+"""
+Invoice line items - building them at generate time and reading them back.
+
+Each line snapshots one employee's name, joining details and computed
+amounts, so showing or rendering an invoice never recomputes payroll or
+depends on the current employee rows.
+"""
+from app.models.employee import Employee
+from app.models.invoice import Invoice
+from app.models.invoice_line import InvoiceLine
+from app.services.calculations import calculate_batch_totals, calculate_service_fee
+from app.services.money import Money, ZERO
+
+
+def build_invoice_lines(employees, invoice_date):
+    """Return unsaved InvoiceLine rows for the employees, in the given order"""
+    lines = []
+    for position, (employee, calc) in enumerate(
+            zip(employees, calculate_batch_totals(employees, invoice_date)), start=1):
+        lines.append(InvoiceLine(
+            position=position,
+            employee_id=employee.id,
+            name=employee.name,
+            is_new_employee=bool(employee.is_new_employee),
+            date_of_joining=employee.date_of_joining,
+            salary_date=employee.salary_date,
+            pro_rated_salary=calc['pro_rated_salary'].to_decimal(),
+            employee_pf=calc['employee_pf'].to_decimal(),
+            employer_pf=calc['employer_pf'].to_decimal(),
+            total_cost=calc['total_cost'].to_decimal(),
+        ))
+    return lines
+
+
+def build_invoice(employees, invoice_date, consultancy, include_service_fee, miscellaneous_cost):
+    """Price a new invoice for the employees without touching the database
+
+    Returns an unsaved Invoice with its lines, service fee and payroll totals
+    filled in; the caller adds the number, recipient, employee_ids and notes and decides
+    whether to save it. consultancy is a Consultancy (None for a preview
+    without one) and miscellaneous_cost is Money.
+    """
+    lines = build_invoice_lines(employees, invoice_date)
+    
+    # Calculate service fee: ₹6,250 per employee + 18% GST
+    service_fee = calculate_service_fee(len(employees)) if include_service_fee else ZERO
+    
+    # Monthly payroll: every line's salary + both PFs, plus miscellaneous cost and service fee
+    total_monthly = Money.sum(Money.from_decimal(line.total_cost) for line in lines)
+    total_monthly += miscellaneous_cost + service_fee
+    total_annual = Money.sum(Money.from_decimal(emp.salary_per_annum) for emp in employees)
+    
+    return Invoice(
+        invoice_date=invoice_date,
+        client_consultancy=consultancy.name if consultancy else None,
+        consultancy_id=consultancy.id if consultancy else None,
+        total_monthly_payroll=total_monthly.to_decimal(),
+        total_annual_payroll=total_annual.to_decimal(),
+        miscellaneous_cost=miscellaneous_cost.to_decimal(),
+        service_fee=service_fee.to_decimal(),
+        lines=lines,
+        employees=list(employees)
+    )
+
+
+def load_invoice_lines(invoice):
+    """The invoice's stored lines
+
+    Invoices created before line items existed and not yet backfilled by
+    the invoice_lines migration fall back to lines computed from the current
+    employee rows, exactly as those invoices were always shown.
+    """
+    if invoice.lines:
+        return invoice.lines
+    employees = Employee.query.filter(Employee.id.in_(invoice.get_employee_ids_list())).all()
+    return build_invoice_lines(employees, invoice.invoice_date)
+
+
+def calculate_invoice_totals(invoice, lines):
+    """The invoice's sub-totals and grand total from its line items"""
+    total_salary = Money.sum(Money.from_decimal(line.pro_rated_salary) for line in lines)
+    total_employee_pf = Money.sum(Money.from_decimal(line.employee_pf) for line in lines)
+    total_employer_pf = Money.sum(Money.from_decimal(line.employer_pf) for line in lines)
+    miscellaneous_cost = Money.from_decimal(invoice.miscellaneous_cost)
+    service_fee = Money.from_decimal(invoice.service_fee)
+    
+    return {
+        'lines': lines,
+        'total_salary': total_salary,
+        'total_employee_pf': total_employee_pf,
+        'total_employer_pf': total_employer_pf,
+        'miscellaneous_cost': miscellaneous_cost,
+        'service_fee': service_fee,
+        # Grand Total: salary + employee PF + employer PF + miscellaneous + service fee
+        'grand_total': total_salary + total_employee_pf + total_employer_pf + miscellaneous_cost + service_fee,
+    }
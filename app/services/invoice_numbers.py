@@ -0,0 +1,77 @@
+"""
+Invoice number allocation.
+
+Numbers look like INV-20250131-007: a per-day prefix and a counter kept in
+invoice_sequences. The counter is bumped with a single UPDATE ... RETURNING,
+which takes the row's write lock until the caller commits, so concurrent
+workers queue up behind each other instead of picking the same number, and
+rolling back the invoice also rolls back the counter - no duplicates and no
+gaps. Works on SQLite (3.35+) and PostgreSQL.
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import db
+from app.models.invoice import Invoice
+from app.models.invoice_sequence import InvoiceSequence
+
+sequences = InvoiceSequence.__table__
+
+
+def invoice_number_prefix(invoice_date):
+    return f"INV-{invoice_date.strftime('%Y%m%d')}"
+
+
+def format_invoice_number(prefix, number):
+    return f"{prefix}-{number:03d}"
+
+
+def highest_issued_number(prefix):
+    """Largest counter already used by an invoice with this prefix, or 0
+
+    Six-digit suffixes are the HHMMSS fallback the old allocator used when it
+    ran out of attempts, not counter values, so they are skipped.
+    """
+    numbers = db.session.execute(
+        db.select(Invoice.invoice_number).where(Invoice.invoice_number.like(f"{prefix}-%"))
+    ).scalars()
+    highest = 0
+    for invoice_number in numbers:
+        suffix = invoice_number[len(prefix) + 1:]
+        if suffix.isdigit() and len(suffix) != 6:
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def _upsert(prefix, first_number, count):
+    insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    statement = insert(sequences).values(prefix=prefix, last_number=first_number + count - 1)
+    return statement.on_conflict_do_update(
+        index_elements=[sequences.c.prefix],
+        set_={'last_number': sequences.c.last_number + count}
+    ).returning(sequences.c.last_number)
+
+
+def allocate_invoice_numbers(invoice_date, count):
+    """Reserve the next count invoice numbers for invoice_date in the current transaction
+
+    Commit (or roll back) soon after: the sequence row stays locked until then.
+    """
+    prefix = invoice_number_prefix(invoice_date)
+    last_number = db.session.execute(
+        sequences.update()
+        .where(sequences.c.prefix == prefix)
+        .values(last_number=sequences.c.last_number + count)
+        .returning(sequences.c.last_number)
+    ).scalar()
+    
+    if last_number is None:
+        # First invoice with this prefix since the table was created. Start
+        # after any numbers issued before it existed; if another worker creates
+        # the row first, the upsert simply advances theirs
+        last_number = db.session.execute(_upsert(prefix, highest_issued_number(prefix) + 1, count)).scalar()
+    
+    return [format_invoice_number(prefix, number) for number in range(last_number - count + 1, last_number + 1)]
+
+
+def allocate_invoice_number(invoice_date):
+    """Reserve the next invoice number for invoice_date; see allocate_invoice_numbers"""
+    return allocate_invoice_numbers(invoice_date, 1)[0]
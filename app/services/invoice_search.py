@@ -0,0 +1,179 @@
+"""
+Invoice search: full text over invoice_to, notes and client_consultancy,
+plus invoice number prefix, date, amount and consultancy filters, all as
+SQL the database can answer from its indexes.
+
+Text search uses an external-content FTS5 table on SQLite, kept in sync by
+triggers (so bulk inserts are indexed too), and a GIN expression index on
+PostgreSQL. Other databases, or a SQLite built without FTS5, fall back to
+LIKE.
+"""
+import re
+from calendar import monthrange
+from datetime import date
+from sqlalchemy.exc import OperationalError
+from app.models import db
+from app.models.consultancy import Consultancy
+from app.models.invoice import Invoice
+
+FTS_TABLE = 'invoices_fts'
+
+_SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "invoice_to, notes, client_consultancy, content='invoices', content_rowid='id')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON invoices BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, invoice_to, notes, client_consultancy) "
+    "VALUES (new.id, new.invoice_to, new.notes, new.client_consultancy); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON invoices BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, invoice_to, notes, client_consultancy) "
+    "VALUES ('delete', old.id, old.invoice_to, old.notes, old.client_consultancy); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON invoices BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, invoice_to, notes, client_consultancy) "
+    "VALUES ('delete', old.id, old.invoice_to, old.notes, old.client_consultancy); "
+    f"INSERT INTO {FTS_TABLE}(rowid, invoice_to, notes, client_consultancy) "
+    "VALUES (new.id, new.invoice_to, new.notes, new.client_consultancy); END",
+]
+
+# The expression must match the index exactly for PostgreSQL to use it
+_PG_DOCUMENT = ("to_tsvector('simple', coalesce(invoice_to, '') || ' ' || coalesce(notes, '') "
+                "|| ' ' || coalesce(client_consultancy, ''))")
+
+_backend = None
+
+
+def _search_backend():
+    global _backend
+    if _backend is None:
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            _backend = 'postgresql'
+        elif dialect == 'sqlite' and db.session.execute(db.text(
+                "SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': FTS_TABLE}).first():
+            _backend = 'fts5'
+        else:
+            _backend = 'like'
+    return _backend
+
+
+def ensure_search_index():
+    """Create the text search index if it is missing, indexing existing invoices; returns True if created"""
+    global _backend
+    _backend = None
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        db.session.execute(db.text(
+            f"CREATE INDEX IF NOT EXISTS ix_invoices_search ON invoices USING GIN ({_PG_DOCUMENT})"))
+        db.session.commit()
+        return False
+    if dialect != 'sqlite':
+        return False
+    if db.session.execute(db.text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': FTS_TABLE}).first():
+        return False
+    try:
+        for statement in _SQLITE_FTS:
+            db.session.execute(db.text(statement))
+        db.session.execute(db.text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        db.session.commit()
+    except OperationalError:
+        # SQLite without FTS5 - search falls back to LIKE
+        db.session.rollback()
+        return False
+    return True
+
+
+def rebuild_search_index():
+    """Re-index every invoice from scratch (SQLite FTS5 only; PostgreSQL's index needs no rebuild)"""
+    if _search_backend() == 'fts5':
+        db.session.execute(db.text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        db.session.commit()
+
+
+def _terms(text):
+    return re.findall(r'\w+', text or '')
+
+
+def _text_filter(text):
+    terms = _terms(text)
+    if not terms:
+        return None
+    backend = _search_backend()
+    if backend == 'fts5':
+        # Every term, each as a prefix: "acme" "mar"* matches "Acme ... March"
+        match = ' '.join(f'"{term}"*' for term in terms)
+        matches = db.text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+        return Invoice.id.in_(matches.bindparams(match=match).columns(db.column('rowid', db.Integer)))
+    if backend == 'postgresql':
+        query = ' & '.join(f"{term}:*" for term in terms)
+        return db.text(f"{_PG_DOCUMENT} @@ to_tsquery('simple', :tsquery)").bindparams(tsquery=query)
+    return db.and_(*[
+        db.or_(Invoice.invoice_to.ilike(f'%{term}%'), Invoice.notes.ilike(f'%{term}%'),
+               Invoice.client_consultancy.ilike(f'%{term}%'))
+        for term in terms
+    ])
+
+
+def _prefix_filter(prefix):
+    # A range rather than LIKE, so the unique index on invoice_number serves it everywhere
+    prefix = prefix.strip().upper()
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return db.and_(Invoice.invoice_number >= prefix, Invoice.invoice_number < upper_bound)
+
+
+def filter_invoices(query, text=None, number_prefix=None, start_date=None, end_date=None,
+                    min_amount=None, max_amount=None, consultancy_id=None):
+    """Apply the search filters that are set to an Invoice query"""
+    conditions = []
+    text_filter = _text_filter(text)
+    if text_filter is not None:
+        conditions.append(text_filter)
+    if number_prefix and number_prefix.strip():
+        conditions.append(_prefix_filter(number_prefix))
+    if start_date:
+        conditions.append(Invoice.invoice_date >= start_date)
+    if end_date:
+        conditions.append(Invoice.invoice_date <= end_date)
+    if min_amount is not None:
+        conditions.append(Invoice.total_monthly_payroll >= min_amount)
+    if max_amount is not None:
+        conditions.append(Invoice.total_monthly_payroll <= max_amount)
+    if consultancy_id:
+        conditions.append(Invoice.consultancy_id == consultancy_id)
+    return query.filter(*conditions)
+
+
+def _month_facet(value, count):
+    year, month = map(int, value.split('-'))
+    return {
+        'month': value,
+        'start_date': date(year, month, 1).isoformat(),
+        'end_date': date(year, month, monthrange(year, month)[1]).isoformat(),
+        'count': count,
+    }
+
+
+def search_facets(filters):
+    """Result counts by consultancy and by invoice month for the given filters
+
+    The consultancy counts ignore the consultancy filter itself, so picking
+    one still shows how many results the others would have. Each month
+    carries the start_date/end_date that narrow a search to it.
+    """
+    by_consultancy = filter_invoices(
+        db.session.query(Consultancy.id, Consultancy.name, db.func.count(Invoice.id))
+        .join(Invoice, Invoice.consultancy_id == Consultancy.id),
+        **{**filters, 'consultancy_id': None}
+    ).group_by(Consultancy.id, Consultancy.name).order_by(db.func.count(Invoice.id).desc(), Consultancy.name)
+    
+    if db.engine.dialect.name == 'postgresql':
+        month = db.func.to_char(Invoice.invoice_date, 'YYYY-MM')
+    else:
+        month = db.func.strftime('%Y-%m', Invoice.invoice_date)
+    by_month = filter_invoices(
+        db.session.query(month, db.func.count(Invoice.id)), **filters
+    ).group_by(month).order_by(month.desc())
+    
+    return {
+        'consultancies': [{'id': consultancy_id, 'name': name, 'count': count}
+                          for consultancy_id, name, count in by_consultancy],
+        'months': [_month_facet(value, count) for value, count in by_month],
+    }
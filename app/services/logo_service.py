@@ -0,0 +1,171 @@
+"""
+Company logo processing.
+
+Uploads are normalised once into small renditions sized for where they are
+drawn - one for the PDF header and one for the web pages - and stored under
+names derived from the upload's content hash, so re-uploading the same file
+reuses the existing renditions. Renditions are only written here, at
+upload, by migrate.py and by the worker warmup. PDF rendering never hashes
+or writes anything: uploads record their rendition in logo_pdf_path, and
+prepare_root_logo records the root logo.png's for the process
+(root_logo_rendition); without one the original file is embedded.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from PIL import Image as PILImage
+from config import Config
+
+LOGO_DIR = 'uploads/logos'  # relative to app/static
+
+# Box the PDF header draws the logo into (kind='proportional'), in points
+PDF_LOGO_BOX = (7.65 * 72, 1.77 * 72)
+# Twice the 260x130 CSS box used by the templates, for high-DPI screens
+WEB_LOGO_BOX = (520, 260)
+
+
+def _static_path(relative_path):
+    return os.path.join(Config.BASE_DIR, 'app', 'static', relative_path)
+
+
+def _fit(size, box):
+    """Scale size down (never up) to fit inside box, keeping the aspect ratio"""
+    width, height = size
+    scale = min(box[0] / width, box[1] / height, 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _flatten(image):
+    """Composite onto white, which is what the logo sits on in the PDF"""
+    if not _has_alpha(image):
+        return image.convert('RGB')
+    rgba = image.convert('RGBA')
+    background = PILImage.new('RGB', rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel('A'))
+    return background
+
+
+def _write_atomic(relative_path, data):
+    # Concurrent uploads of the same logo race on the same name - last rename wins, both complete
+    full_path = _static_path(relative_path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_path, 0o644)  # mkstemp creates 0600; static files must be world-readable
+        os.replace(temp_path, full_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _pdf_rendition_path(digest):
+    return f"{LOGO_DIR}/{digest}-pdf.jpg"
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'JPEG':
+        # 4:4:4 chroma keeps coloured text and edges in logos crisp
+        image.save(buffer, 'JPEG', quality=92, subsampling=0, optimize=True)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def process_logo(data, filename):
+    """Store renditions of an uploaded logo and return (web_path, pdf_path)
+
+    Paths are relative to app/static. Files Pillow cannot decode (e.g. SVG)
+    are stored as-is and get no PDF rendition, which the PDF renderer skips
+    just as it always has.
+    """
+    digest = _digest(data)
+    ext = os.path.splitext(filename)[1].lower()
+
+    try:
+        image = PILImage.open(io.BytesIO(data))
+        image.load()
+    except Exception:
+        original_path = f"{LOGO_DIR}/{digest}{ext}"
+        if not os.path.exists(_static_path(original_path)):
+            _write_atomic(original_path, data)
+        return original_path, None
+
+    # Keep transparency on the web; the PDF always gets a flattened JPEG,
+    # which ReportLab embeds as-is instead of decoding and re-compressing
+    web_format = 'PNG' if _has_alpha(image) else 'JPEG'
+    web_path = f"{LOGO_DIR}/{digest}-web.{'png' if web_format == 'PNG' else 'jpg'}"
+    pdf_path = _pdf_rendition_path(digest)
+
+    if not os.path.exists(_static_path(web_path)):
+        web_image = image.convert('RGBA') if web_format == 'PNG' else _flatten(image)
+        web_image = web_image.resize(_fit(web_image.size, WEB_LOGO_BOX), PILImage.LANCZOS)
+        _write_atomic(web_path, _encode(web_image, web_format))
+
+    if not os.path.exists(_static_path(pdf_path)):
+        dpi = Config.LOGO_PDF_DPI
+        pixel_box = (PDF_LOGO_BOX[0] / 72 * dpi, PDF_LOGO_BOX[1] / 72 * dpi)
+        pdf_image = _flatten(image)
+        pdf_image = pdf_image.resize(_fit(pdf_image.size, pixel_box), PILImage.LANCZOS)
+        _write_atomic(pdf_path, _encode(pdf_image, 'JPEG'))
+
+    return web_path, pdf_path
+
+
+def pdf_rendition_for_file(full_path):
+    """Return the absolute path of the PDF rendition for a logo file on disk, or None"""
+    try:
+        with open(full_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    _, pdf_path = process_logo(data, os.path.basename(full_path))
+    return _static_path(pdf_path) if pdf_path else None
+
+
+# (logo path, (mtime_ns, size), rendition path) recorded by prepare_root_logo
+_root_logo = None
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def prepare_root_logo():
+    """Make the PDF rendition of the root logo.png and record it for this process; returns its path or None
+
+    A filesystem that can't be written to is not an error: PDFs then embed
+    the original logo.png.
+    """
+    global _root_logo
+    path = os.path.join(Config.BASE_DIR, 'logo.png')
+    try:
+        stamp = _file_stamp(path)
+        rendition = pdf_rendition_for_file(path)
+    except OSError:
+        return None
+    _root_logo = (path, stamp, rendition)
+    return rendition
+
+
+def root_logo_rendition(path):
+    """The rendition prepare_root_logo recorded for the logo at path, if the file hasn't changed since"""
+    if _root_logo is None or _root_logo[0] != path:
+        return None
+    try:
+        stamp = _file_stamp(path)
+    except OSError:
+        return None
+    return _root_logo[2] if stamp == _root_logo[1] else None
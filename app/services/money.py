@@ -0,0 +1,178 @@
+"""
+Fixed-point money in integer paise for the invoice calculation path.
+
+Amounts are stored as a single int, so sums, GST splits and pro-rating are
+exact integer arithmetic and do not depend on the Decimal context. The one
+rounding rule is half-even to the nearest paisa - what quantize() did under
+the default context - applied exactly once to the exact quotient. Database
+columns stay Numeric(10, 2): convert at the edges with Money.from_decimal()
+and to_decimal().
+"""
+from decimal import Decimal
+from functools import total_ordering
+
+
+# Below this, paise / 100 is close enough to the exact amount to format to it
+_FLOAT_SAFE_PAISE = 10 ** 15
+_FROM_DECIMAL_CACHE_SIZE = 65536
+_from_decimal_cache = {}
+
+
+def _divide_half_even(numerator, denominator):
+    """Round numerator / denominator (denominator > 0) to the nearest int, halves to even"""
+    quotient, remainder = divmod(numerator, denominator)
+    if remainder * 2 > denominator or (remainder * 2 == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+@total_ordering
+class Money:
+    """An INR amount held as integer paise
+
+    Immutable: instances are shared (see from_decimal), so arithmetic always
+    returns a new Money and assigning to paise raises AttributeError.
+    """
+    __slots__ = ('paise',)
+
+    def __init__(self, paise=0):
+        object.__setattr__(self, 'paise', paise)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Money is immutable; cannot set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Money is immutable; cannot delete {name}")
+
+    def __reduce__(self):
+        # Pickle and copy through the constructor rather than setattr
+        return Money, (self.paise,)
+
+    @classmethod
+    def from_decimal(cls, value):
+        """Convert a Decimal, int, str or float amount in rupees, rounding half-even to the paisa"""
+        if value is None:
+            return ZERO
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, int):
+            return cls(value * 100)
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value))
+        # The same few salaries and fees are converted on every render, so intern them
+        money = _from_decimal_cache.get(value)
+        if money is None:
+            numerator, denominator = value.as_integer_ratio()
+            money = cls(_divide_half_even(numerator * 100, denominator))
+            if len(_from_decimal_cache) >= _FROM_DECIMAL_CACHE_SIZE:
+                _from_decimal_cache.clear()
+            _from_decimal_cache[value] = money
+        return money
+
+    @classmethod
+    def sum(cls, amounts):
+        """Total of an iterable of Money, adding plain ints instead of allocating per step"""
+        return cls(sum(amount.paise for amount in amounts))
+
+    def to_decimal(self):
+        """The amount as a two-place Decimal, ready for a Numeric(10, 2) column"""
+        return Decimal(self.paise).scaleb(-2)
+
+    def pro_rate(self, numerator, denominator):
+        """self * numerator / denominator, e.g. a month's salary for days worked"""
+        return Money(_divide_half_even(self.paise * numerator, denominator))
+
+    def percent(self, rate):
+        """rate percent of this amount; rate is an int or Decimal such as 18"""
+        if isinstance(rate, int):
+            return Money(_divide_half_even(self.paise * rate, 100))
+        numerator, denominator = Decimal(rate).as_integer_ratio()
+        return Money(_divide_half_even(self.paise * numerator, denominator * 100))
+
+    def split_gst(self, rate=18):
+        """Split a GST-inclusive amount into (base, gst) that add back up to it exactly"""
+        base = Money(_divide_half_even(self.paise * 100, 100 + rate))
+        return base, self - base
+
+    def format_inr(self):
+        """'INR 123,456.78', the form printed on invoices"""
+        paise = self.paise
+        if -_FLOAT_SAFE_PAISE < paise < _FLOAT_SAFE_PAISE:
+            return f"INR {paise / 100:,.2f}"
+        return f"INR {self.to_decimal():,.2f}"
+
+    def __format__(self, spec):
+        if spec == '':
+            spec = '.2f'
+        # One C-level float format instead of Decimal; exact for any realistic amount
+        if spec in (',.2f', '.2f') and -_FLOAT_SAFE_PAISE < self.paise < _FLOAT_SAFE_PAISE:
+            return format(self.paise / 100, spec)
+        return format(self.to_decimal(), spec)
+
+    def _other_paise(self, other):
+        if isinstance(other, Money):
+            return other.paise
+        if isinstance(other, int):
+            return other * 100
+        return None
+
+    def __add__(self, other):
+        if type(other) is Money:
+            return Money(self.paise + other.paise)
+        paise = self._other_paise(other)
+        if paise is None:
+            return NotImplemented
+        return Money(self.paise + paise)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if type(other) is Money:
+            return Money(self.paise - other.paise)
+        paise = self._other_paise(other)
+        if paise is None:
+            return NotImplemented
+        return Money(self.paise - paise)
+
+    def __rsub__(self, other):
+        paise = self._other_paise(other)
+        if paise is None:
+            return NotImplemented
+        return Money(paise - self.paise)
+
+    def __mul__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return Money(self.paise * other)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.paise)
+
+    def __eq__(self, other):
+        paise = self._other_paise(other)
+        if paise is None:
+            return NotImplemented
+        return self.paise == paise
+
+    def __lt__(self, other):
+        paise = self._other_paise(other)
+        if paise is None:
+            return NotImplemented
+        return self.paise < paise
+
+    def __hash__(self):
+        return hash(self.paise)
+
+    def __bool__(self):
+        return self.paise != 0
+
+    def __str__(self):
+        return format(self, '.2f')
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+
+ZERO = Money(0)
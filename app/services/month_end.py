@@ -0,0 +1,138 @@
+"""
+Month-end invoice run.
+
+Generates one invoice per client/consultancy in a single pass: one query for
+the employees (grouped by consultancy), batch payroll per group, one
+statement to allocate every invoice number and one transaction that inserts
+the invoices, their lines and their employee links as executemany batches
+(and adds them to the dashboard's revenue summary).
+Consultancies that already have an invoice dated in the month are skipped,
+so a re-run only fills the gaps.
+"""
+import itertools
+import json
+from calendar import monthrange
+from datetime import date, datetime
+from operator import attrgetter
+from app.models import db
+from app.models.consultancy import Consultancy
+from app.models.employee import Employee
+from app.models.invoice import Invoice, invoice_employees
+from app.models.invoice_line import InvoiceLine
+from app.models.pdf_job import PdfJob
+from app.services.bulk_export import iter_rendered_pdfs
+from app.services.idempotency import invoice_content_hash
+from app.services.invoice_lines import build_invoice
+from app.services.invoice_numbers import allocate_invoice_numbers
+from app.services.money import ZERO
+from app.services.revenue import record_invoices
+
+
+def month_invoice_date(year, month, today=None):
+    """Today when running for the current month, otherwise the month's last day
+
+    The invoice date decides pro-rating, so a run made on 1 November for
+    October still prices October.
+    """
+    today = today or date.today()
+    if (today.year, today.month) == (year, month):
+        return today
+    return date(year, month, monthrange(year, month)[1])
+
+
+def _invoice_row(invoice):
+    return {column: getattr(invoice, column) for column in (
+        'invoice_number', 'invoice_date', 'invoice_to', 'client_consultancy', 'consultancy_id', 'employee_ids',
+        'total_monthly_payroll', 'total_annual_payroll', 'miscellaneous_cost', 'service_fee', 'notes',
+        'content_hash')}
+
+
+def _line_row(line, invoice_id):
+    return {'invoice_id': invoice_id, **{column: getattr(line, column) for column in (
+        'position', 'employee_id', 'name', 'is_new_employee', 'date_of_joining', 'salary_date',
+        'pro_rated_salary', 'employee_pf', 'employer_pf', 'total_cost')}}
+
+
+def run_month(year, month, include_service_fee=False):
+    """Create and commit the month's invoices; returns (invoices, skipped_consultancies)"""
+    invoice_date = month_invoice_date(year, month)
+    month_start = date(year, month, 1)
+    month_end = date(year, month, monthrange(year, month)[1])
+    
+    already_invoiced = dict(db.session.query(Consultancy.id, Consultancy.name).join(
+        Invoice, Invoice.consultancy_id == Consultancy.id
+    ).filter(
+        Invoice.invoice_date >= month_start,
+        Invoice.invoice_date <= month_end
+    ).distinct().all())
+    skipped = sorted(already_invoiced.values())
+    
+    employees = Employee.query.options(db.joinedload(Employee.consultancy)).filter(
+        Employee.consultancy_id.isnot(None)
+    ).order_by(Employee.consultancy_id, Employee.id).all()
+    groups = []
+    for consultancy_id, group in itertools.groupby(employees, key=attrgetter('consultancy_id')):
+        if consultancy_id not in already_invoiced:
+            group = list(group)
+            groups.append((group[0].consultancy, group))
+    if not groups:
+        return [], skipped
+    groups.sort(key=lambda group: group[0].name)
+    
+    invoices = []
+    for consultancy, group in groups:
+        invoice = build_invoice(group, invoice_date, consultancy, include_service_fee, ZERO)
+        invoice.invoice_to = consultancy.name
+        invoice.employee_ids = json.dumps([str(emp.id) for emp in group])
+        invoice.notes = ''
+        # Same hash the generate form would record, so submitting it afterwards finds this invoice
+        invoice.content_hash = invoice_content_hash(consultancy.name, [emp.id for emp in group], invoice_date,
+                                                    include_service_fee, ZERO)
+        invoices.append(invoice)
+    
+    try:
+        for invoice, invoice_number in zip(invoices, allocate_invoice_numbers(invoice_date, len(invoices))):
+            invoice.invoice_number = invoice_number
+        
+        # Bulk INSERTs rather than session.add_all(): the unit of work has to
+        # insert rows one at a time on SQLite to read back each new id.
+        # render_nulls keeps rows with and without NULLs in the same batch
+        db.session.execute(db.insert(Invoice).execution_options(render_nulls=True), [_invoice_row(invoice) for invoice in invoices])
+        invoice_ids = dict(db.session.execute(
+            db.select(Invoice.invoice_number, Invoice.id)
+            .where(Invoice.invoice_number.in_([invoice.invoice_number for invoice in invoices]))
+        ).all())
+        db.session.execute(db.insert(InvoiceLine).execution_options(render_nulls=True), [
+            _line_row(line, invoice_ids[invoice.invoice_number])
+            for invoice in invoices for line in invoice.lines
+        ])
+        db.session.execute(invoice_employees.insert(), [
+            {'invoice_id': invoice_ids[invoice.invoice_number], 'employee_id': employee.id}
+            for invoice in invoices for employee in invoice.employees
+        ])
+        record_invoices(invoices)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    invoices = Invoice.query.filter(Invoice.id.in_(invoice_ids.values())).order_by(Invoice.id).all()
+    return invoices, skipped
+
+
+def prerender_pdfs(invoices, max_workers=None):
+    """Render the invoices' PDFs on the bulk export process pool and store them as finished PDF jobs
+
+    Returns {invoice_id: job_id}; any worker can then serve the PDFs from /jobs/<id>/download.
+    """
+    started_at = datetime.utcnow()
+    job_ids = {}
+    for invoice_id, _, pdf_bytes in iter_rendered_pdfs([invoice.id for invoice in invoices], max_workers):
+        job = PdfJob(invoice_id=invoice_id, status=PdfJob.STATUS_DONE, pdf_data=pdf_bytes,
+                     started_at=started_at, finished_at=datetime.utcnow())
+        db.session.add(job)
+        db.session.flush()
+        job_ids[job.invoice_id] = job.id
+        # Commit as we go so finished PDFs don't pile up in the session
+        db.session.commit()
+    return job_ids
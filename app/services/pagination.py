@@ -0,0 +1,57 @@
+"""
+Keyset pagination over (created_at, id), newest first.
+
+A page is "the next N rows after this one" rather than OFFSET N, so every
+page costs the same however deep it is, and rows added while someone is
+paging don't shift what they see. Cursors are opaque strings carrying the
+last row's id and created_at.
+"""
+import base64
+import itertools
+from collections import namedtuple
+from datetime import datetime
+from app.models import db
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+def encode_cursor(row):
+    raw = f"{row.id}|{row.created_at.isoformat()}"
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(id, created_at) from a cursor; raises ValueError if it is malformed"""
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+    row_id, created_at = raw.split('|')
+    return int(row_id), datetime.fromisoformat(created_at)
+
+
+def newest_first(query, model):
+    return query.order_by(model.created_at.desc(), model.id.desc())
+
+
+def keyset_page(query, model, cursor=None, limit=50):
+    """One page of query (newest first) after the cursor's row; raises ValueError for a bad cursor"""
+    if cursor:
+        row_id, created_at = decode_cursor(cursor)
+        # Compare against the row's stored created_at where it still exists: SQLite
+        # keeps CURRENT_TIMESTAMP text, which a bound datetime does not compare equal to
+        anchor = db.func.coalesce(
+            db.select(model.created_at).where(model.id == row_id).scalar_subquery(), created_at)
+        query = query.filter(db.tuple_(model.created_at, model.id) < db.tuple_(anchor, row_id))
+    rows = newest_first(query, model).limit(limit + 1).all()
+    items = rows[:limit]
+    return Page(items, encode_cursor(items[-1]) if len(rows) > limit else None)
+
+
+def stream_newest_first(query, model, batch_size=500):
+    """Every row, newest first, fetched in batches as it is consumed; None if there are none"""
+    rows = iter(newest_first(query, model).yield_per(batch_size))
+    first = next(rows, None)
+    return None if first is None else itertools.chain([first], rows)
+
+
+def page_limit(requested, default, maximum=500):
+    """A client-requested page size, clamped to 1..maximum"""
+    return max(1, min(requested or default, maximum))
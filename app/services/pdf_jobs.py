@@ -0,0 +1,125 @@
+"""
+Background PDF rendering.
+
+Jobs are rows in the pdf_jobs table, so any gunicorn worker can report on a
+job or serve its PDF. Rendering happens on a small thread pool inside the
+worker that accepted the job, which keeps the request itself instant.
+A worker can be restarted, time out or crash with jobs in flight, so jobs
+left queued or running for PDF_JOB_TIMEOUT_SECONDS are recovered by the
+next enqueue or status poll in any worker: queued ones are claimed and run
+again, running ones are marked failed. Every status change is a
+conditional UPDATE, so a job only ever ends up with one outcome.
+"""
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app.models import db
+from app.models.invoice import Invoice
+from app.models.company_settings import CompanySettings
+from app.models.pdf_job import PdfJob
+from app.services.invoice_lines import load_invoice_lines
+from config import Config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Created lazily so each forked gunicorn worker gets its own threads
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.PDF_JOB_WORKERS,
+                                           thread_name_prefix='pdf-job')
+        return _executor
+
+
+def _prune_old_jobs():
+    # created_at comes from CURRENT_TIMESTAMP, which is UTC. Jobs this old
+    # are finished or were recovered long ago, whatever their status
+    cutoff = datetime.utcnow() - timedelta(hours=Config.PDF_JOB_RETENTION_HOURS)
+    PdfJob.query.filter(PdfJob.created_at < cutoff).delete(synchronize_session=False)
+
+
+def _stale_cutoff():
+    return datetime.utcnow() - timedelta(seconds=Config.PDF_JOB_TIMEOUT_SECONDS)
+
+
+def is_stale(job):
+    """Whether the job has been queued or running for longer than PDF_JOB_TIMEOUT_SECONDS"""
+    cutoff = _stale_cutoff()
+    if job.status == PdfJob.STATUS_QUEUED:
+        return job.created_at is not None and job.created_at < cutoff
+    if job.status == PdfJob.STATUS_RUNNING:
+        return job.started_at is not None and job.started_at < cutoff
+    return False
+
+
+def recover_stale_jobs(app):
+    """Fail running jobs that timed out and run stale queued jobs here; returns (failed, resubmitted)
+
+    Resubmitting a job another worker also still holds is harmless: only
+    one of them can claim it.
+    """
+    cutoff = _stale_cutoff()
+    failed = PdfJob.query.filter(
+        PdfJob.status == PdfJob.STATUS_RUNNING,
+        PdfJob.started_at < cutoff
+    ).update({
+        'status': PdfJob.STATUS_FAILED,
+        'error': f'Rendering did not finish within {Config.PDF_JOB_TIMEOUT_SECONDS} seconds',
+        'finished_at': db.func.current_timestamp()
+    }, synchronize_session=False)
+    queued_ids = db.session.execute(db.select(PdfJob.id).where(
+        PdfJob.status == PdfJob.STATUS_QUEUED,
+        PdfJob.created_at < cutoff
+    )).scalars().all()
+    db.session.commit()
+    for job_id in queued_ids:
+        _get_executor().submit(_run_job, app, job_id)
+    return failed, len(queued_ids)
+
+
+def enqueue_pdf_job(app, invoice):
+    """Record a queued job for the invoice and hand it to the worker pool"""
+    _prune_old_jobs()
+    recover_stale_jobs(app)
+    job = PdfJob(invoice_id=invoice.id, status=PdfJob.STATUS_QUEUED)
+    db.session.add(job)
+    db.session.commit()
+    _get_executor().submit(_run_job, app, job.id)
+    return job
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        try:
+            # Claim the job atomically so it can only ever run once
+            claimed = PdfJob.query.filter_by(id=job_id, status=PdfJob.STATUS_QUEUED).update(
+                {'status': PdfJob.STATUS_RUNNING, 'started_at': db.func.current_timestamp()},
+                synchronize_session=False
+            )
+            db.session.commit()
+            if not claimed:
+                return
+
+            job = db.session.get(PdfJob, job_id)
+            try:
+                invoice = db.session.get(Invoice, job.invoice_id)
+                company_settings = CompanySettings.query.first()
+                from app.services.pdf_service import generate_pdf
+                buffer = generate_pdf(invoice, load_invoice_lines(invoice), company_settings, output=io.BytesIO())
+                outcome = {'status': PdfJob.STATUS_DONE, 'pdf_data': buffer.getvalue()}
+            except Exception as e:
+                db.session.rollback()
+                outcome = {'status': PdfJob.STATUS_FAILED, 'error': str(e)}
+            # Only while still ours - recover_stale_jobs may have failed it meanwhile
+            PdfJob.query.filter_by(id=job_id, status=PdfJob.STATUS_RUNNING).update(
+                {**outcome, 'finished_at': db.func.current_timestamp()},
+                synchronize_session=False
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('PDF job %s could not be recorded', job_id)
@@ -1,146 +1,385 @@
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, HRFlowable, Image
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, HRFlowable, Image, Flowable, PageBreak
+from reportlab.lib.utils import simpleSplit
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_RIGHT, TA_LEFT, TA_CENTER
 from flask import current_app
 import tempfile
-from decimal import Decimal
 import os
 from config import Config
-from app.services.calculations import calculate_employee_totals, format_currency_inr
+from app.services.calculations import format_currency_inr, SERVICE_FEE_GST_RATE
+from app.services.invoice_lines import calculate_invoice_totals
+from app.services.money import ZERO
+from app.services.logo_service import root_logo_rendition
+from types import MappingProxyType
 
-def generate_pdf(invoice, employees, company_settings):
-    """Generate PDF from invoice data using ReportLab"""
-    # Create temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-    temp_file.close()
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(temp_file.name, pagesize=A4,
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    
-    # Section heading style
-    section_heading_style = ParagraphStyle(
-        'SectionHeading',
-        parent=styles['Normal'],
-        fontSize=11,
-        fontName='Helvetica-Bold',
-        textColor=colors.black,
-        spaceAfter=4,
-    )
-    
-    normal_style = styles['Normal']
-    right_style = ParagraphStyle(
-        'RightAlign',
-        parent=styles['Normal'],
-        alignment=TA_RIGHT,
-    )
-    
-    # Small text style for contact info
-    small_style = ParagraphStyle(
-        'SmallText',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.black,
-    )
-    
-    # Calculate full width to match table (same as employee table width)
-    full_width = 8*inch  # 4 + 2 + 2 inches for the three columns
-    
-    # Header - Traditional invoice format
-    # Top section: Company info (left) and INVOICE title (right)
+
+def _build_paragraph_styles():
+    """Build every ParagraphStyle used by the invoice PDF"""
+    normal = getSampleStyleSheet()['Normal']
+    
+    def style(name, **kwargs):
+        return ParagraphStyle(name, parent=normal, **kwargs)
+    
+    return MappingProxyType({
+        'Normal': normal,
+        'RightAlign': style('RightAlign', alignment=TA_RIGHT),
+        # Company address and contact info, left aligned from the left edge
+        'Address': style('AddressStyle', fontSize=9, textColor=colors.black,
+                         alignment=TA_LEFT, leftIndent=0),
+        # TO section - highlighted with larger font, client name on single line
+        'TOHeading': style('TOHeading', fontSize=13, fontName='Helvetica-Bold',
+                           textColor=colors.black, spaceAfter=6),
+        'TOContent': style('TOContent', fontSize=12, fontName='Helvetica',
+                           textColor=colors.black, spaceAfter=0,
+                           wordWrap='CJK',  # Prevent word wrapping to keep on single line
+                           allowWidows=0, allowOrphans=0),
+        'Misc': style('MiscStyle', fontSize=11, textColor=colors.black, alignment=TA_LEFT),
+        'ServiceTitle': style('ServiceTitle', fontSize=11, fontName='Helvetica-Bold', alignment=TA_LEFT),
+        'ServiceText': style('ServiceText', fontSize=10, alignment=TA_LEFT),
+        'ServiceAmount': style('ServiceAmount', fontSize=10, alignment=TA_RIGHT),
+        'ServiceTotal': style('ServiceTotal', fontSize=10, fontName='Helvetica-Bold', alignment=TA_LEFT),
+        'ServiceTotalAmount': style('ServiceTotalAmount', fontSize=10, fontName='Helvetica-Bold',
+                                    alignment=TA_RIGHT),
+        'GrandTotal': style('GrandTotal', fontSize=12, fontName='Helvetica-Bold', alignment=TA_LEFT),
+        'GrandTotalAmount': style('GrandTotalAmount', fontSize=12, fontName='Helvetica-Bold',
+                                  alignment=TA_RIGHT),
+        'SummaryCell': style('SummaryCell', fontSize=8, leading=10),
+        'PaymentNotes': style('PaymentNotes', fontSize=9, textColor=colors.black, alignment=TA_LEFT),
+        'ThankYou': style('ThankYou', fontSize=12, fontName='Helvetica-Bold',
+                          textColor=colors.black, alignment=TA_CENTER),
+        'Disclaimer': style('Disclaimer', fontSize=9, textColor=colors.grey, alignment=TA_CENTER),
+    })
+
+
+def _build_table_styles():
+    """Build every TableStyle used by the invoice PDF
     
-    # Add logo if exists (check root folder first, then company_settings)
-    logo_image = None
-    logo_paths = [
-        os.path.join(Config.BASE_DIR, 'logo.png'),  # Check root folder first
+    Table.setStyle only reads the commands, so one TableStyle can be shared by
+    any number of tables.
+    """
+    no_padding = [
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
     ]
-    
-    # Also check company_settings.logo_path if it exists
-    if company_settings.logo_path:
-        logo_paths.append(os.path.join(Config.BASE_DIR, 'app', 'static', company_settings.logo_path))
-    
-    for logo_full_path in logo_paths:
-        if os.path.exists(logo_full_path):
-            try:
-                # Create image with larger size
-                logo_image = Image(logo_full_path, width=7.65*inch, height=1.77*inch, kind='proportional')
-                break  # Use first found logo
-            except Exception as e:
-                # If image loading fails, try next path
-                continue
-    
-    # Build header with logo on left and invoice details on right, all on same line
-    # Create invoice details (number and date) on right side
-    invoice_number_para = Paragraph(f"INVOICE #{invoice.invoice_number}", right_style)
-    invoice_date_para = Paragraph(f"DATE: {invoice.invoice_date.strftime('%d %B %Y').upper()}", right_style)
-    
-    # Create a table with logo on left and invoice details on right
-    header_data = []
-    if logo_image:
-        # Logo on left, invoice details on right
-        invoice_details_cell = Table([
-            [invoice_number_para],
-            [invoice_date_para]
-        ], colWidths=[3.2*inch])
-        invoice_details_cell.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    return MappingProxyType({
+        'InvoiceDetails': TableStyle([('ALIGN', (0, 0), (-1, -1), 'RIGHT')] + no_padding),
+        # Header table with logo and invoice details on same line
+        'Header': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('LEFTPADDING', (0, 0), (0, -1), -3),  # Negative padding to move logo left
+            ('LEFTPADDING', (1, 0), (-1, -1), 0),
             ('RIGHTPADDING', (0, 0), (-1, -1), 0),
             ('TOPPADDING', (0, 0), (-1, -1), 0),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        header_data.append([logo_image, invoice_details_cell])
-    else:
-        # No logo, just invoice details
-        invoice_details_cell = Table([
-            [invoice_number_para],
-            [invoice_date_para]
-        ], colWidths=[8*inch])
-        invoice_details_cell.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ]),
+        'To': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),  # No left padding - starts from left edge
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f0f0f0')),  # Light grey background for highlighting
+        ]),
+        # Simple, formal styling - proper grid with vertical lines
+        'Employees': TableStyle([
+            # Header row - simple bold text
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (4, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 7),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('TOPPADDING', (0, 0), (-1, 0), 10),
+            ('LEFTPADDING', (0, 0), (-1, 0), 10),
+            ('RIGHTPADDING', (0, 0), (-1, 0), 10),
+            # Line below header
+            ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
+            # Data rows
+            ('FONTSIZE', (0, 1), (-1, -2), 8),
+            ('TOPPADDING', (0, 1), (-1, -2), 10),
+            ('BOTTOMPADDING', (0, 1), (-1, -2), 10),
+            ('LEFTPADDING', (0, 1), (-1, -2), 10),
+            ('RIGHTPADDING', (0, 1), (-1, -2), 10),
+            ('ALIGN', (1, 1), (4, -2), 'RIGHT'),
+            # Lines between data rows
+            ('LINEBELOW', (0, 1), (-1, -2), 1, colors.black),
+            # Total row - bold text, font size 7px
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 7),
+            ('ALIGN', (1, -1), (4, -1), 'RIGHT'),
+            ('TOPPADDING', (0, -1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, -1), (-1, -1), 10),
+            ('LEFTPADDING', (0, -1), (-1, -1), 10),
+            ('RIGHTPADDING', (0, -1), (-1, -1), 10),
+            # Line above total row
+            ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
+            # Vertical grid lines for columns
+            ('INNERGRID', (0, 0), (-1, -1), 1, colors.black),
+            # Outer border
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        # Page-sized chunk of a large invoice's employee table, without the sub-total row
+        'EmployeeRows': TableStyle([
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (4, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 7),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('TOPPADDING', (0, 0), (-1, 0), 10),
+            ('LEFTPADDING', (0, 0), (-1, 0), 10),
+            ('RIGHTPADDING', (0, 0), (-1, 0), 10),
+            ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('TOPPADDING', (0, 1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 10),
+            ('LEFTPADDING', (0, 1), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 1), (-1, -1), 10),
+            ('LINEBELOW', (0, 1), (-1, -1), 1, colors.black),
+            ('INNERGRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        # Statement summary: one row per invoice plus a total row
+        'StatementSummary': TableStyle([
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('FONTSIZE', (0, 0), (-1, 0), 7),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (3, 0), (4, -1), 'RIGHT'),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
+            ('INNERGRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        'ServiceFee': TableStyle([
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
             ('LEFTPADDING', (0, 0), (-1, -1), 0),
             ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-            ('TOPPADDING', (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        header_data.append([Paragraph("", normal_style), invoice_details_cell])
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 1), (-1, 2), 4),
+            ('BOTTOMPADDING', (0, 1), (-1, 2), 4),
+            ('LINEBELOW', (0, 2), (-1, 2), 0.5, colors.HexColor('#ddd')),
+            ('TOPPADDING', (0, 3), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 3), (-1, -1), 6),
+        ]),
+        'GrandTotal': TableStyle([
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('LINEABOVE', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+    })
+
+
+# Built once per process and shared by every render
+PARAGRAPH_STYLES = _build_paragraph_styles()
+TABLE_STYLES = _build_table_styles()
+
+
+def _employee_description(employee):
+    """Return the employee's name and the small info lines shown beneath it
+
+    Works on anything with the employee's name and joining fields - invoice
+    lines carry the same attribute names as Employee.
+    """
+    info_lines = []
+    if employee.is_new_employee:
+        new_emp_info = "New Employee"
+        if employee.date_of_joining:
+            new_emp_info += f" | Date of Joining: {employee.date_of_joining.strftime('%B %d, %Y')}"
+        info_lines.append(new_emp_info)
+    
+    # Add salary date info
+    salary_date_suffix = "th"
+    if employee.salary_date == 1:
+        salary_date_suffix = "st"
+    elif employee.salary_date == 2:
+        salary_date_suffix = "nd"
+    elif employee.salary_date == 3:
+        salary_date_suffix = "rd"
+    info_lines.append(f"Salary Date: {employee.salary_date}{salary_date_suffix} of every month")
+    
+    return employee.name, info_lines
+
+
+class _EmployeeNameCell(Flowable):
+    """Lightweight stand-in for the employee name Paragraph in large invoices
+    
+    Draws the bold name and the small grey info lines straight onto the canvas
+    with the same fonts and leading, skipping Paragraph's markup parser and
+    line breaker, which dominate render time at thousands of rows.
+    """
+    NAME_FONT = 'Helvetica-Bold'
+    NAME_SIZE = 10
+    INFO_FONT = 'Helvetica'
+    INFO_SIZE = 6
+    INFO_COLOR = colors.HexColor('#666666')
+    LEADING = 12
+    
+    def __init__(self, name, info_lines):
+        Flowable.__init__(self)
+        self.name = name
+        self.info_lines = info_lines
+        self._name_lines = [name]
+    
+    def wrap(self, availWidth, availHeight):
+        self._name_lines = simpleSplit(self.name, self.NAME_FONT, self.NAME_SIZE, availWidth) or ['']
+        self.width = availWidth
+        self.height = self.LEADING * (len(self._name_lines) + len(self.info_lines))
+        return self.width, self.height
+    
+    def draw(self):
+        canv = self.canv
+        y = self.height - self.NAME_SIZE
+        canv.setFont(self.NAME_FONT, self.NAME_SIZE)
+        for line in self._name_lines:
+            canv.drawString(0, y, line)
+            y -= self.LEADING
+        canv.setFillColor(self.INFO_COLOR)
+        canv.setFont(self.INFO_FONT, self.INFO_SIZE)
+        for line in self.info_lines:
+            canv.drawString(0, y, line)
+            y -= self.LEADING
+
+
+class _PagedEmployeeTable(Flowable):
+    """Employee table for large invoices, laid out one page-sized chunk at a time
+    
+    A single Table re-measures and rebuilds every remaining row each time it
+    splits across a page, which is quadratic in the row count. This keeps the
+    rows as plain data and only builds a Table for the rows that can land on
+    the current page, with the header row repeated on each page.
+    """
+    # Every row has at least a two-line name cell plus 20pt of padding
+    MIN_ROW_HEIGHT = 24
+    
+    def __init__(self, header, rows, subtotal, col_widths):
+        Flowable.__init__(self)
+        self.header = header
+        self.rows = rows
+        self.subtotal = subtotal
+        self.col_widths = col_widths
+        self.hAlign = 'CENTER'  # same placement as Table, which the chunks are
+        self._table = None
+    
+    def _chunk(self, availHeight):
+        """Return (table, is_last) for as many rows as could possibly fit"""
+        count = int(availHeight // self.MIN_ROW_HEIGHT) + 1
+        if count >= len(self.rows):
+            table = Table([self.header] + self.rows + [self.subtotal], colWidths=self.col_widths, repeatRows=1)
+            table.setStyle(TABLE_STYLES['Employees'])
+            return table, True
+        table = Table([self.header] + self.rows[:count], colWidths=self.col_widths, repeatRows=1)
+        table.setStyle(TABLE_STYLES['EmployeeRows'])
+        return table, False
+    
+    def wrap(self, availWidth, availHeight):
+        self._table, is_last = self._chunk(availHeight)
+        self.width, self.height = self._table.wrap(availWidth, availHeight)
+        if not is_last:
+            # Never claim to fit while rows remain, so the frame always splits us
+            self.height = max(self.height, availHeight + 1)
+        return self.width, self.height
+    
+    def split(self, availWidth, availHeight):
+        table, _ = self._chunk(availHeight)
+        parts = table.split(availWidth, availHeight)
+        if not parts:
+            return []
+        first = parts[0]
+        consumed = first._nrows - 1  # minus the header row
+        if consumed <= 0:
+            return []
+        rest = _PagedEmployeeTable(self.header, self.rows[consumed:], self.subtotal, self.col_widths)
+        return [first, rest]
+    
+    def draw(self):
+        self._table.drawOn(self.canv, 0, 0)
+
+
+def _pdf_logo_file(company_settings):
+    """Absolute path of the logo file to embed, or None
+
+    Renders never make renditions or hash logos - they use the ones
+    recorded at upload (logo_pdf_path) or by prepare_root_logo, and
+    otherwise embed the original file.
+    """
+    # Check root folder first, then company_settings
+    root_logo = os.path.join(Config.BASE_DIR, 'logo.png')
+    if os.path.exists(root_logo):
+        return root_logo_rendition(root_logo) or root_logo
+    if company_settings.logo_pdf_path:
+        rendition = os.path.join(Config.BASE_DIR, 'app', 'static', company_settings.logo_pdf_path)
+        if os.path.exists(rendition):
+            return rendition
+    if company_settings.logo_path:
+        # Uploaded before renditions existed
+        original = os.path.join(Config.BASE_DIR, 'app', 'static', company_settings.logo_path)
+        if os.path.exists(original):
+            return original
+    return None
+
+
+def _load_logo(company_settings):
+    """Return the logo Image flowable, or None if no logo can be loaded"""
+    logo_file = _pdf_logo_file(company_settings)
+    if not logo_file:
+        return None
+    try:
+        return Image(logo_file, width=7.65*inch, height=1.77*inch, kind='proportional')
+    except Exception:
+        return None
+
+
+def _header_elements(company_settings, logo_image, detail_lines):
+    """Logo with the given detail lines on the right, then company address and contact info"""
+    elements = []
+    styles = PARAGRAPH_STYLES
+    
+    # Build header with logo on left and details (e.g. invoice number and date) on right, all on same line
+    detail_paras = [[Paragraph(line, styles['RightAlign'])] for line in detail_lines]
+    
+    # Create a table with logo on left and details on right
+    header_data = []
+    if logo_image:
+        # Logo on left, details on right
+        details_cell = Table(detail_paras, colWidths=[3.2*inch])
+        details_cell.setStyle(TABLE_STYLES['InvoiceDetails'])
+        header_data.append([logo_image, details_cell])
+    else:
+        # No logo, just details
+        details_cell = Table(detail_paras, colWidths=[8*inch])
+        details_cell.setStyle(TABLE_STYLES['InvoiceDetails'])
+        header_data.append([Paragraph("", styles['Normal']), details_cell])
     
-    # Header table with logo and invoice details on same line
+    # Header table with logo and details on same line
     header_table = Table(header_data, colWidths=[4.8*inch, 3.2*inch])
-    header_table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('LEFTPADDING', (0, 0), (0, -1), -3),  # Negative padding to move logo left
-        ('LEFTPADDING', (1, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-    ]))
+    header_table.setStyle(TABLE_STYLES['Header'])
     elements.append(header_table)
     
     # Add company address and contact info below logo (left aligned)
     elements.append(Spacer(1, 0.05*inch))
     
     # Company address - below logo, left aligned, starting from left edge
-    address_style = ParagraphStyle(
-        'AddressStyle',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.black,
-        alignment=TA_LEFT,
-        leftIndent=0,  # Start from left edge
-    )
+    address_style = styles['Address']
     address_text = company_settings.company_address if company_settings.company_address else "Nyanapahalli Main Rd, Maruthi Layout, Royal Shelters, Stage 4, Bommanahalli, Bengaluru, Karnataka 560068"
     for line in address_text.split('\n'):
         if line.strip():
@@ -151,68 +390,45 @@ def generate_pdf(invoice, employees, company_settings):
     elements.append(Paragraph("Phone: 9986553505", address_style))
     
     elements.append(Spacer(1, 0.15*inch))
+    return elements
+
+
+def _to_elements(name):
+    """Highlighted TO block with the client name kept on a single line"""
+    styles = PARAGRAPH_STYLES
+    # Calculate full width to match table (same as employee table width)
+    full_width = 8*inch  # 4 + 2 + 2 inches for the three columns
     
-    # TO section - highlighted with larger font, client name on single line
-    to_heading_style = ParagraphStyle(
-        'TOHeading',
-        parent=styles['Normal'],
-        fontSize=13,
-        fontName='Helvetica-Bold',
-        textColor=colors.black,
-        spaceAfter=6,
-    )
-    to_content_style = ParagraphStyle(
-        'TOContent',
-        parent=styles['Normal'],
-        fontSize=12,
-        fontName='Helvetica',
-        textColor=colors.black,
-        spaceAfter=0,
-        wordWrap='CJK',  # Prevent word wrapping to keep on single line
-        allowWidows=0,
-        allowOrphans=0,
-    )
     # Replace spaces with non-breaking spaces to keep client name on one line
-    client_name_single_line = invoice.invoice_to.replace(' ', '\u00A0')
+    client_name_single_line = name.replace(' ', '\u00A0')
     to_data = [
-        [Paragraph("<b>TO:</b>", to_heading_style)],
-        [Paragraph(client_name_single_line, to_content_style)]
+        [Paragraph("<b>TO:</b>", styles['TOHeading'])],
+        [Paragraph(client_name_single_line, styles['TOContent'])]
     ]
     to_table = Table(to_data, colWidths=[full_width])
-    to_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),  # No left padding - starts from left edge
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f0f0f0')),  # Light grey background for highlighting
-    ]))
-    elements.append(to_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Define bold style for total row
-    bold_style = ParagraphStyle(
-        'BoldStyle',
-        parent=styles['Normal'],
-        fontName='Helvetica-Bold',
-        fontSize=11,
-    )
+    to_table.setStyle(TABLE_STYLES['To'])
+    return [to_table, Spacer(1, 0.3*inch)]
+
+
+def _invoice_elements(invoice, totals, company_settings, logo_image):
+    """All flowables for one invoice, from the header down to the disclaimer"""
+    styles = PARAGRAPH_STYLES
+    normal_style = styles['Normal']
+    
+    # Header - Traditional invoice format
+    # Top section: Company info (left) and INVOICE title (right)
+    elements = _header_elements(company_settings, logo_image, [
+        f"INVOICE #{invoice.invoice_number}",
+        f"DATE: {invoice.invoice_date.strftime('%d %B %Y').upper()}",
+    ])
+    
+    # TO section - highlighted with larger font, client name on single line
+    elements.extend(_to_elements(invoice.invoice_to))
     
-    # Calculate employee totals
-    employee_calculations = []
-    total_salary = Decimal('0')
-    total_employee_pf = Decimal('0')
-    total_employer_pf = Decimal('0')
-    
-    for employee in employees:
-        calc = calculate_employee_totals(employee, invoice.invoice_date)
-        employee_calculations.append({
-            'employee': employee,
-            'calc': calc
-        })
-        total_salary += calc['pro_rated_salary']
-        total_employee_pf += calc['employee_pf']
-        total_employer_pf += calc['employer_pf']
+    lines = totals['lines']
+    total_salary = totals['total_salary']
+    total_employee_pf = totals['total_employee_pf']
+    total_employer_pf = totals['total_employer_pf']
     
     # Table data - header row with PF columns
     table_data = [[
@@ -223,40 +439,26 @@ def generate_pdf(invoice, employees, company_settings):
         'TOTAL COST'
     ]]
     
-    # Employee rows with calculations
-    for item in employee_calculations:
-        employee = item['employee']
-        calc = item['calc']
-        
+    # Large invoices skip rich-text Paragraphs and lay the table out page by page
+    large_invoice = len(lines) > Config.PDF_LARGE_INVOICE_ROWS
+    
+    # Employee rows from the invoice's line items
+    for line in lines:
         # Build description with employee name and additional info
-        description_parts = [f"<b>{employee.name}</b>"]
-        
-        if employee.is_new_employee:
-            new_emp_info = "New Employee"
-            if employee.date_of_joining:
-                new_emp_info += f" | Date of Joining: {employee.date_of_joining.strftime('%B %d, %Y')}"
-            description_parts.append(f"<font size='6' color='#666666'>{new_emp_info}</font>")
-        
-        # Add salary date info
-        salary_date_suffix = "th"
-        if employee.salary_date == 1:
-            salary_date_suffix = "st"
-        elif employee.salary_date == 2:
-            salary_date_suffix = "nd"
-        elif employee.salary_date == 3:
-            salary_date_suffix = "rd"
-        
-        salary_date_info = f"Salary Date: {employee.salary_date}{salary_date_suffix} of every month"
-        description_parts.append(f"<font size='6' color='#666666'>{salary_date_info}</font>")
-        
-        description_text = "<br/>".join(description_parts)
+        name, info_lines = _employee_description(line)
+        if large_invoice:
+            description_cell = _EmployeeNameCell(name, info_lines)
+        else:
+            description_parts = [f"<b>{name}</b>"]
+            description_parts.extend(f"<font size='6' color='#666666'>{info}</font>" for info in info_lines)
+            description_cell = Paragraph("<br/>".join(description_parts), normal_style)
         
         table_data.append([
-            Paragraph(description_text, normal_style),
-            format_currency_inr(calc['pro_rated_salary']),
-            format_currency_inr(calc['employee_pf']),
-            format_currency_inr(calc['employer_pf']),
-            format_currency_inr(calc['total_cost'])
+            description_cell,
+            format_currency_inr(line.pro_rated_salary),
+            format_currency_inr(line.employee_pf),
+            format_currency_inr(line.employer_pf),
+            format_currency_inr(line.total_cost)
         ])
     
     # Sub-total row (salary + employee PF + employer PF)
@@ -268,160 +470,164 @@ def generate_pdf(invoice, employees, company_settings):
         format_currency_inr(total_salary + total_employee_pf + total_employer_pf)
     ])
     
-    # Create table with simple, formal styling - proper grid with vertical lines
-    employee_table = Table(table_data, colWidths=[3.0*inch, 1.3*inch, 1.3*inch, 1.3*inch, 1.0*inch])
-    employee_table.setStyle(TableStyle([
-        # Header row - simple bold text
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (4, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 7),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('LEFTPADDING', (0, 0), (-1, 0), 10),
-        ('RIGHTPADDING', (0, 0), (-1, 0), 10),
-        # Line below header
-        ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
-        # Data rows
-        ('FONTSIZE', (0, 1), (-1, -2), 8),
-        ('TOPPADDING', (0, 1), (-1, -2), 10),
-        ('BOTTOMPADDING', (0, 1), (-1, -2), 10),
-        ('LEFTPADDING', (0, 1), (-1, -2), 10),
-        ('RIGHTPADDING', (0, 1), (-1, -2), 10),
-        ('ALIGN', (1, 1), (4, -2), 'RIGHT'),
-        # Lines between data rows
-        ('LINEBELOW', (0, 1), (-1, -2), 1, colors.black),
-        # Total row - bold text, font size 7px
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, -1), (-1, -1), 7),
-        ('ALIGN', (1, -1), (4, -1), 'RIGHT'),
-        ('TOPPADDING', (0, -1), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, -1), (-1, -1), 10),
-        ('LEFTPADDING', (0, -1), (-1, -1), 10),
-        ('RIGHTPADDING', (0, -1), (-1, -1), 10),
-        # Line above total row
-        ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
-        # Vertical grid lines for columns
-        ('INNERGRID', (0, 0), (-1, -1), 1, colors.black),
-        # Outer border
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-    ]))
+    employee_col_widths = [3.0*inch, 1.3*inch, 1.3*inch, 1.3*inch, 1.0*inch]
+    if large_invoice:
+        employee_table = _PagedEmployeeTable(table_data[0], table_data[1:-1], table_data[-1], employee_col_widths)
+    else:
+        employee_table = Table(table_data, colWidths=employee_col_widths)
+        employee_table.setStyle(TABLE_STYLES['Employees'])
     
     elements.append(employee_table)
     elements.append(Spacer(1, 0.25*inch))
     
     # Miscellaneous costs section - left aligned
-    miscellaneous_cost = invoice.miscellaneous_cost or Decimal('0')
+    miscellaneous_cost = totals['miscellaneous_cost']
     if miscellaneous_cost > 0:
-        misc_style = ParagraphStyle('MiscStyle', parent=styles['Normal'], 
-            fontSize=11, textColor=colors.black, alignment=TA_LEFT)
-        misc_para = Paragraph(f"Miscellaneous Cost: {format_currency_inr(miscellaneous_cost)}", misc_style)
+        misc_para = Paragraph(f"Miscellaneous Cost: {format_currency_inr(miscellaneous_cost)}", styles['Misc'])
         elements.append(misc_para)
         elements.append(Spacer(1, 0.2*inch))
     
     # Service fee section - formatted as table for better alignment
-    service_fee = invoice.service_fee or Decimal('0')
+    service_fee = totals['service_fee']
     if service_fee > 0:
         # Calculate base and GST from total service fee
-        service_fee_base = service_fee / Decimal('1.18')
-        service_fee_base = service_fee_base.quantize(Decimal('0.01'))
-        service_fee_gst = service_fee - service_fee_base
-        service_fee_gst = service_fee_gst.quantize(Decimal('0.01'))
+        service_fee_base, service_fee_gst = service_fee.split_gst(SERVICE_FEE_GST_RATE)
         
         # Create service fee table for proper alignment - match employee table width
         service_fee_data = [
-            [Paragraph("<b>Service Fee:</b>", ParagraphStyle('ServiceTitle', parent=styles['Normal'], 
-                fontSize=11, fontName='Helvetica-Bold', alignment=TA_LEFT)), 
+            [Paragraph("<b>Service Fee:</b>", styles['ServiceTitle']), 
              Paragraph("", normal_style)],
-            [Paragraph("Base Service Fee (INR 6,250 per employee)", ParagraphStyle('ServiceText', parent=styles['Normal'], 
-                fontSize=10, alignment=TA_LEFT)),
-             Paragraph(format_currency_inr(service_fee_base), ParagraphStyle('ServiceAmount', parent=styles['Normal'], 
-                fontSize=10, alignment=TA_RIGHT))],
-            [Paragraph("GST (18%)", ParagraphStyle('ServiceText', parent=styles['Normal'], 
-                fontSize=10, alignment=TA_LEFT)),
-             Paragraph(format_currency_inr(service_fee_gst), ParagraphStyle('ServiceAmount', parent=styles['Normal'], 
-                fontSize=10, alignment=TA_RIGHT))],
-            [Paragraph("<b>Total Service Fee</b>", ParagraphStyle('ServiceTotal', parent=styles['Normal'], 
-                fontSize=10, fontName='Helvetica-Bold', alignment=TA_LEFT)),
-             Paragraph(f"<b>{format_currency_inr(service_fee)}</b>", ParagraphStyle('ServiceTotalAmount', parent=styles['Normal'], 
-                fontSize=10, fontName='Helvetica-Bold', alignment=TA_RIGHT))]
+            [Paragraph("Base Service Fee (INR 6,250 per employee)", styles['ServiceText']),
+             Paragraph(format_currency_inr(service_fee_base), styles['ServiceAmount'])],
+            [Paragraph("GST (18%)", styles['ServiceText']),
+             Paragraph(format_currency_inr(service_fee_gst), styles['ServiceAmount'])],
+            [Paragraph("<b>Total Service Fee</b>", styles['ServiceTotal']),
+             Paragraph(f"<b>{format_currency_inr(service_fee)}</b>", styles['ServiceTotalAmount'])]
         ]
         # Match the width of employee table (3.0 + 1.3 + 1.3 + 1.3 + 1.0 = 7.9 inches)
         service_fee_table = Table(service_fee_data, colWidths=[5.9*inch, 2.0*inch])
-        service_fee_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 1), (-1, 2), 4),
-            ('BOTTOMPADDING', (0, 1), (-1, 2), 4),
-            ('LINEBELOW', (0, 2), (-1, 2), 0.5, colors.HexColor('#ddd')),
-            ('TOPPADDING', (0, 3), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 3), (-1, -1), 6),
-        ]))
+        service_fee_table.setStyle(TABLE_STYLES['ServiceFee'])
         elements.append(service_fee_table)
         elements.append(Spacer(1, 0.25*inch))
     
-    # Grand Total: salary + employee PF + employer PF + miscellaneous + service fee
-    grand_total = total_salary + total_employee_pf + total_employer_pf + miscellaneous_cost + service_fee
-    grand_total_data = [
-        [
-            Paragraph("<b>GRAND TOTAL</b>", ParagraphStyle('GrandTotal', parent=styles['Normal'], 
-                fontSize=12, fontName='Helvetica-Bold', alignment=TA_LEFT)),
-            Paragraph(format_currency_inr(grand_total), ParagraphStyle('GrandTotalAmount', parent=styles['Normal'], 
-                fontSize=12, fontName='Helvetica-Bold', alignment=TA_RIGHT))
-        ]
-    ]
-    # Match the width of employee table for consistent alignment
-    grand_total_table = Table(grand_total_data, colWidths=[5.9*inch, 2.0*inch])
-    grand_total_table.setStyle(TableStyle([
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('LINEABOVE', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    elements.append(grand_total_table)
-    elements.append(Spacer(1, 0.4*inch))
+    elements.extend(_grand_total_elements("GRAND TOTAL", totals['grand_total']))
     
     # Payment instructions (left side)
     if invoice.notes:
-        payment_notes = Paragraph(
-            invoice.notes,
-            ParagraphStyle('PaymentNotes', parent=styles['Normal'], fontSize=9, 
-                          textColor=colors.black, alignment=TA_LEFT)
-        )
+        payment_notes = Paragraph(invoice.notes, styles['PaymentNotes'])
         elements.append(payment_notes)
         elements.append(Spacer(1, 0.2*inch))
     
+    elements.extend(_footer_elements())
+    return elements
+
+
+def _grand_total_elements(label, amount):
+    styles = PARAGRAPH_STYLES
+    grand_total_data = [
+        [
+            Paragraph(f"<b>{label}</b>", styles['GrandTotal']),
+            Paragraph(format_currency_inr(amount), styles['GrandTotalAmount'])
+        ]
+    ]
+    # Match the width of employee table for consistent alignment
+    grand_total_table = Table(grand_total_data, colWidths=[5.9*inch, 2.0*inch])
+    grand_total_table.setStyle(TABLE_STYLES['GrandTotal'])
+    return [grand_total_table, Spacer(1, 0.4*inch)]
+
+
+def _footer_elements():
+    styles = PARAGRAPH_STYLES
     # Footer - Thank you message (centered, bold)
-    elements.append(Spacer(1, 0.3*inch))
-    thank_you = Paragraph(
-        "<b>Thank you for your business!</b>",
-        ParagraphStyle('ThankYou', parent=styles['Normal'], fontSize=12, 
-                      fontName='Helvetica-Bold', textColor=colors.black, alignment=TA_CENTER)
-    )
+    elements = [Spacer(1, 0.3*inch)]
+    thank_you = Paragraph("<b>Thank you for your business!</b>", styles['ThankYou'])
     elements.append(thank_you)
     
     # Disclaimer (centered, small, italic)
     elements.append(Spacer(1, 0.2*inch))
     disclaimer = Paragraph(
         "<i>This is a computer-generated invoice. No signature required.</i>",
-        ParagraphStyle('Disclaimer', parent=styles['Normal'], fontSize=9, 
-                      textColor=colors.grey, alignment=TA_CENTER)
+        styles['Disclaimer']
     )
     elements.append(disclaimer)
+    return elements
+
+
+def _build_document(elements, output):
+    """Lay the flowables out on A4 into ``output`` (or a fresh spooled buffer)"""
+    if output is None:
+        output = tempfile.SpooledTemporaryFile(max_size=Config.PDF_SPOOL_MAX_BYTES, suffix='.pdf')
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(output, pagesize=A4,
+                           rightMargin=72, leftMargin=72,
+                           topMargin=72, bottomMargin=18)
     
     # Build PDF
     doc.build(elements)
     
-    return temp_file.name
+    output.seek(0)
+    return output
+
+
+def generate_pdf(invoice, lines, company_settings, output=None):
+    """Generate PDF from invoice data using ReportLab
+    
+    The PDF is written to ``output`` if given, otherwise to a spooled buffer
+    that stays in memory up to PDF_SPOOL_MAX_BYTES and only then spills to an
+    anonymous temp file. The returned file object is rewound to the start and
+    nothing is left on disk once it is closed.
+    """
+    logo_image = _load_logo(company_settings)
+    totals = calculate_invoice_totals(invoice, lines)
+    elements = _invoice_elements(invoice, totals, company_settings, logo_image)
+    return _build_document(elements, output)
 
+
+def generate_statement_pdf(consultancy, period_start, invoices, company_settings, output=None):
+    """Generate one statement PDF covering several invoices for a client/consultancy
+    
+    ``invoices`` is a list of (invoice, lines) pairs. The document opens
+    with a summary page totalling every invoice in the period, followed by
+    each invoice's full detail on its own pages. Everything is laid out in a
+    single document pass, sharing styles and one decoded logo image.
+    """
+    styles = PARAGRAPH_STYLES
+    logo_image = _load_logo(company_settings)
+    all_totals = [calculate_invoice_totals(invoice, lines) for invoice, lines in invoices]
+    
+    # Summary page
+    elements = _header_elements(company_settings, logo_image, [
+        "STATEMENT",
+        f"PERIOD: {period_start.strftime('%B %Y').upper()}",
+    ])
+    elements.extend(_to_elements(consultancy))
+    
+    summary_data = [['INVOICE NUMBER', 'DATE', 'INVOICE TO', 'EMPLOYEES', 'AMOUNT']]
+    statement_total = ZERO
+    for (invoice, lines), totals in zip(invoices, all_totals):
+        summary_data.append([
+            invoice.invoice_number,
+            invoice.invoice_date.strftime('%d %b %Y'),
+            Paragraph(invoice.invoice_to, styles['SummaryCell']),
+            str(len(lines)),
+            format_currency_inr(totals['grand_total'])
+        ])
+        statement_total += totals['grand_total']
+    summary_data.append(['TOTAL', '', '', str(sum(len(lines) for _, lines in invoices)),
+                         format_currency_inr(statement_total)])
+    
+    summary_table = Table(summary_data, colWidths=[1.7*inch, 1.0*inch, 2.9*inch, 0.9*inch, 1.4*inch],
+                          repeatRows=1)
+    summary_table.setStyle(TABLE_STYLES['StatementSummary'])
+    elements.append(summary_table)
+    elements.append(Spacer(1, 0.25*inch))
+    elements.extend(_grand_total_elements("STATEMENT TOTAL", statement_total))
+    elements.extend(_footer_elements())
+    
+    # One section per invoice, each starting on a fresh page
+    for (invoice, _), totals in zip(invoices, all_totals):
+        elements.append(PageBreak())
+        elements.extend(_invoice_elements(invoice, totals, company_settings, logo_image))
+    
+    return _build_document(elements, output)
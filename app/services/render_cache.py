@@ -0,0 +1,130 @@
+"""
+In-process caches for rendered invoices - PDF bytes and detail-page HTML.
+
+Invoices never change after creation, so a rendered invoice only depends on
+the invoice row, its line items and the company settings (address + logo).
+The cache key is a SHA-256 over exactly those inputs, which also makes it
+usable as a strong ETag: changing the settings - or, for invoices still
+shown from live employee rows, an employee - changes the key, so no worker
+can serve a stale render even if it never saw the edit.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from config import Config
+
+
+def _logo_fingerprint(path):
+    """Identify a logo file by path, size and mtime without reading it"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return f"{path}:missing"
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def invoice_render_key(invoice, lines, company_settings):
+    """Return a hex digest identifying the invoice rendered from these inputs"""
+    parts = [
+        invoice.id,
+        invoice.invoice_number,
+        invoice.invoice_date.isoformat() if invoice.invoice_date else None,
+        invoice.invoice_to,
+        invoice.client_consultancy,
+        invoice.miscellaneous_cost,
+        invoice.service_fee,
+        invoice.notes,
+    ]
+    for line in lines:
+        parts.extend([
+            line.position,
+            line.name,
+            bool(line.is_new_employee),
+            line.date_of_joining.isoformat() if line.date_of_joining else None,
+            line.salary_date,
+            str(line.pro_rated_salary),
+            str(line.employee_pf),
+            str(line.employer_pf),
+            str(line.total_cost),
+        ])
+
+    # Logo lookup mirrors generate_pdf: root logo.png first, then the uploaded one.
+    # Renditions are named by content hash, so their path identifies the image.
+    parts.append(company_settings.company_address)
+    parts.append(_logo_fingerprint(os.path.join(Config.BASE_DIR, 'logo.png')))
+    parts.append(company_settings.logo_pdf_path)
+    if company_settings.logo_path and not company_settings.logo_pdf_path:
+        parts.append(_logo_fingerprint(
+            os.path.join(Config.BASE_DIR, 'app', 'static', company_settings.logo_path)))
+
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def _byte_size(data):
+    """Bytes held by a render - text (including Markup) is counted as UTF-8, like the bytes it is sent as"""
+    return len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered bytes or text bounded by total size in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        # key -> (data, size in bytes)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, data):
+        size = _byte_size(data)
+        if size > self.max_bytes:
+            # Never let a single oversized render flush the whole cache
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (data, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._size
+
+
+pdf_cache = RenderCache(Config.PDF_CACHE_MAX_BYTES)
+html_fragment_cache = RenderCache(Config.HTML_FRAGMENT_CACHE_MAX_BYTES)
+
+
+def clear_render_caches():
+    """Drop this worker's renders after employees or settings change
+
+    The keys already make stale entries unreachable; this just frees the
+    memory they hold instead of waiting for LRU eviction.
+    """
+    pdf_cache.clear()
+    html_fragment_cache.clear()
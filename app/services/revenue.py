@@ -0,0 +1,144 @@
+"""
+Revenue summary behind the dashboard.
+
+revenue_summaries holds running totals per (invoice month, consultancy).
+Every path that inserts invoices calls record_invoices() before committing
+them, so the totals move in the same transaction and a rolled-back invoice
+never shows up in them. The dashboard then reads months x consultancies
+rows instead of aggregating the invoices table. rebuild_revenue_summary()
+recomputes everything from the invoices, for backfill or after fixing
+invoices by hand.
+"""
+from datetime import date
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import db
+from app.models.invoice import Invoice
+from app.models.invoice_line import InvoiceLine
+from app.models.revenue_summary import RevenueSummary
+from app.services.money import Money, ZERO
+
+summaries = RevenueSummary.__table__
+
+_COUNTERS = ('invoice_count', 'billed_total', 'service_fee_total', 'employees_billed')
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _summary_rows(invoices):
+    totals = {}
+    for invoice in invoices:
+        # Every invoice generated since consultancies became a table has one
+        if invoice.consultancy_id is None:
+            continue
+        key = (month_start(invoice.invoice_date), invoice.consultancy_id)
+        count, billed, service_fee, employees = totals.get(key, (0, ZERO, ZERO, 0))
+        totals[key] = (count + 1,
+                       billed + Money.from_decimal(invoice.total_monthly_payroll),
+                       service_fee + Money.from_decimal(invoice.service_fee),
+                       employees + len(invoice.lines))
+    return [
+        {'month': month, 'consultancy_id': consultancy_id, 'invoice_count': count,
+         'billed_total': billed.to_decimal(), 'service_fee_total': service_fee.to_decimal(),
+         'employees_billed': employees}
+        for (month, consultancy_id), (count, billed, service_fee, employees) in totals.items()
+    ]
+
+
+def record_invoices(invoices):
+    """Add new invoices (with their lines) to the summary in the current transaction
+
+    Call it before committing the invoices. One upsert per batch; concurrent
+    workers updating the same month and consultancy queue on the row lock.
+    """
+    rows = _summary_rows(invoices)
+    if not rows:
+        return
+    insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    statement = insert(summaries)
+    statement = statement.on_conflict_do_update(
+        index_elements=[summaries.c.month, summaries.c.consultancy_id],
+        set_={column: summaries.c[column] + statement.excluded[column] for column in _COUNTERS}
+    )
+    db.session.execute(statement, rows)
+
+
+def _month_expression():
+    if db.engine.dialect.name == 'postgresql':
+        return db.cast(db.func.date_trunc('month', Invoice.invoice_date), db.Date)
+    return db.func.date(Invoice.invoice_date, 'start of month', type_=db.Date)
+
+
+def rebuild_revenue_summary():
+    """Recompute the whole summary from the invoices table and commit; returns the number of rows"""
+    if db.engine.dialect.name == 'postgresql':
+        # Invoices committed while this runs wait for it, then add themselves on top
+        db.session.execute(db.text(f"LOCK TABLE {summaries.name} IN EXCLUSIVE MODE"))
+    # Delete first: on SQLite that takes the write lock before the invoices are read
+    db.session.execute(summaries.delete())
+    
+    line_counts = db.select(
+        InvoiceLine.invoice_id, db.func.count().label('lines')
+    ).group_by(InvoiceLine.invoice_id).subquery()
+    month = _month_expression()
+    totals = db.select(
+        month,
+        Invoice.consultancy_id,
+        db.func.count(Invoice.id),
+        db.func.round(db.func.sum(Invoice.total_monthly_payroll), 2),
+        db.func.round(db.func.sum(Invoice.service_fee), 2),
+        db.func.coalesce(db.func.sum(line_counts.c.lines), 0)
+    ).outerjoin(
+        line_counts, line_counts.c.invoice_id == Invoice.id
+    ).where(
+        Invoice.consultancy_id.isnot(None)
+    ).group_by(month, Invoice.consultancy_id)
+    db.session.execute(summaries.insert().from_select(['month', 'consultancy_id', *_COUNTERS], totals))
+    db.session.commit()
+    return db.session.query(RevenueSummary).count()
+
+
+def revenue_overview(months):
+    """Totals for the last `months` invoice months, for the dashboard
+
+    Returns {'months': [...], 'consultancies': [...]}: one entry per month,
+    oldest first, with invoice_count, billed_total, service_fee_total and
+    employees_billed; and one entry per consultancy billed in that window,
+    largest first, with its billed_total and billed amount per month.
+    """
+    today = date.today()
+    first_year, first_month = divmod(today.year * 12 + today.month - 1 - (months - 1), 12)
+    since = date(first_year, first_month + 1, 1)
+    
+    month_keys = []
+    year, month = since.year, since.month
+    for _ in range(months):
+        month_keys.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    
+    by_month = {key: {'month': key, 'invoice_count': 0, 'billed_total': ZERO,
+                      'service_fee_total': ZERO, 'employees_billed': 0} for key in month_keys}
+    by_consultancy = {}
+    rows = RevenueSummary.query.options(db.joinedload(RevenueSummary.consultancy)).filter(
+        RevenueSummary.month >= since
+    ).all()
+    for row in rows:
+        billed = Money.from_decimal(row.billed_total)
+        totals = by_month.get(row.month)
+        if totals is None:  # Invoices dated in the future
+            continue
+        totals['invoice_count'] += row.invoice_count
+        totals['billed_total'] += billed
+        totals['service_fee_total'] += Money.from_decimal(row.service_fee_total)
+        totals['employees_billed'] += row.employees_billed
+        
+        consultancy = by_consultancy.setdefault(row.consultancy_id, {
+            'id': row.consultancy_id, 'name': row.consultancy.name, 'billed_total': ZERO, 'by_month': {}})
+        consultancy['billed_total'] += billed
+        consultancy['by_month'][row.month] = billed
+    
+    return {
+        'months': [by_month[key] for key in month_keys],
+        'consultancies': sorted(by_consultancy.values(), key=lambda c: (-c['billed_total'].paise, c['name'])),
+    }
@@ -0,0 +1,24 @@
+"""
+Worker warmup.
+
+Does the work a worker would otherwise do on its first requests: imports
+the PDF renderer (ReportLab, Pillow and the paragraph and table styles it
+builds at import), makes the PDF rendition of the root logo.png and
+compiles every template, loading it from the bytecode cache when an
+earlier process already compiled it. It never touches the database, so
+it is safe to run in the gunicorn master before workers are forked - see
+gunicorn.conf.py.
+"""
+import importlib
+import time
+
+
+def warmup(app):
+    """Prime the PDF renderer and templates for app; returns the seconds it took"""
+    start = time.perf_counter()
+    importlib.import_module('app.services.pdf_service')
+    from app.services.logo_service import prepare_root_logo
+    prepare_root_logo()
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    return time.perf_counter() - start
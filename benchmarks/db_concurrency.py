@@ -0,0 +1,191 @@
+"""
+Concurrent invoice generation against each database engine configuration.
+
+For every configuration, seeds older invoices, then starts writer processes
+that POST to /invoices/generate and reader processes that page through the
+invoice history, stream all of it (holding a read cursor open the whole
+time), search it and load the dashboard, all at the same moment and each
+with its own app and connections like gunicorn workers. Reports throughput,
+latency and failed requests ("database is locked" and the like) per
+configuration.
+
+SQLite runs each configuration on a fresh file and compares the old
+defaults (rollback journal, synchronous=FULL, the driver's 5 s busy
+timeout) with the WAL settings. With --scratch-db pointing at an empty
+PostgreSQL database it compares pool settings instead, dropping and
+recreating the schema there between configurations. DATABASE_URL is never
+used, so the benchmark can't touch real data.
+
+    python -m benchmarks.db_concurrency [--writers 4] [--readers 4] [--requests 50] [--seed 2000] [--scratch-db URL]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+SQLITE_CONFIGURATIONS = [
+    ('rollback journal', {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+                          'SQLITE_BUSY_TIMEOUT_MS': '5000'}),
+    ('wal, synchronous=full', {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'FULL'}),
+    ('wal (default)', {}),
+]
+
+POSTGRES_CONFIGURATIONS = [
+    ('pool 1, no overflow', {'DB_POOL_SIZE': '1', 'DB_MAX_OVERFLOW': '0', 'DB_POOL_PRE_PING': '0'}),
+    ('pool 5+10, no pre-ping', {'DB_POOL_PRE_PING': '0'}),
+    ('pool 5+10, pre-ping (default)', {}),
+]
+
+READ_URLS = ['/invoices/history', '/invoices/history?all=1', '/invoices/api/search?q=stress', '/']
+
+
+def _setup(seed, reset, results):
+    from wsgi import create_app
+    from app.migrations import upgrade
+    from app.models import db
+    from app.models.employee import Employee
+    from app.models.invoice import Invoice
+    from app.services.consultancies import get_or_create_consultancy
+    from app.services.invoice_search import FTS_TABLE
+    from app.services.revenue import rebuild_revenue_summary
+    from datetime import date, timedelta
+
+    app = create_app()
+    with app.app_context():
+        if reset:
+            # Only ever the scratch database, found empty before the first configuration
+            db.drop_all()
+            if db.engine.dialect.name == 'sqlite':
+                db.session.execute(db.text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+                db.session.commit()
+            upgrade(log=lambda line: None)
+        if db.session.query(Invoice.id).first() is not None:
+            results.put(None)
+            return
+        consultancy = get_or_create_consultancy("Stress Consultancy")
+        employees = [Employee(name=f"Stress {i}", salary_per_annum=600000, salary_per_month=50000,
+                              client_consultancy=consultancy.name, consultancy=consultancy, salary_date=1)
+                     for i in range(5)]
+        db.session.add_all(employees)
+        db.session.commit()
+        
+        # History for the readers: invoices dated before today, numbered apart from the day's sequence
+        seed_date = date.today() - timedelta(days=1)
+        db.session.execute(db.insert(Invoice), [{
+            'invoice_number': f"STRESS-{seed_date:%Y%m%d}-{i:06d}", 'invoice_date': seed_date,
+            'invoice_to': 'Stress Client', 'client_consultancy': consultancy.name, 'consultancy_id': consultancy.id,
+            'employee_ids': '[]', 'total_monthly_payroll': 50000, 'total_annual_payroll': 600000,
+            'notes': f'Seeded stress invoice {i}'
+        } for i in range(seed)])
+        db.session.commit()
+        rebuild_revenue_summary()
+        results.put((consultancy.id, [employee.id for employee in employees]))
+
+
+def _worker(role, worker, consultancy_id, employee_ids, count, barrier, results):
+    from wsgi import create_app
+    app = create_app()
+    client = app.test_client()
+    form = {'consultancy_id': str(consultancy_id), 'invoice_to': 'Stress Client',
+            'employee_ids': [str(employee_id) for employee_id in employee_ids]}
+    latencies = []
+    failures = 0
+    barrier.wait()
+    for i in range(count):
+        start = time.perf_counter()
+        if role == 'write':
+            # A distinct miscellaneous cost per request, so none is a duplicate of another
+            form['miscellaneous_cost'] = f"{worker * count + i}.00"
+            response = client.post('/invoices/generate', data=form)
+            ok = '/invoices/view/' in response.headers.get('Location', '')
+        else:
+            response = client.get(READ_URLS[i % len(READ_URLS)])
+            ok = response.status_code == 200
+        latencies.append(time.perf_counter() - start)
+        failures += not ok
+    results.put((role, latencies, failures))
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+def run_configuration(name, env, args, reset=False):
+    os.environ.update(env)
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    # Set up in a child too, so it sees this configuration's environment
+    setup = context.Process(target=_setup, args=(args.seed, reset, results))
+    setup.start()
+    created = results.get()
+    setup.join()
+    if created is None:
+        for key in env:
+            del os.environ[key]
+        raise ValueError(f"{env['DATABASE_URL']} already has invoices; use an empty scratch database")
+    consultancy_id, employee_ids = created
+
+    roles = ['write'] * args.writers + ['read'] * args.readers
+    barrier = context.Barrier(len(roles) + 1)
+    processes = [context.Process(target=_worker, args=(role, worker, consultancy_id, employee_ids,
+                                                      args.requests, barrier, results))
+                 for worker, role in enumerate(roles)]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    start = time.perf_counter()
+    outcomes = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    for key in env:
+        del os.environ[key]
+
+    for role in ('write', 'read'):
+        role_outcomes = [(values, failed) for outcome_role, values, failed in outcomes if outcome_role == role]
+        if not role_outcomes:
+            continue
+        latencies = [latency for values, _ in role_outcomes for latency in values]
+        failures = sum(failed for _, failed in role_outcomes)
+        # Until the role's slowest process finished
+        role_elapsed = max(sum(values) for values, _ in role_outcomes)
+        print(f"{name:<30} {role:<5} {len(latencies) / role_elapsed:7.1f} req/s  "
+                  f"p50={_percentile(latencies, 0.5) * 1000:7.1f} ms  p95={_percentile(latencies, 0.95) * 1000:7.1f} ms  "
+                  f"failed={failures}")
+    print(f"{name:<30} total {len(roles) * args.requests / elapsed:7.1f} req/s")
+    return sum(failed for _, _, failed in outcomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help='requests per process')
+    parser.add_argument('--seed', type=int, default=2000, help='older invoices created before the run')
+    parser.add_argument('--scratch-db', help='empty PostgreSQL database URL to compare pool settings on')
+    args = parser.parse_args()
+
+    if args.scratch_db:
+        configurations = [(name, {**env, 'DATABASE_URL': args.scratch_db}) for name, env in POSTGRES_CONFIGURATIONS]
+    else:
+        directory = tempfile.mkdtemp()
+        configurations = [(name, {**env, 'DATABASE_URL': 'sqlite:///' + os.path.join(directory, f'concurrency{i}.db')})
+                          for i, (name, env) in enumerate(SQLITE_CONFIGURATIONS)]
+    os.environ.pop('DATABASE_URL', None)
+
+    failed = 0
+    for i, (name, env) in enumerate(configurations):
+        try:
+            # The scratch database is checked empty once, then reset between configurations
+            failed += run_configuration(name, env, args, reset=bool(args.scratch_db) and i > 0)
+        except ValueError as e:
+            sys.exit(f"FAIL: {e}")
+    if failed:
+        print(f"{failed} request(s) failed", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Shared helpers for running benchmark cases in isolated child processes
+"""
+import multiprocessing
+import resource
+import traceback
+
+
+def _child(func, args, conn):
+    try:
+        result = func(*args)
+        # ru_maxrss is in KiB on Linux
+        result['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        conn.send((True, result))
+    except Exception:
+        conn.send((False, traceback.format_exc()))
+
+
+def measure_in_child(func, *args):
+    """Run ``func(*args)`` in a forked child and return its result dict plus peak RSS
+
+    Forking means each case starts from the parent's warmed-up state, and the
+    peak RSS reading covers that case alone instead of the high-water mark of
+    every case run so far.
+    """
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.get_context('fork').Process(target=_child, args=(func, args, child_conn))
+    process.start()
+    ok, result = parent_conn.recv()
+    process.join()
+    if not ok:
+        raise RuntimeError(f"benchmark case failed in child process:\n{result}")
+    return result
+
+
+def current_peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,147 @@
+"""
+Multi-process stress test for invoice number allocation.
+
+Starts several worker processes that all POST to /invoices/generate at the
+same moment, each with its own app and database connections like gunicorn
+workers, then checks that every invoice got a distinct number and that the
+day's numbers run 001..N with no gaps. Runs against a fresh SQLite file, or
+against --scratch-db (e.g. a scratch PostgreSQL database), which must hold
+no invoices - DATABASE_URL is never used, so it can't touch real data.
+tests/test_invoice_numbers.py runs a small version of it.
+
+    python -m benchmarks.invoice_numbers [--workers 8] [--invoices 50] [--scratch-db URL]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+
+def _setup(results):
+    from wsgi import create_app
+    from app.models import db
+    from app.models.employee import Employee
+    from app.models.invoice import Invoice
+    from app.services.consultancies import get_or_create_consultancy
+
+    app = create_app()
+    with app.app_context():
+        if db.session.query(Invoice.id).first() is not None:
+            results.put(None)
+            return
+        consultancy = get_or_create_consultancy("Stress Consultancy")
+        employee = Employee(name="Stress Test", salary_per_annum=600000, salary_per_month=50000,
+                            client_consultancy=consultancy.name, consultancy=consultancy, salary_date=1)
+        db.session.add(employee)
+        db.session.commit()
+        results.put(employee.id)
+
+
+def _worker(worker, employee_id, count, barrier, results):
+    from wsgi import create_app
+    app = create_app()
+    client = app.test_client()
+    form = {'client_consultancy': 'Stress Consultancy', 'invoice_to': 'Stress Client',
+            'employee_ids': [str(employee_id)]}
+    barrier.wait()
+    failures = 0
+    for i in range(count):
+        # A distinct miscellaneous cost per request, so none is a duplicate of another
+        form['miscellaneous_cost'] = f"{worker * count + i}.00"
+        response = client.post('/invoices/generate', data=form)
+        if '/invoices/view/' not in response.headers.get('Location', ''):
+            failures += 1
+    results.put(failures)
+
+
+def _check(expected, results):
+    from wsgi import create_app
+    from app.models.invoice import Invoice
+
+    app = create_app()
+    with app.app_context():
+        prefix = f"INV-{date.today().strftime('%Y%m%d')}-"
+        numbers = [number for (number,) in Invoice.query.with_entities(Invoice.invoice_number)
+                   .filter(Invoice.invoice_number.like(f"{prefix}%"))]
+    suffixes = sorted(int(number[len(prefix):]) for number in numbers)
+    problems = []
+    if len(numbers) != expected:
+        problems.append(f"expected {expected} invoices, found {len(numbers)}")
+    if len(set(numbers)) != len(numbers):
+        problems.append(f"{len(numbers) - len(set(numbers))} duplicate invoice numbers")
+    if suffixes != list(range(1, len(suffixes) + 1)):
+        missing = sorted(set(range(1, max(suffixes, default=0) + 1)) - set(suffixes))
+        problems.append(f"numbers are not 1..{len(suffixes)}; missing {missing[:20]}")
+    results.put(problems)
+
+
+def run_stress(database_url, workers, invoices):
+    """Run the stress test against an empty database; returns (failed requests, problems, seconds)
+
+    Every step runs in its own process, so each app reads database_url from
+    the environment when it is imported.
+    """
+    previous_url = os.environ.get('DATABASE_URL')
+    os.environ['DATABASE_URL'] = database_url
+    try:
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        setup = context.Process(target=_setup, args=(results,))
+        setup.start()
+        employee_id = results.get()
+        setup.join()
+        if employee_id is None:
+            raise ValueError(f"{database_url} already has invoices; use an empty scratch database")
+
+        barrier = context.Barrier(workers + 1)
+        processes = [context.Process(target=_worker, args=(worker, employee_id, invoices, barrier, results))
+                     for worker in range(workers)]
+        for process in processes:
+            process.start()
+        barrier.wait()
+        start = time.perf_counter()
+        failures = sum(results.get() for _ in processes)
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+        check = context.Process(target=_check, args=(workers * invoices - failures, results))
+        check.start()
+        problems = results.get()
+        check.join()
+        return failures, problems, elapsed
+    finally:
+        if previous_url is None:
+            del os.environ['DATABASE_URL']
+        else:
+            os.environ['DATABASE_URL'] = previous_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--invoices', type=int, default=50, help='invoices generated per worker')
+    parser.add_argument('--scratch-db', help='empty database URL to use instead of a fresh SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.scratch_db or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'stress.db')
+    try:
+        failures, problems, elapsed = run_stress(database_url, args.workers, args.invoices)
+    except ValueError as e:
+        sys.exit(f"FAIL: {e}")
+
+    total = args.workers * args.invoices
+    print(f"workers={args.workers} invoices={total} failed={failures} "
+          f"elapsed={elapsed:.2f}s ({total / elapsed:.0f} invoices/s)")
+    for problem in problems:
+        print(f"FAIL: {problem}", file=sys.stderr)
+    if failures or problems:
+        sys.exit(1)
+    print("OK: no duplicate or missing invoice numbers")
+
+
+if __name__ == '__main__':
+    main()
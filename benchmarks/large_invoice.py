@@ -0,0 +1,52 @@
+"""
+Render time and peak memory of generate_pdf as the employee count grows.
+
+Runs each size with the standard layout and with the large-invoice layout
+(lightweight name cells, page-by-page employee table).
+
+    python -m benchmarks.large_invoice [--sizes 100 1000 5000]
+"""
+import argparse
+import time
+from config import Config
+from app.services.pdf_service import generate_pdf
+from benchmarks.harness import measure_in_child, current_peak_rss
+from benchmarks.synthetic import make_employees, make_invoice, make_company_settings
+
+
+def _measure(employees, large_invoice):
+    invoice = make_invoice(employees)
+    settings = make_company_settings()
+    # Force the layout either way regardless of the configured threshold
+    Config.PDF_LARGE_INVOICE_ROWS = 0 if large_invoice else len(employees)
+    start = time.perf_counter()
+    output = generate_pdf(invoice, invoice.lines, settings)
+    elapsed = time.perf_counter() - start
+    size = output.seek(0, 2)
+    output.close()
+    return {'elapsed': elapsed, 'size': size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    # Warm up font metrics and the logo in the parent so children inherit them
+    warmup = make_invoice(make_employees(5))
+    generate_pdf(warmup, warmup.lines, make_company_settings()).close()
+    print(f"baseline RSS after warm-up: {current_peak_rss() / 2**20:.1f} MiB")
+
+    print(f"{'employees':>9}  {'layout':>8}  {'time (s)':>9}  {'ms/row':>7}  {'peak RSS MiB':>12}  {'PDF KiB':>8}")
+    for count in args.sizes:
+        employees = make_employees(count)
+        for large_invoice in (False, True):
+            result = measure_in_child(_measure, employees, large_invoice)
+            elapsed, peak, size = result['elapsed'], result['peak_rss_bytes'], result['size']
+            layout = 'large' if large_invoice else 'standard'
+            print(f"{count:>9}  {layout:>8}  {elapsed:>9.2f}  {elapsed * 1000 / count:>7.2f}  "
+                  f"{peak / 2**20:>12.1f}  {size / 1024:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark for calculate_batch_totals against calculate_employee_totals.
+
+Times both paths on synthetic invoices. That they give identical results
+is checked by tests/test_calculations.py.
+
+    python -m benchmarks.payroll_batch [--employees 100 1000 5000] [--repeats 5]
+"""
+import argparse
+import time
+from datetime import date
+from app.services.calculations import calculate_batch_totals, calculate_employee_totals
+from benchmarks.synthetic import make_employees
+
+
+def _best_of(repeats, func, *args):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _scalar(employees, invoice_date):
+    return [calculate_employee_totals(emp, invoice_date) for emp in employees]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--employees', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    invoice_date = date(2026, 10, 18)
+    for count in args.employees:
+        employees = make_employees(count, invoice_date)
+        scalar = _best_of(args.repeats, _scalar, employees, invoice_date)
+        batch = _best_of(args.repeats, calculate_batch_totals, employees, invoice_date)
+        print(f"employees={count:<6} scalar={scalar * 1000:8.2f} ms  batch={batch * 1000:8.2f} ms  "
+              f"speedup={scalar / batch:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark suite for generate_pdf over synthetic invoices.
+
+Each case varies employee count, logo present/absent, service fee on/off and
+short/long notes, runs in its own forked child, and records wall time, peak
+RSS and output size. Results are written as JSON so runs from different
+versions can be compared.
+
+    python -m benchmarks.pdf_render [--employees 1 10 100 1000] [--repeats 3] [--output results.json]
+    python -m benchmarks.pdf_render --compare before.json after.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import reportlab
+from config import Config
+from app.services.logo_service import prepare_root_logo
+from app.services.pdf_service import generate_pdf
+from benchmarks.harness import measure_in_child
+from benchmarks.synthetic import make_employees, make_invoice, make_company_settings
+
+LONG_NOTES = " ".join(
+    ["Payment is due within 15 days of the invoice date by NEFT/RTGS to the account on file. "
+     "Please quote the invoice number as the payment reference."] * 30
+)
+
+
+def _run_case(case, repeats, base_dir):
+    # Only the child sees this - it points the logo lookup at a prepared directory
+    Config.BASE_DIR = base_dir
+    # As migrate.py and the worker warmup do, so the logo cases embed the PDF rendition
+    prepare_root_logo()
+    employees = make_employees(case['employees'])
+    invoice = make_invoice(employees, service_fee=case['service_fee'],
+                           notes=LONG_NOTES if case['long_notes'] else "Thank you.")
+    settings = make_company_settings()
+
+    times = []
+    size = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = generate_pdf(invoice, invoice.lines, settings)
+        times.append(time.perf_counter() - start)
+        size = output.seek(0, 2)
+        output.close()
+    return {
+        'wall_time_s': {
+            'min': min(times),
+            'median': statistics.median(times),
+            'max': max(times),
+        },
+        'output_bytes': size,
+    }
+
+
+def _case_key(case):
+    return (case['employees'], case['logo'], case['service_fee'], case['long_notes'])
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=Config.BASE_DIR, stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(employee_counts, repeats):
+    logo_source = os.path.join(Config.BASE_DIR, 'logo.png')
+    with tempfile.TemporaryDirectory() as no_logo_dir, tempfile.TemporaryDirectory() as logo_dir:
+        logo_options = [False]
+        if os.path.exists(logo_source):
+            shutil.copy(logo_source, os.path.join(logo_dir, 'logo.png'))
+            logo_options.append(True)
+        else:
+            print("logo.png not found - skipping logo cases", file=sys.stderr)
+
+        # Warm up fonts and imports in the parent so every child inherits them
+        warmup = make_invoice(make_employees(1))
+        generate_pdf(warmup, warmup.lines, make_company_settings()).close()
+
+        results = []
+        for employees, logo, service_fee, long_notes in itertools.product(
+                employee_counts, logo_options, (False, True), (False, True)):
+            case = {'employees': employees, 'logo': logo, 'service_fee': service_fee, 'long_notes': long_notes}
+            metrics = measure_in_child(_run_case, case, repeats, logo_dir if logo else no_logo_dir)
+            results.append({**case, **metrics})
+            print(f"employees={employees:<5} logo={logo!s:<5} fee={service_fee!s:<5} notes={'long' if long_notes else 'short':<5} "
+                  f"median={metrics['wall_time_s']['median'] * 1000:8.1f} ms  "
+                  f"rss={metrics['peak_rss_bytes'] / 2**20:6.1f} MiB  size={metrics['output_bytes'] / 1024:7.1f} KiB")
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'reportlab': reportlab.Version,
+            'platform': platform.platform(),
+            'repeats': repeats,
+        },
+        'results': results,
+    }
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    previous = {_case_key(r): r for r in before['results']}
+
+    print(f"{before['meta'].get('git_revision')} -> {after['meta'].get('git_revision')}")
+    print(f"{'case':<40} {'median ms':>20} {'peak RSS MiB':>18} {'size KiB':>18}")
+    for result in after['results']:
+        old = previous.get(_case_key(result))
+        if old is None:
+            continue
+        label = (f"n={result['employees']} logo={int(result['logo'])} "
+                 f"fee={int(result['service_fee'])} notes={'long' if result['long_notes'] else 'short'}")
+        old_ms, new_ms = old['wall_time_s']['median'] * 1000, result['wall_time_s']['median'] * 1000
+        print(f"{label:<40} {old_ms:>8.1f} -> {new_ms:>8.1f} "
+              f"{old['peak_rss_bytes'] / 2**20:>7.1f} -> {result['peak_rss_bytes'] / 2**20:>7.1f} "
+              f"{old['output_bytes'] / 1024:>7.1f} -> {result['output_bytes'] / 1024:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--employees', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', '-o', help='Write results as JSON to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='Compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args.employees, args.repeats)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
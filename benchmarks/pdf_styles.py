@@ -0,0 +1,63 @@
+"""
+Micro-benchmark for the pdf_service style registry.
+
+Compares per-invoice render time using the shared, prebuilt styles against
+rebuilding the style sheet and table styles on every call (the old behaviour).
+
+    python -m benchmarks.pdf_styles [--invoices 200] [--employees 5]
+"""
+import argparse
+import time
+from app.services import pdf_service
+from benchmarks.synthetic import make_employees, make_invoice, make_company_settings
+
+
+def _render(invoice, employees, settings, rebuild_styles):
+    if rebuild_styles:
+        pdf_service._build_paragraph_styles()
+        pdf_service._build_table_styles()
+    pdf_service.generate_pdf(invoice, invoice.lines, settings).close()
+
+
+def _time_per_invoice(count, invoice, employees, settings):
+    """Return (rebuilt, shared) seconds per invoice, interleaving runs to cancel drift"""
+    totals = {True: 0.0, False: 0.0}
+    for _ in range(count):
+        for rebuild_styles in (True, False):
+            start = time.perf_counter()
+            _render(invoice, employees, settings, rebuild_styles)
+            totals[rebuild_styles] += time.perf_counter() - start
+    return totals[True] / count, totals[False] / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--invoices', type=int, default=200)
+    parser.add_argument('--employees', type=int, default=5)
+    args = parser.parse_args()
+
+    employees = make_employees(args.employees)
+    invoice = make_invoice(employees)
+    settings = make_company_settings()
+
+    # Warm up imports, font metrics and the logo decode path
+    for rebuild in (True, False):
+        _render(invoice, employees, settings, rebuild)
+
+    setup_start = time.perf_counter()
+    for _ in range(args.invoices):
+        pdf_service._build_paragraph_styles()
+        pdf_service._build_table_styles()
+    setup = (time.perf_counter() - setup_start) / args.invoices
+
+    before, after = _time_per_invoice(args.invoices, invoice, employees, settings)
+
+    print(f"invoices: {args.invoices}, employees per invoice: {args.employees}")
+    print(f"style setup per call:        {setup * 1000:8.3f} ms")
+    print(f"render, styles rebuilt:      {before * 1000:8.3f} ms/invoice")
+    print(f"render, shared registry:     {after * 1000:8.3f} ms/invoice")
+    print(f"saved:                       {(before - after) * 1000:8.3f} ms/invoice ({(1 - after / before) * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
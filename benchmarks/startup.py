@@ -0,0 +1,138 @@
+"""
+Worker startup time: importing the app, warming it up and its first requests.
+
+Every case runs in fresh processes, the way gunicorn starts a worker, against
+a scratch SQLite database holding one invoice. A case times `import wsgi`
+(which creates the app), the warmup from app/warmup.py when the case uses
+it, and then the first request to the dashboard, the invoice history, an
+invoice and its PDF - the ones that pay for compiling templates and
+importing ReportLab when nothing was warmed up. The template bytecode
+cache is either empty (first boot after a deploy) or filled by an earlier
+process (any later worker). The preloaded case imports and warms up once,
+then forks the worker like gunicorn's preload_app does and times only the
+fork and the child's requests. Each figure is the median of the runs.
+
+    python -m benchmarks.startup [--runs 5]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+FIRST_REQUESTS = [('dashboard', '/'), ('history', '/invoices/history'),
+                  ('view', '/invoices/view/{id}'), ('pdf', '/invoices/pdf/{id}')]
+
+CASES = [
+    ('no warmup, empty template cache', {'warmup': False, 'cache': 'empty'}),
+    ('no warmup, filled template cache', {'warmup': False, 'cache': 'filled'}),
+    ('warmup, empty template cache', {'warmup': True, 'cache': 'empty'}),
+    ('warmup, filled template cache', {'warmup': True, 'cache': 'filled'}),
+    ('preloaded master, forked worker', {'warmup': True, 'cache': 'filled', 'fork': True}),
+]
+
+
+def _setup(results):
+    from wsgi import create_app
+    from app.models.employee import Employee
+    from app.models import db
+    from app.services.consultancies import get_or_create_consultancy
+    from app.warmup import warmup
+
+    app = create_app()
+    with app.app_context():
+        consultancy = get_or_create_consultancy("Startup Consultancy")
+        employees = [Employee(name=f"Startup {i}", salary_per_annum=600000, salary_per_month=50000,
+                              client_consultancy=consultancy.name, consultancy=consultancy, salary_date=1)
+                     for i in range(5)]
+        db.session.add_all(employees)
+        db.session.commit()
+        form = {'consultancy_id': str(consultancy.id), 'invoice_to': 'Startup Client',
+                'employee_ids': [str(employee.id) for employee in employees]}
+    response = app.test_client().post('/invoices/generate', data=form)
+    # Fill the shared template cache for the "filled" cases
+    warmup(app)
+    results.put(int(response.headers['Location'].rstrip('/').rsplit('/', 1)[-1]))
+
+
+def _first_requests(app, invoice_id):
+    client = app.test_client()
+    timings = {}
+    for name, url in FIRST_REQUESTS:
+        start = time.perf_counter()
+        response = client.get(url.format(id=invoice_id))
+        timings[name] = time.perf_counter() - start
+        assert response.status_code == 200, (url, response.status_code)
+    return timings
+
+
+def _forked_worker(app, invoice_id, forked_at, results):
+    timings = {'fork': time.monotonic() - forked_at}
+    timings.update(_first_requests(app, invoice_id))
+    results.put(timings)
+
+
+def _run_case(options, invoice_id, results):
+    from app.warmup import warmup
+
+    timings = {}
+    start = time.perf_counter()
+    from wsgi import app
+    timings['import'] = time.perf_counter() - start
+    if options['warmup']:
+        timings['warmup'] = warmup(app)
+    if options.get('fork'):
+        # Only the worker's share counts: the master does the above once
+        child_results = multiprocessing.get_context('fork').Queue()
+        worker = multiprocessing.get_context('fork').Process(
+            target=_forked_worker, args=(app, invoice_id, time.monotonic(), child_results))
+        worker.start()
+        timings = child_results.get()
+        worker.join()
+    else:
+        timings.update(_first_requests(app, invoice_id))
+    results.put(timings)
+
+
+def run_case(name, options, invoice_id, filled_cache, args):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    runs = []
+    for _ in range(args.runs):
+        os.environ['JINJA_BYTECODE_CACHE_DIR'] = filled_cache if options['cache'] == 'filled' else tempfile.mkdtemp()
+        process = context.Process(target=_run_case, args=(options, invoice_id, results))
+        process.start()
+        runs.append(results.get())
+        process.join()
+
+    medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+    # From starting the worker to its first response from every page
+    total = sum(medians.values())
+    steps = "  ".join(f"{key}={value * 1000:6.1f}" for key, value in medians.items())
+    print(f"{name:<34} {steps}  total={total * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per case')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'startup.db')
+    filled_cache = os.environ['JINJA_BYTECODE_CACHE_DIR'] = os.path.join(directory, 'jinja-cache')
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    setup = context.Process(target=_setup, args=(results,))
+    setup.start()
+    invoice_id = results.get()
+    setup.join()
+
+    # Workers start on a migrated database, as after migrate.py
+    os.environ['MIGRATE_ON_START'] = '0'
+    for name, options in CASES:
+        run_case(name, options, invoice_id, filled_cache, args)
+
+
+if __name__ == '__main__':
+    main()
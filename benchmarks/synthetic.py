@@ -0,0 +1,59 @@
+"""
+Synthetic invoice data for benchmarks - plain model instances, no database
+"""
+from datetime import date
+from decimal import Decimal
+from app.models.employee import Employee
+from app.models.invoice import Invoice
+from app.models.company_settings import CompanySettings
+from app.services.invoice_lines import build_invoice_lines
+
+
+def make_employees(count, invoice_date=date(2026, 10, 18)):
+    """Build employees with a realistic mix of new joiners and salary dates"""
+    employees = []
+    for i in range(count):
+        salary_per_annum = Decimal(480000 + (i * 7919) % 1500000)
+        is_new = i % 7 == 0
+        employees.append(Employee(
+            id=i + 1,
+            name=f"Contractor {i + 1:05d}",
+            salary_per_annum=salary_per_annum,
+            salary_per_month=(salary_per_annum / 12).quantize(Decimal('0.01')),
+            client_consultancy="Synthetic Consultancy",
+            is_new_employee=is_new,
+            date_of_joining=invoice_date.replace(day=1 + i % 28) if is_new else None,
+            salary_date=1 + i % 28,
+        ))
+    return employees
+
+
+def make_invoice(employees, service_fee=True, miscellaneous_cost=Decimal('0'), notes=None,
+                 invoice_date=date(2026, 10, 18)):
+    """Build an invoice and its line items for the given employees, with the service fee computed like generate_invoice"""
+    fee = Decimal('0')
+    if service_fee:
+        fee = (Decimal('6250') * len(employees) * Decimal('1.18')).quantize(Decimal('0.01'))
+    return Invoice(
+        id=1,
+        invoice_number=f"INV-{invoice_date.strftime('%Y%m%d')}-001",
+        invoice_date=invoice_date,
+        invoice_to="Synthetic Client Pvt Ltd",
+        client_consultancy="Synthetic Consultancy",
+        employee_ids='[]',
+        total_monthly_payroll=Decimal('0'),
+        total_annual_payroll=Decimal('0'),
+        miscellaneous_cost=miscellaneous_cost,
+        service_fee=fee,
+        notes=notes,
+        lines=build_invoice_lines(employees, invoice_date),
+    )
+
+
+def make_company_settings(logo_path=None):
+    return CompanySettings(
+        id=1,
+        company_name="TRUEZEN TECHNOLOGIES",
+        company_address="Nyanapahalli Main Rd, Maruthi Layout\nBengaluru, Karnataka 560068",
+        logo_path=logo_path,
+    )
@@ -4,5 +4,43 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///invoices.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Run pending schema migrations when the app starts. Deploys that run
+    # migrate.py first can turn this off so workers never touch the schema
+    MIGRATE_ON_START = (os.environ.get('MIGRATE_ON_START') or '1') != '0'
+    # SQLite, applied to every connection (see app/models/engine.py): WAL lets readers and the
+    # writer run side by side, busy timeout is how long a writer waits for the lock before
+    # "database is locked", and NORMAL only fsyncs at WAL checkpoints
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 15000)
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    # PostgreSQL connection pool per worker process; recycle is in seconds
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 10)
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)
+    DB_POOL_PRE_PING = (os.environ.get('DB_POOL_PRE_PING') or '1') != '0'
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-
+    # Upper bound on rendered PDF bytes kept in memory per worker
+    PDF_CACHE_MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_BYTES') or 64 * 1024 * 1024)
+    # Upper bound on rendered invoice detail HTML kept in memory per worker
+    HTML_FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('HTML_FRAGMENT_CACHE_MAX_BYTES') or 16 * 1024 * 1024)
+    # PDFs larger than this spill from memory to an anonymous temp file while rendering
+    PDF_SPOOL_MAX_BYTES = int(os.environ.get('PDF_SPOOL_MAX_BYTES') or 8 * 1024 * 1024)
+    # Invoices with more employee rows than this use the lightweight large-invoice layout
+    PDF_LARGE_INVOICE_ROWS = int(os.environ.get('PDF_LARGE_INVOICE_ROWS') or 200)
+    # Processes used to render PDFs for bulk ZIP exports
+    BULK_EXPORT_WORKERS = int(os.environ.get('BULK_EXPORT_WORKERS') or os.cpu_count() or 1)
+    # Background PDF render threads per worker process, and how long finished jobs are kept
+    PDF_JOB_WORKERS = int(os.environ.get('PDF_JOB_WORKERS') or 2)
+    PDF_JOB_RETENTION_HOURS = int(os.environ.get('PDF_JOB_RETENTION_HOURS') or 24)
+    # Jobs still queued or running this long after they were queued or started are taken to
+    # belong to a worker that stopped: queued ones are run again, running ones are failed
+    PDF_JOB_TIMEOUT_SECONDS = int(os.environ.get('PDF_JOB_TIMEOUT_SECONDS') or 300)
+    # Rows per page on the invoice history and employee lists (and their JSON APIs)
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE') or 50)
+    # Invoice months shown on the dashboard revenue tables
+    DASHBOARD_MONTHS = int(os.environ.get('DASHBOARD_MONTHS') or 12)
+    # Resolution of the logo rendition embedded in PDFs
+    LOGO_PDF_DPI = int(os.environ.get('LOGO_PDF_DPI') or 150)
+    # Compiled templates are kept here, so restarted workers load them instead of recompiling
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(BASE_DIR, 'instance', 'jinja-cache')
@@ -0,0 +1,35 @@
+"""
+gunicorn settings, read automatically when gunicorn starts in this directory.
+
+By default the app is loaded and warmed up once in the master (see
+app/warmup.py), and workers are forked from it with ReportLab imported and
+every template compiled, so a new or restarted worker serves its first
+request at full speed and shares those pages with the others. Set
+GUNICORN_PRELOAD_APP=0 to load the app in each worker instead (needed for
+gunicorn's --reload); each worker then warms itself up before it accepts
+requests.
+"""
+import os
+
+preload_app = (os.environ.get('GUNICORN_PRELOAD_APP') or '1') != '0'
+
+
+def _warm(app, log):
+    from app.warmup import warmup
+    log.info("Warmed up in %.0f ms", warmup(app) * 1000)
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    app = server.app.wsgi()
+    _warm(app, server.log)
+    # Don't let workers inherit connections the master opened (migrations on start)
+    from app.models import db
+    with app.app_context():
+        db.engine.dispose()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _warm(worker.wsgi, worker.log)
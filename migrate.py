@@ -0,0 +1,40 @@
+"""
+Database migration script: brings the schema up to the latest version.
+
+Run it once per deploy, before starting the workers (see Procfile). Safe to
+run while workers are up or from several places at once - migrations take
+a lock and each one is applied only once. See app/migrations.
+"""
+import sys
+from flask import Flask
+from config import Config
+from app.models import db
+from app.models.engine import init_db
+from app.migrations import upgrade, current_version, LATEST_VERSION
+from app.services.logo_service import prepare_root_logo
+
+def migrate():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_db(app, db)
+
+    with app.app_context():
+        try:
+            version = current_version()
+            print(f"Schema version: {'unversioned' if version is None else version} (latest {LATEST_VERSION})")
+            applied = upgrade()
+            if applied:
+                print(f"✓ Schema is at version {LATEST_VERSION}")
+            else:
+                print("✓ Schema already up to date")
+            if prepare_root_logo():
+                print("✓ logo.png PDF rendition ready")
+        except Exception as e:
+            print(f"Error during migration: {e}")
+            return False
+    return True
+
+if __name__ == '__main__':
+    if not migrate():
+        sys.exit(1)
+    print("Migration complete!")
@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+# Before config is imported: the app wsgi creates at import must not touch a real database
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'wsgi.db')
+
+import pytest
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An app on its own fresh SQLite database"""
+    from wsgi import create_app
+
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'test.db'))
+    monkeypatch.setattr(Config, 'MIGRATE_ON_START', True)
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def employee_ids(client):
+    """Three employees of one consultancy, "Acme", added through the employees page"""
+    for i in range(3):
+        response = client.post('/employees/add', data={
+            'name': f'Employee {i}', 'salary_per_annum': str(600000 + i * 1200),
+            'client_consultancy': 'Acme', 'salary_date': '10'
+        })
+        assert response.status_code == 302
+    return ['1', '2', '3']
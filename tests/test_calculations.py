@@ -0,0 +1,51 @@
+import itertools
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import pytest
+from app.models.employee import Employee
+from app.services.calculations import calculate_batch_totals, calculate_employee_totals
+
+SALARIES = [Decimal('50000.00'), Decimal('41666.67'), Decimal('123456.78'), Decimal('0.01'), 37500]
+
+# A range covering two year ends and the 2024 leap February
+START, END = date(2023, 11, 1), date(2025, 3, 31)
+
+
+def _invoice_dates(start, end):
+    """First, 15th and last day of every month, plus datetimes and the day after each month end"""
+    dates = []
+    current = start
+    while current <= end:
+        next_month = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        dates.extend([current, current.replace(day=15), next_month - timedelta(days=1), next_month,
+                      datetime(current.year, current.month, 15, 9, 30)])
+        current = next_month
+    return dates
+
+
+def _employees():
+    # Joining dates sampled around month starts and ends and the default salary date (10th)
+    days = [START + timedelta(days=n) for n in range((END - START).days + 1)]
+    joining_dates = [None] + [day for day in days if day.day in (1, 2, 10, 11, 28, 29, 30, 31)]
+    return [
+        Employee(id=i, name=f"Check {i}", salary_per_annum=0, salary_per_month=salary,
+                 client_consultancy="Check", is_new_employee=is_new, date_of_joining=joining_date, salary_date=10)
+        for i, (joining_date, is_new, salary) in enumerate(
+            itertools.product(joining_dates, (False, True, None), SALARIES))
+    ]
+
+
+EMPLOYEES = _employees()
+
+
+@pytest.mark.parametrize('invoice_date', _invoice_dates(START, END), ids=str)
+def test_batch_totals_match_per_employee_totals(invoice_date):
+    batch = calculate_batch_totals(EMPLOYEES, invoice_date)
+    assert len(batch) == len(EMPLOYEES)
+    for employee, result in zip(EMPLOYEES, batch):
+        expected = calculate_employee_totals(employee, invoice_date)
+        for field, value in expected.items():
+            # Same digits and same type, not just equal values
+            assert (str(result[field]), type(result[field])) == (str(value), type(value)), (
+                f"{field} joining={employee.date_of_joining} new={employee.is_new_employee} "
+                f"salary={employee.salary_per_month!r}")
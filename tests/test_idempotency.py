@@ -0,0 +1,58 @@
+from app.models.invoice import Invoice
+from app.routes import invoices as invoice_routes
+
+
+def _generate(client, employee_ids, key=None, **fields):
+    form = {'client_consultancy': 'Acme', 'invoice_to': 'Acme Corp', 'employee_ids': employee_ids, **fields}
+    if key:
+        form['idempotency_key'] = key
+    return client.post('/invoices/generate', data=form)
+
+
+def _invoice_count(app):
+    with app.app_context():
+        return Invoice.query.count()
+
+
+def test_same_key_twice_redirects_to_the_first_invoice(app, client, employee_ids):
+    first = _generate(client, employee_ids, key='form-1')
+    second = _generate(client, employee_ids, key='form-1')
+
+    assert '/invoices/view/' in first.headers['Location']
+    assert second.headers['Location'] == first.headers['Location']
+    assert _invoice_count(app) == 1
+
+
+def test_same_key_for_different_content_is_refused(app, client, employee_ids):
+    _generate(client, employee_ids, key='form-1')
+    response = _generate(client, employee_ids, key='form-1', miscellaneous_cost='100.00')
+
+    assert response.headers['Location'].endswith('/invoices/generate')
+    assert _invoice_count(app) == 1
+
+
+def test_same_content_with_a_new_key_is_detected(app, client, employee_ids):
+    first = _generate(client, employee_ids, key='form-1')
+    second = _generate(client, list(reversed(employee_ids)), key='form-2')
+
+    assert second.headers['Location'] == first.headers['Location']
+    assert _invoice_count(app) == 1
+
+
+def test_concurrent_duplicate_is_caught_by_the_unique_index(app, client, employee_ids, monkeypatch):
+    first = _generate(client, employee_ids, key='form-1')
+
+    # The second request checks before the first has committed, then loses the race on insert
+    lookups = []
+    find_duplicate_invoice = invoice_routes.find_duplicate_invoice
+
+    def racing_lookup(content_hash, idempotency_key=None):
+        lookups.append(idempotency_key)
+        return None if len(lookups) == 1 else find_duplicate_invoice(content_hash, idempotency_key)
+
+    monkeypatch.setattr(invoice_routes, 'find_duplicate_invoice', racing_lookup)
+    second = _generate(client, employee_ids, key='form-2')
+
+    assert lookups == ['form-2', 'form-2']
+    assert second.headers['Location'] == first.headers['Location']
+    assert _invoice_count(app) == 1
@@ -0,0 +1,8 @@
+from benchmarks.invoice_numbers import run_stress
+
+
+def test_concurrent_workers_get_distinct_gapless_numbers(tmp_path):
+    failures, problems, _ = run_stress('sqlite:///' + str(tmp_path / 'numbers.db'), workers=4, invoices=10)
+
+    assert failures == 0
+    assert problems == []
@@ -0,0 +1,128 @@
+import sqlite3
+import pytest
+from config import Config
+from app.models import db
+from app.migrations import LATEST_VERSION, schema_version, upgrade
+from app.models.invoice import Invoice
+
+# The schema the app created before versioned migrations (the baseline release)
+BASELINE_SCHEMA = """
+CREATE TABLE employees (
+    id INTEGER NOT NULL,
+    name VARCHAR(200) NOT NULL,
+    salary_per_annum NUMERIC(10, 2) NOT NULL,
+    salary_per_month NUMERIC(10, 2) NOT NULL,
+    client_consultancy VARCHAR(200) NOT NULL,
+    is_new_employee BOOLEAN NOT NULL,
+    date_of_joining DATE,
+    salary_date INTEGER NOT NULL,
+    created_at DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE TABLE invoices (
+    id INTEGER NOT NULL,
+    invoice_number VARCHAR(50) NOT NULL,
+    invoice_date DATE NOT NULL,
+    invoice_to VARCHAR(200) NOT NULL,
+    client_consultancy VARCHAR(200) NOT NULL,
+    employee_ids TEXT NOT NULL,
+    total_monthly_payroll NUMERIC(10, 2) NOT NULL,
+    total_annual_payroll NUMERIC(10, 2) NOT NULL,
+    miscellaneous_cost NUMERIC(10, 2) NOT NULL,
+    service_fee NUMERIC(10, 2) NOT NULL,
+    notes TEXT,
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (invoice_number)
+);
+CREATE TABLE company_settings (
+    id INTEGER NOT NULL,
+    company_name VARCHAR(200) NOT NULL,
+    company_address TEXT NOT NULL,
+    logo_path VARCHAR(500),
+    updated_at DATETIME,
+    PRIMARY KEY (id)
+);
+INSERT INTO company_settings VALUES (1, 'TRUEZEN TECHNOLOGIES', '', NULL, '2026-09-01 09:00:00');
+INSERT INTO employees VALUES (1, 'Asha', 600000, 50000, 'Acme Staffing', 0, NULL, 10, '2026-09-01 09:00:00');
+INSERT INTO employees VALUES (2, 'Ben', 612000, 51000, 'acme staffing ', 1, '2026-09-15', 10, '2026-09-01 09:01:00');
+INSERT INTO employees VALUES (3, 'Chen', 624000, 52000, 'Beta Corp', 0, NULL, 10, '2026-09-01 09:02:00');
+-- INV-20260920-002 bills exactly what INV-20260920-001 did (a double submit)
+INSERT INTO invoices VALUES (1, 'INV-20260920-001', '2026-09-20', 'Acme Ltd', 'Acme Staffing', '["1", "2"]',
+                             101000, 1212000, 0, 5050, NULL, '2026-09-20 10:00:00');
+INSERT INTO invoices VALUES (2, 'INV-20260920-002', '2026-09-20', 'Acme Ltd', 'Acme Staffing', '["2", "1"]',
+                             101000, 1212000, 0, 5050, NULL, '2026-09-20 10:00:01');
+INSERT INTO invoices VALUES (3, 'INV-20260920-003', '2026-09-20', 'Beta Ltd', 'Beta Corp', '["3"]',
+                             52000, 624000, 250.50, 0, 'legacy note', '2026-09-20 11:00:00');
+"""
+
+
+def _app(monkeypatch, path):
+    """An app on the SQLite file at path that leaves migrating to the test"""
+    from wsgi import create_app
+
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(path))
+    monkeypatch.setattr(Config, 'MIGRATE_ON_START', False)
+    return create_app()
+
+
+def _schema():
+    """Every table's column names and indexes, ignoring types and constraints SQLite can't ALTER in"""
+    inspector = db.inspect(db.engine)
+    return {table: ({column['name'] for column in inspector.get_columns(table)},
+                    {(index['name'], tuple(index['column_names']), bool(index['unique']))
+                     for index in inspector.get_indexes(table)})
+            for table in inspector.get_table_names()}
+
+
+def _versions():
+    return db.session.execute(db.select(schema_version.c.version).order_by(schema_version.c.version)).scalars().all()
+
+
+@pytest.fixture
+def migrated(tmp_path, monkeypatch):
+    """(app, log lines) for a baseline database brought up to date by upgrade()"""
+    path = tmp_path / 'baseline.db'
+    with sqlite3.connect(path) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+    app = _app(monkeypatch, path)
+    log = []
+    with app.app_context():
+        assert upgrade(log=log.append) == list(range(1, LATEST_VERSION + 1))
+    return app, log
+
+
+def test_baseline_database_migrates_to_the_latest_version(migrated):
+    app, log = migrated
+    with app.app_context():
+        assert _versions() == list(range(1, LATEST_VERSION + 1))
+        # Already current: nothing more to apply
+        assert upgrade(log=log.append) == []
+        assert db.session.query(Invoice).count() == 3
+
+
+def test_duplicate_invoices_keep_one_content_hash(migrated):
+    app, log = migrated
+    with app.app_context():
+        hashes = dict(db.session.execute(db.select(Invoice.invoice_number, Invoice.content_hash)).all())
+    assert hashes['INV-20260920-001'] is not None
+    assert hashes['INV-20260920-002'] is None
+    assert hashes['INV-20260920-003'] not in (None, hashes['INV-20260920-001'])
+    assert "! INV-20260920-002 repeats an earlier invoice and is left unhashed" in log
+
+
+def test_fresh_and_migrated_databases_have_the_same_schema(migrated, tmp_path, monkeypatch):
+    app, _ = migrated
+    with app.app_context():
+        migrated_schema = _schema()
+        db.engine.dispose()
+
+    fresh = _app(monkeypatch, tmp_path / 'fresh.db')
+    with fresh.app_context():
+        assert upgrade(log=lambda line: None) == [LATEST_VERSION]
+        assert _versions() == [LATEST_VERSION]
+        fresh_schema = _schema()
+
+    assert fresh_schema.keys() == migrated_schema.keys()
+    for table, (columns, indexes) in fresh_schema.items():
+        assert migrated_schema[table] == (columns, indexes), table
@@ -0,0 +1,32 @@
+import copy
+import pickle
+from decimal import Decimal
+import pytest
+from app.services.money import Money, ZERO
+
+
+def test_money_cannot_be_changed_in_place():
+    salary = Money.from_decimal(Decimal('41666.67'))
+    with pytest.raises(AttributeError):
+        salary.paise += 100
+    with pytest.raises(AttributeError):
+        del salary.paise
+    with pytest.raises(AttributeError):
+        ZERO.paise = 1
+    assert Money.from_decimal(Decimal('41666.67')).paise == 4166667
+
+
+def test_augmented_assignment_rebinds_instead_of_mutating_shared_instances():
+    shared = Money.from_decimal(Decimal('50000.00'))
+    total = shared
+    total += Money(1)
+    assert total == Money(5000001)
+    assert shared is Money.from_decimal(Decimal('50000.00'))
+    assert shared.paise == 5000000
+
+
+def test_money_pickles_and_copies():
+    amount = Money(123456)
+    assert pickle.loads(pickle.dumps(amount)) == amount
+    assert copy.copy(amount) == amount
+    assert copy.deepcopy(amount) == amount
@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timedelta
+from app.models import db
+from app.models.pdf_job import PdfJob
+from app.services.pdf_jobs import recover_stale_jobs
+
+
+def _invoice_id(client, employee_ids):
+    response = client.post('/invoices/generate', data={
+        'client_consultancy': 'Acme', 'invoice_to': 'Acme Corp', 'employee_ids': employee_ids
+    })
+    return int(response.headers['Location'].rstrip('/').rsplit('/', 1)[-1])
+
+
+def _add_job(app, invoice_id, status, age):
+    """A job left behind by a worker that stopped `age` ago"""
+    stopped_at = datetime.utcnow() - age
+    with app.app_context():
+        job = PdfJob(invoice_id=invoice_id, status=status, created_at=stopped_at,
+                     started_at=stopped_at if status == PdfJob.STATUS_RUNNING else None)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+
+def _wait_for(client, job_id, status):
+    for _ in range(100):
+        data = client.get(f'/jobs/{job_id}').json
+        if data['status'] == status:
+            return data
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} is still {data['status']}")
+
+
+def test_stale_running_job_is_failed_when_polled(app, client, employee_ids):
+    invoice_id = _invoice_id(client, employee_ids)
+    job_id = _add_job(app, invoice_id, PdfJob.STATUS_RUNNING, timedelta(hours=1))
+
+    data = client.get(f'/jobs/{job_id}').json
+    assert data['status'] == PdfJob.STATUS_FAILED
+    assert 'did not finish' in data['error']
+
+
+def test_stale_queued_job_is_run_again(app, client, employee_ids):
+    invoice_id = _invoice_id(client, employee_ids)
+    job_id = _add_job(app, invoice_id, PdfJob.STATUS_QUEUED, timedelta(hours=1))
+
+    client.get(f'/jobs/{job_id}')
+    data = _wait_for(client, job_id, PdfJob.STATUS_DONE)
+    assert client.get(data['download_url']).data[:4] == b'%PDF'
+
+
+def test_recent_jobs_are_left_alone(app, client, employee_ids):
+    invoice_id = _invoice_id(client, employee_ids)
+    running_id = _add_job(app, invoice_id, PdfJob.STATUS_RUNNING, timedelta(seconds=5))
+    queued_id = _add_job(app, invoice_id, PdfJob.STATUS_QUEUED, timedelta(seconds=5))
+
+    with app.app_context():
+        assert recover_stale_jobs(app) == (0, 0)
+    assert client.get(f'/jobs/{running_id}').json['status'] == PdfJob.STATUS_RUNNING
+    assert client.get(f'/jobs/{queued_id}').json['status'] == PdfJob.STATUS_QUEUED
+
+
+def test_enqueue_recovers_stale_jobs_and_prunes_old_ones(app, client, employee_ids):
+    invoice_id = _invoice_id(client, employee_ids)
+    stale_id = _add_job(app, invoice_id, PdfJob.STATUS_RUNNING, timedelta(minutes=10))
+    _add_job(app, invoice_id, PdfJob.STATUS_QUEUED, timedelta(days=2))
+
+    response = client.post(f'/invoices/pdf/{invoice_id}/jobs')
+    assert response.status_code == 202
+    _wait_for(client, response.json['id'], PdfJob.STATUS_DONE)
+    assert client.get(f'/jobs/{stale_id}').json['status'] == PdfJob.STATUS_FAILED
+    with app.app_context():
+        # SQLite may reuse the pruned job's id, so check by age
+        assert PdfJob.query.filter(PdfJob.created_at < datetime.utcnow() - timedelta(days=1)).count() == 0
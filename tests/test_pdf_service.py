@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import pytest
+from PIL import Image as PILImage
+from config import Config
+from app.services import logo_service
+from app.services.logo_service import prepare_root_logo
+from app.services.pdf_service import _pdf_logo_file, generate_pdf
+from benchmarks.synthetic import make_company_settings, make_employees, make_invoice
+
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    """An empty tempfile.gettempdir(), and no logo, so renders touch nothing else on disk"""
+    temp_dir = tmp_path / 'tmp'
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(temp_dir))
+    monkeypatch.setattr(Config, 'BASE_DIR', str(tmp_path))
+    return temp_dir
+
+
+def test_rendering_many_invoices_leaves_no_temp_files(temp_dir):
+    invoice = make_invoice(make_employees(5))
+    company_settings = make_company_settings()
+    before = sorted(os.listdir(tempfile.gettempdir()))
+
+    for _ in range(50):
+        pdf = generate_pdf(invoice, invoice.lines, company_settings)
+        assert pdf.read(4) == b'%PDF'
+        pdf.close()
+
+    assert sorted(os.listdir(tempfile.gettempdir())) == before
+
+
+def test_spool_over_the_threshold_is_removed_once_closed(temp_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'PDF_SPOOL_MAX_BYTES', 1024)
+    invoice = make_invoice(make_employees(5))
+
+    pdf = generate_pdf(invoice, invoice.lines, make_company_settings())
+    # Rolled over to a real file, which is anonymous and so already off the directory listing
+    assert pdf._rolled
+    assert not isinstance(pdf._file, io.BytesIO)
+    assert pdf.read(4) == b'%PDF'
+    pdf.close()
+
+    assert pdf.closed
+    assert os.listdir(tempfile.gettempdir()) == []
+
+
+def test_rendering_only_reads_logo_renditions(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(logo_service, '_root_logo', None)
+    logo = tmp_path / 'logo.png'
+    PILImage.new('RGB', (400, 100), 'navy').save(logo)
+    invoice = make_invoice(make_employees(2))
+
+    # No rendition prepared: the original is embedded and nothing is written
+    generate_pdf(invoice, invoice.lines, make_company_settings()).close()
+    assert _pdf_logo_file(make_company_settings()) == str(logo)
+    assert not (tmp_path / 'app').exists()
+
+    # Once prepared (migrate.py, warmup), its rendition is embedded
+    rendition = prepare_root_logo()
+    assert rendition.endswith('-pdf.jpg')
+    assert _pdf_logo_file(make_company_settings()) == rendition
+
+    # A replaced logo is embedded as-is until it is prepared again
+    PILImage.new('RGB', (400, 100), 'maroon').save(logo)
+    os.utime(logo, ns=(0, 0))
+    assert _pdf_logo_file(make_company_settings()) == str(logo)
+    assert prepare_root_logo() not in (None, rendition)
@@ -0,0 +1,32 @@
+from markupsafe import Markup
+from app.services.render_cache import RenderCache
+
+
+def test_text_is_sized_in_utf8_bytes():
+    cache = RenderCache(max_bytes=100)
+    fragment = Markup('<td>₹ 1,00,000</td>')
+    cache.put('a', fragment)
+    assert cache.get('a') == fragment
+    assert cache.size == len(fragment.encode('utf-8')) > len(fragment)
+
+
+def test_budget_holds_for_non_ascii_text():
+    # 30 characters, 90 bytes each: only one fits in 100 bytes
+    cache = RenderCache(max_bytes=100)
+    cache.put('a', 'क' * 30)
+    cache.put('b', 'ख' * 30)
+    assert cache.get('a') is None
+    assert cache.get('b') == 'ख' * 30
+    assert cache.size == 90
+
+    # Too big on its own in bytes, though not in characters
+    cache.put('c', '₹' * 40)
+    assert cache.get('c') is None
+
+
+def test_bytes_are_sized_by_length():
+    cache = RenderCache(max_bytes=10)
+    cache.put('a', b'%PDF-1')
+    cache.put('b', b'%PDF-2')
+    assert cache.get('a') is None
+    assert cache.size == 6
@@ -1,6 +1,8 @@
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 from config import Config
 from app.models import db
+from app.models.engine import init_db
 from app.routes import register_routes
 
 def create_app():
@@ -10,8 +12,12 @@ def create_app():
     app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
     app.config.from_object(Config)
     
-    # Initialize database
-    db.init_app(app)
+    # Initialize database, with the pool and SQLite pragma settings from Config
+    init_db(app, db)
+    
+    # Reuse templates compiled by earlier processes
+    os.makedirs(app.config['JINJA_BYTECODE_CACHE_DIR'], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['JINJA_BYTECODE_CACHE_DIR'])
     
     # Add custom Jinja2 filter for nl2br
     @app.template_filter('nl2br')
@@ -24,19 +30,11 @@ def create_app():
     # Register routes
     register_routes(app)
     
-    # Create tables
-    with app.app_context():
-        db.create_all()
-        
-        # Initialize default company settings if not exists
-        from app.models.company_settings import CompanySettings
-        if not CompanySettings.query.first():
-            default_settings = CompanySettings(
-                company_name="TRUEZEN TECHNOLOGIES",
-                company_address=""
-            )
-            db.session.add(default_settings)
-            db.session.commit()
+    # Bring the schema up to date (one SELECT when it already is)
+    if app.config['MIGRATE_ON_START']:
+        from app.migrations import upgrade
+        with app.app_context():
+            upgrade(log=app.logger.info)
     
     return app
 